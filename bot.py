@@ -25,7 +25,8 @@ filterwarnings(action="ignore", message=r".*CallbackQueryHandler", category=PTBU
 # Импорты из вашего проекта
 from config.config import load_config
 from config.settings import UserState, MESSAGES, KEYBOARDS, PACKAGE_PRICING
-from database.db_manager import DatabaseManager
+from database.async_db_manager import AsyncDatabaseManager
+from database.engine import SQLITE_PRAGMAS
 from handlers.admin_handlers import AdminHandlers
 from handlers.user_handlers import UserHandlers
 from handlers.payment_handlers import PaymentHandlers
@@ -46,19 +47,38 @@ class TelegramBot:
         self.bot_config, self.db_config, self.payment_config, self.pricing_config = load_config()
 
         # Инициализируем базу данных
-        self.db_manager = DatabaseManager(
+        self.db_manager = AsyncDatabaseManager(
             database_url=self.db_config.database_url,
-            echo=self.db_config.echo if hasattr(self.db_config, 'echo') else False
+            echo=self.db_config.echo if hasattr(self.db_config, 'echo') else False,
+            read_database_url=self.db_config.read_database_url,
+            pool_options={
+                'pool_size': self.db_config.pool_size,
+                'max_overflow': self.db_config.max_overflow,
+                'pool_timeout': self.db_config.pool_timeout,
+                'pool_recycle': self.db_config.pool_recycle,
+                'pool_pre_ping': self.db_config.pool_pre_ping,
+            },
+            sqlite_pragmas={**SQLITE_PRAGMAS, 'busy_timeout': self.db_config.sqlite_busy_timeout},
+            state_cache_size=self.db_config.state_cache_size,
+            state_cache_ttl=self.db_config.state_cache_ttl,
+            admin_refresh_interval=self.db_config.admin_refresh_interval,
+            session_store_size=self.db_config.session_store_size,
+            session_max_unflushed_age=self.db_config.session_max_unflushed_age,
+            query_stats=self.db_config.query_stats,
+            slow_query_ms=self.db_config.slow_query_ms,
+            lock_retry_attempts=self.db_config.lock_retry_attempts,
+            lock_retry_base_delay=self.db_config.lock_retry_base_delay,
+            lock_retry_max_delay=self.db_config.lock_retry_max_delay
         )
-        self.db_manager.create_tables()
 
         # Инициализируем сервисы
         self.payment_service = PaymentService(self.db_manager)
-        self.filter_service = StopWordsFilter(self.db_manager)
+        self.filter_service = StopWordsFilter(self.db_manager, mode=self.bot_config.stop_words_mode,
+                                              max_distance=self.bot_config.stop_words_max_distance)
 
         # Инициализируем обработчики
-        self.admin_handlers = AdminHandlers(self.db_manager)
-        self.user_handlers = UserHandlers(self.db_manager)
+        self.admin_handlers = AdminHandlers(self.db_manager, self.filter_service)
+        self.user_handlers = UserHandlers(self.db_manager, self.filter_service)
         self.payment_handlers = PaymentHandlers(self.db_manager, self.payment_service)
 
         # Планировщик будет инициализирован после старта event loop
@@ -116,7 +136,7 @@ class TelegramBot:
     async def _balance_command(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
         """Обработчик команды /balance"""
         user_id = update.effective_user.id
-        balance = self.db_manager.get_user_balance(user_id)
+        balance = await self.db_manager.get_user_balance(user_id)
 
         text = f"💰 *Ваш баланс:* {int(balance)} рублей"
 
@@ -132,7 +152,7 @@ class TelegramBot:
     async def _shop_command(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
         """Обработчик команды /shop"""
         user_id = update.effective_user.id
-        balance = self.db_manager.get_user_balance(user_id)
+        balance = await self.db_manager.get_user_balance(user_id)
 
         text = f"🛒 *Магазин*\n\nВаш баланс: {int(balance)} рублей\n\nВыберите что покупаем:"
 
@@ -152,6 +172,8 @@ class TelegramBot:
         self.application.add_handler(CommandHandler("help", self._help_command))
         self.application.add_handler(CommandHandler("balance", self._balance_command))
         self.application.add_handler(CommandHandler("shop", self._shop_command))
+        self.application.add_handler(CommandHandler("dbstats", self.admin_handlers.db_stats_command))
+        self.application.add_handler(CommandHandler("rescan", self.admin_handlers.rescan_command))
 
         # Обработчики callback-кнопок
         self.application.add_handler(CallbackQueryHandler(
@@ -376,7 +398,7 @@ class TelegramBot:
     async def _handle_text_message(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
         """Обработка текстовых сообщений в зависимости от состояния пользователя"""
         user_id = update.effective_user.id
-        state = self.db_manager.get_user_state(user_id)
+        state = await self.db_manager.get_user_state(user_id)
 
         logger.info(f"Обработка текстового сообщения от пользователя {user_id}, состояние: {state}")
 
@@ -423,12 +445,11 @@ class TelegramBot:
             contact = update.message.contact
             user_id = update.effective_user.id
 
-            # Сохраняем контакт в сессии
-            session_data = self.db_manager.get_session_data(user_id)
-            session_data['contacts'] = f"+{contact.phone_number}"
-            self.db_manager.save_session_data(user_id, session_data)
+            async with self.db_manager.user_work(user_id) as work:
+                # Сохраняем контакт в сессии
+                work.session_data['contacts'] = f"+{contact.phone_number}"
 
-            await self.user_handlers.review_publication(update, context)
+                await self.user_handlers.review_publication(update, context, work)
 
         except Exception as e:
             logger.error(f"Ошибка обработки контакта: {e}")
@@ -450,24 +471,60 @@ class TelegramBot:
             logger.error(f"Ошибка в error_handler: {e}")
 
     async def on_startup(self):
-        """Инициализация планировщика после старта event loop"""
-        try:
-            # Устанавливаем меню команд
-            await self.setup_bot_commands()
+        """
+        Инициализация схемы БД и планировщика после старта event loop.
+        Ошибки не перехватываются: без схемы и планировщика бот не запускается
+        """
+        # Миграции схемы (асинхронный движок доступен только внутри event loop)
+        schema = await self.db_manager.migrate()
+        logger.info(f"✅ Схема БД: версия {schema['version']}, применено миграций "
+                    f"{len(schema['applied'])}, {schema['elapsed_ms']:.1f} мс")
+        await self.db_manager.refresh_admin_ids()
+
+        # Устанавливаем меню команд (ошибки Telegram API обрабатываются внутри)
+        await self.setup_bot_commands()
+        logger.info("✅ Меню команд настроено")
+
+        self.scheduler = PublicationScheduler(
+            self.db_manager,
+            self.application.bot,
+            self.bot_config.group_id
+        )
+        self.user_handlers.set_scheduler(self.scheduler)
+        self.scheduler.add_interval_job(
+            self.db_manager.flush_sessions,
+            seconds=self.db_config.session_flush_interval,
+            job_id='flush_sessions'
+        )
+        self.scheduler.add_interval_job(
+            self.sweep_stale_sessions,
+            seconds=self.db_config.session_sweep_interval,
+            job_id='sweep_stale_sessions'
+        )
+        self.scheduler.add_interval_job(
+            self.db_manager.compact_balance_snapshots,
+            seconds=self.db_config.balance_compaction_interval,
+            job_id='compact_balance_snapshots'
+        )
+        logger.info("✅ Планировщик инициализирован")
 
-            self.scheduler = PublicationScheduler(
-                self.db_manager,
-                self.application.bot,
-                self.bot_config.group_id
+    async def sweep_stale_sessions(self):
+        """Периодическая очистка брошенных сессий мастера публикаций"""
+        try:
+            result = await self.db_manager.sweep_stale_sessions(
+                self.db_config.session_ttl,
+                self.db_config.session_sweep_batch_size
             )
-            self.user_handlers.set_scheduler(self.scheduler)
-            logger.info("✅ Планировщик инициализирован")
-            logger.info("✅ Меню команд настроено")
+            logger.info(f"Очистка сессий: освобождено строк {result['sessions_deleted']}, "
+                        f"сброшено состояний {result['states_reset']}")
         except Exception as e:
-            logger.error(f"Ошибка инициализации: {e}")
+            logger.error(f"Ошибка очистки сессий: {e}")
 
     async def on_shutdown(self):
-        """Остановка планировщика при завершении работы"""
+        """
+        Остановка планировщика, сохранение сессий и закрытие соединений.
+        Вызывается после остановки приема и обработки обновлений
+        """
         try:
             if self.scheduler:
                 self.scheduler.shutdown()
@@ -475,6 +532,18 @@ class TelegramBot:
         except Exception as e:
             logger.error(f"Ошибка остановки планировщика: {e}")
 
+        try:
+            flushed = await self.db_manager.flush_sessions()
+            logger.info(f"Сессии сохранены в базу данных: {flushed}")
+        except Exception as e:
+            logger.error(f"Ошибка сохранения сессий: {e}")
+
+        try:
+            await self.db_manager.dispose()
+            logger.info("Соединения с базой данных закрыты")
+        except Exception as e:
+            logger.error(f"Ошибка закрытия соединений с базой данных: {e}")
+
     def run_bot(self):
         """Запуск бота"""
         import asyncio
@@ -497,16 +566,15 @@ class TelegramBot:
                         await asyncio.sleep(1)
                 except KeyboardInterrupt:
                     logger.info("Получен сигнал остановки")
-
-            except Exception as e:
-                logger.error(f"Критическая ошибка запуска бота: {e}")
             finally:
-                # Корректное завершение работы
-                await self.on_shutdown()
+                # Корректное завершение работы: сначала перестаем принимать и обрабатывать
+                # обновления, затем сохраняем сессии и закрываем соединения - иначе записи
+                # обработчиков, завершившихся после последнего flush, теряются
                 if self.application.updater.running:
                     await self.application.updater.stop()
                 if self.application.running:
                     await self.application.stop()
+                await self.on_shutdown()
                 await self.application.shutdown()
                 logger.info("Бот остановлен")
 
@@ -516,7 +584,9 @@ class TelegramBot:
         except KeyboardInterrupt:
             logger.info("Получен сигнал завершения работы")
         except Exception as e:
+            # Ошибка запуска (например, миграции схемы) завершает процесс с ненулевым кодом
             logger.error(f"Фатальная ошибка: {e}")
+            raise SystemExit(1)
 
 
 if __name__ == "__main__":
@@ -12,15 +12,37 @@ class BotConfig:
     webhook_url: Optional[str] = None
     webhook_port: int = 8443
     debug_mode: bool = False
+    stop_words_mode: str = "substring"  # Проверка стоп-слов: substring - подстрока, stem - по основам слов, fuzzy - с опечатками
+    stop_words_max_distance: int = 1  # Режим fuzzy: допустимое число опечаток в слове (1 или 2)
 
 
 @dataclass
 class DatabaseConfig:
     """Конфигурация базы данных"""
     database_url: str = "sqlite:///bot_database.db"
+    read_database_url: Optional[str] = None  # Отчетные чтения: реплика PostgreSQL или SQLite только на чтение
     pool_size: int = 5
     max_overflow: int = 10
+    pool_timeout: int = 30
+    pool_recycle: int = 1800  # Только PostgreSQL: пересоздавать соединения старше, сек
+    pool_pre_ping: bool = True  # Только PostgreSQL: проверять соединение перед выдачей из пула
+    sqlite_busy_timeout: int = 5000  # Только SQLite: ожидание блокировки, мс
     echo: bool = False
+    state_cache_size: int = 10000  # Максимум пользователей в кэше состояний
+    state_cache_ttl: float = 600.0  # Время жизни записи кэша состояний, сек
+    admin_refresh_interval: Optional[float] = 300.0  # Период перезагрузки списка админов, сек (None - только при старте)
+    session_store_size: int = 10000  # Максимум сессий в памяти (несброшенные не вытесняются)
+    session_flush_interval: float = 5.0  # Период пакетного сброса сессий в user_sessions, сек
+    session_ttl: float = 86400.0  # Сессии без изменений дольше TTL удаляются, сек
+    session_sweep_interval: float = 3600.0  # Период очистки брошенных сессий, сек
+    session_sweep_batch_size: int = 500  # Размер пачки DELETE при очистке
+    session_max_unflushed_age: Optional[float] = 30.0  # Допустимый возраст несброшенных изменений, сек (None - без ограничения)
+    lock_retry_attempts: int = 5  # Попыток записи при "database is locked" (1 - без повторов)
+    lock_retry_base_delay: float = 0.05  # Базовая пауза перед повтором, сек (удваивается, со случайным разбросом)
+    lock_retry_max_delay: float = 1.0  # Максимальная пауза перед повтором, сек
+    query_stats: bool = False  # Сбор латентности запросов с момента старта (включается и командой /dbstats on)
+    slow_query_ms: Optional[float] = 200.0  # Порог лога медленных запросов, мс (None - без лога)
+    balance_compaction_interval: float = 600.0  # Период переноса хвостов журнала баланса в снимки, сек
 
 
 @dataclass
@@ -67,11 +89,15 @@ def load_config() -> tuple[BotConfig, DatabaseConfig, PaymentConfig, PricingConf
         bot_token=bot_token,
         group_id=group_id,
         webhook_url=os.getenv("WEBHOOK_URL"),
-        debug_mode=os.getenv("DEBUG", "False").lower() == "true"
+        debug_mode=os.getenv("DEBUG", "False").lower() == "true",
+        stop_words_mode=os.getenv("STOP_WORDS_MODE", "substring").lower(),
+        stop_words_max_distance=int(os.getenv("STOP_WORDS_MAX_DISTANCE", "1"))
     )
 
     db_config = DatabaseConfig(
         database_url=os.getenv("DATABASE_URL", "sqlite:///bot_database.db"),
+        read_database_url=os.getenv("DATABASE_READ_URL"),
+        query_stats=os.getenv("DB_QUERY_STATS", "False").lower() == "true",
         echo=bot_config.debug_mode
     )
 
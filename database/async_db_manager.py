@@ -0,0 +1,323 @@
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlalchemy.util import greenlet_spawn
+from contextlib import asynccontextmanager
+from typing import Optional, List, Dict, Any, AsyncIterator, Set, Tuple
+import logging
+from datetime import datetime
+
+from .db_manager import DatabaseManager
+from .dto import UserDTO, PublicationDTO, PaymentDTO, ScheduledPostDTO, LedgerEntryDTO
+from .unit_of_work import UserUnitOfWork
+from .engine import engine_options, install_sqlite_pragmas, read_only_pragmas
+
+logger = logging.getLogger(__name__)
+
+# Асинхронные драйверы для синхронных URL из конфигурации
+ASYNC_DRIVERS = {
+    'sqlite': 'sqlite+aiosqlite',
+    'postgresql': 'postgresql+asyncpg',
+    'postgres': 'postgresql+asyncpg',
+}
+
+
+def to_async_url(database_url: str) -> str:
+    """Подставить асинхронный драйвер в URL базы данных"""
+    url = make_url(database_url)
+    if '+' in url.drivername:
+        backend, driver = url.drivername.split('+', 1)
+        if driver in ('aiosqlite', 'asyncpg'):
+            return url.render_as_string(hide_password=False)
+    else:
+        backend = url.drivername
+    if backend not in ASYNC_DRIVERS:
+        raise ValueError(f"Нет асинхронного драйвера для {url.drivername}")
+    return url.set(drivername=ASYNC_DRIVERS[backend]).render_as_string(hide_password=False)
+
+
+class AsyncDatabaseManager:
+    """
+    Асинхронный менеджер базы данных.
+
+    Работает поверх AsyncEngine (aiosqlite/asyncpg). Логика запросов не
+    дублируется: методы DatabaseManager выполняются через greenlet_spawn
+    на sync-фасаде AsyncEngine, поэтому ввод-вывод не блокирует event loop.
+    """
+
+    def __init__(self, database_url: str, echo: bool = False, read_database_url: str = None,
+                 pool_options: Optional[Dict[str, Any]] = None,
+                 sqlite_pragmas: Optional[Dict[str, Any]] = None, **options):
+        """
+        Args:
+            database_url: URL базы данных (синхронный или асинхронный)
+            read_database_url: URL для отчетных чтений (реплика или SQLite только на чтение)
+            echo: Логировать SQL
+            pool_options: Параметры пула (pool_size, max_overflow, pool_timeout, ...)
+            sqlite_pragmas: PRAGMA для SQLite (по умолчанию профиль SQLITE_PRAGMAS)
+            **options: Дополнительные параметры DatabaseManager (размеры кэшей и т.д.)
+        """
+        async_url = to_async_url(database_url)
+        self.async_engine = create_async_engine(async_url, echo=echo, **engine_options(async_url, pool_options))
+        install_sqlite_pragmas(self.async_engine.sync_engine, sqlite_pragmas)
+
+        self.read_async_engine = None
+        if read_database_url:
+            read_async_url = to_async_url(read_database_url)
+            self.read_async_engine = create_async_engine(read_async_url, echo=echo,
+                                                         **engine_options(read_async_url, pool_options))
+            install_sqlite_pragmas(self.read_async_engine.sync_engine, read_only_pragmas(sqlite_pragmas))
+
+        self.sync_db = DatabaseManager(
+            engine=self.async_engine.sync_engine,
+            read_engine=self.read_async_engine.sync_engine if self.read_async_engine else None,
+            **options
+        )
+
+    async def _run(self, method, *args, **kwargs):
+        """Выполнить синхронный метод DatabaseManager без блокировки event loop"""
+        return await greenlet_spawn(method, *args, **kwargs)
+
+    async def create_tables(self):
+        """Создание всех таблиц"""
+        await self._run(self.sync_db.create_tables)
+
+    async def migrate(self) -> Dict[str, Any]:
+        """Применить недостающие миграции схемы"""
+        return await self._run(self.sync_db.migrate)
+
+    async def create_indexes(self):
+        """Создать недостающие индексы на существующих таблицах"""
+        await self._run(self.sync_db.create_indexes)
+
+    # Статистика запросов (без обращения к БД)
+    async def enable_query_stats(self, slow_query_ms: Optional[float] = None):
+        """Включить сбор латентности запросов"""
+        self.sync_db.enable_query_stats(slow_query_ms)
+
+    async def disable_query_stats(self):
+        """Выключить сбор латентности запросов"""
+        self.sync_db.disable_query_stats()
+
+    async def reset_query_stats(self):
+        """Обнулить статистику запросов"""
+        self.sync_db.reset_query_stats()
+
+    async def get_query_stats(self, top: int = 10) -> Dict[str, Any]:
+        """Латентность по методам и самые дорогие SQL-выражения"""
+        return self.sync_db.get_query_stats(top)
+
+    async def get_lock_retry_stats(self) -> Dict[str, Any]:
+        """Метрики повторов записей при блокировке БД"""
+        return self.sync_db.get_lock_retry_stats()
+
+    async def dispose(self):
+        """Закрыть все соединения пула"""
+        await self.async_engine.dispose()
+        if self.read_async_engine:
+            await self.read_async_engine.dispose()
+
+    # Методы для работы с пользователями
+    async def get_or_create_user(self, user_id: int, username: str = None,
+                                 first_name: str = None, last_name: str = None) -> UserDTO:
+        """Получить или создать пользователя"""
+        return await self._run(self.sync_db.get_or_create_user, user_id, username, first_name, last_name)
+
+    async def set_user_admin(self, user_id: int, is_admin: bool = True):
+        """Установить/снять административные права"""
+        await self._run(self.sync_db.set_user_admin, user_id, is_admin)
+
+    async def is_user_admin(self, user_id: int) -> bool:
+        """Проверить является ли пользователь админом"""
+        return await self._run(self.sync_db.is_user_admin, user_id)
+
+    async def refresh_admin_ids(self) -> Set[int]:
+        """Перезагрузить множество админов из БД"""
+        return await self._run(self.sync_db.refresh_admin_ids)
+
+    async def update_user_state(self, user_id: int, state: str):
+        """Обновить состояние пользователя"""
+        await self._run(self.sync_db.update_user_state, user_id, state)
+
+    async def get_user_state(self, user_id: int) -> str:
+        """Получить текущее состояние пользователя"""
+        return await self._run(self.sync_db.get_user_state, user_id)
+
+    async def get_state_cache_stats(self) -> Dict[str, Any]:
+        """Статистика кэша состояний"""
+        return self.sync_db.get_state_cache_stats()
+
+    # Методы для работы с балансом
+    async def get_user_balance(self, user_id: int) -> float:
+        """Получить баланс пользователя"""
+        return await self._run(self.sync_db.get_user_balance, user_id)
+
+    async def update_balance(self, user_id: int, amount: float) -> bool:
+        """Обновить баланс пользователя (может быть отрицательным для списания)"""
+        return await self._run(self.sync_db.update_balance, user_id, amount)
+
+    async def check_balance(self, user_id: int, required_amount: float) -> bool:
+        """Проверить достаточность средств"""
+        return await self._run(self.sync_db.check_balance, user_id, required_amount)
+
+    async def debit_if_sufficient(self, user_id: int, amount: float, reference: str = None) -> Optional[float]:
+        """Атомарно списать средства, если их достаточно (None - недостаточно)"""
+        return await self._run(self.sync_db.debit_if_sufficient, user_id, amount, reference)
+
+    async def get_balance_history(self, user_id: int, limit: int = 50,
+                                  before_id: int = None) -> List[LedgerEntryDTO]:
+        """Выписка по балансу: последние записи журнала"""
+        return await self._run(self.sync_db.get_balance_history, user_id, limit, before_id)
+
+    async def compact_balance_snapshots(self, min_age: float = 60.0, batch_size: int = 500) -> Dict[str, int]:
+        """Перенести хвосты журнала в снимки балансов"""
+        return await self._run(self.sync_db.compact_balance_snapshots, min_age, batch_size)
+
+    # Методы для работы с публикациями
+    async def create_publication(self, user_id: int, pub_type: str, text: str,
+                                 cost: float, **kwargs) -> int:
+        """Создать новую публикацию"""
+        return await self._run(self.sync_db.create_publication, user_id, pub_type, text, cost, **kwargs)
+
+    async def create_publications_bulk(self, user_id: int, pub_type: str, text: str, cost: float,
+                                       planned_times: List[datetime], status: str = 'scheduled',
+                                       frequency: str = None, day_of_week: int = None,
+                                       **kwargs) -> List[Tuple[int, int]]:
+        """Создать публикации для всех запланированных повторов одной транзакцией"""
+        return await self._run(self.sync_db.create_publications_bulk, user_id, pub_type, text, cost,
+                               planned_times, status, frequency, day_of_week, **kwargs)
+
+    async def update_publication_status(self, publication_id: int, status: str,
+                                        message_id: int = None):
+        """Обновить статус публикации"""
+        await self._run(self.sync_db.update_publication_status, publication_id, status, message_id)
+
+    # Методы для работы с платежами
+    async def create_payment(self, user_id: int, amount: float,
+                             payment_method: str = None) -> int:
+        """Создать новый платеж"""
+        return await self._run(self.sync_db.create_payment, user_id, amount, payment_method)
+
+    async def complete_payment(self, payment_id: int, transaction_id: str = None) -> bool:
+        """Завершить платеж"""
+        return await self._run(self.sync_db.complete_payment, payment_id, transaction_id)
+
+    # Методы для работы со стоп-словами
+    async def add_stop_words(self, words: List[str], added_by: int) -> Dict[str, int]:
+        """Добавить стоп-слова пачками (added/skipped)"""
+        return await self._run(self.sync_db.add_stop_words, words, added_by)
+
+    async def get_all_stop_words(self) -> List[str]:
+        """Получить все стоп-слова"""
+        return await self._run(self.sync_db.get_all_stop_words)
+
+    async def clear_stop_words(self):
+        """Очистить все стоп-слова"""
+        await self._run(self.sync_db.clear_stop_words)
+
+    async def get_stop_words_version(self) -> int:
+        """Версия списка стоп-слов"""
+        return await self._run(self.sync_db.get_stop_words_version)
+
+    async def get_stop_words_snapshot(self) -> Tuple[int, List[str]]:
+        """Версия и список стоп-слов с основной БД"""
+        return await self._run(self.sync_db.get_stop_words_snapshot)
+
+    # Методы для работы с сессиями
+    async def save_session_data(self, user_id: int, data: Dict[str, Any]):
+        """Сохранить данные сессии"""
+        await self._run(self.sync_db.save_session_data, user_id, data)
+
+    async def get_session_data(self, user_id: int) -> Dict[str, Any]:
+        """Получить данные сессии"""
+        return await self._run(self.sync_db.get_session_data, user_id)
+
+    async def clear_session_data(self, user_id: int):
+        """Очистить данные сессии"""
+        await self._run(self.sync_db.clear_session_data, user_id)
+
+    async def flush_sessions(self) -> int:
+        """Сбросить все измененные сессии в user_sessions"""
+        return await self._run(self.sync_db.flush_sessions)
+
+    async def sweep_stale_sessions(self, ttl: float, batch_size: int = 500) -> Dict[str, int]:
+        """Удалить сессии старше ttl секунд и вернуть их владельцев в idle"""
+        return await self._run(self.sync_db.sweep_stale_sessions, ttl, batch_size)
+
+    async def get_session_store_stats(self) -> Dict[str, Any]:
+        """Размер хранилища сессий и метрики сбросов"""
+        return self.sync_db.get_session_store_stats()
+
+    # Unit of work: одно чтение и одна транзакция на обработчик
+    async def load_user_work(self, user_id: int) -> UserUnitOfWork:
+        """Загрузить состояние, сессию, баланс и флаг админа одним запросом"""
+        return await self._run(self.sync_db.load_user_work, user_id)
+
+    async def commit_user_work(self, work: UserUnitOfWork):
+        """Применить изменения состояния и сессии одной транзакцией"""
+        await self._run(self.sync_db.commit_user_work, work)
+
+    @asynccontextmanager
+    async def user_work(self, user_id: int) -> AsyncIterator[UserUnitOfWork]:
+        """Контекстный менеджер unit of work: изменения применяются при выходе без ошибок"""
+        work = await self.load_user_work(user_id)
+        yield work
+        await self.commit_user_work(work)
+
+    # Методы для работы с запланированными публикациями
+    async def create_scheduled_post(self, user_id: int, publication_id: int,
+                                    scheduled_time: datetime, frequency: str = 'once',
+                                    day_of_week: int = None, repetitions_left: int = 1) -> int:
+        """Создать запланированную публикацию"""
+        return await self._run(self.sync_db.create_scheduled_post, user_id, publication_id,
+                               scheduled_time, frequency, day_of_week, repetitions_left)
+
+    async def get_scheduled_publications_chunk(self, after_id: int = 0,
+                                               limit: int = 1000) -> List[Tuple[int, int, str, str]]:
+        """Пачка запланированных публикаций (id > after_id) для пересканирования"""
+        return await self._run(self.sync_db.get_scheduled_publications_chunk, after_id, limit)
+
+    async def get_scheduled_posts(self, user_id: int = None) -> List[ScheduledPostDTO]:
+        """Получить запланированные публикации"""
+        return await self._run(self.sync_db.get_scheduled_posts, user_id)
+
+    async def update_scheduled_post_repetitions(self, scheduled_post_id: int, repetitions_left: int):
+        """Обновить количество оставшихся повторений"""
+        await self._run(self.sync_db.update_scheduled_post_repetitions, scheduled_post_id, repetitions_left)
+
+    async def deactivate_scheduled_post(self, scheduled_post_id: int):
+        """Деактивировать запланированную публикацию"""
+        await self._run(self.sync_db.deactivate_scheduled_post, scheduled_post_id)
+
+    async def expire_scheduled_occurrences(self, occurrences: List[Tuple[int, int]]) -> int:
+        """Снять неопубликованные повторы завершенной задачи"""
+        return await self._run(self.sync_db.expire_scheduled_occurrences, occurrences)
+
+    # Вспомогательные методы
+    async def get_user_by_id(self, user_id: int) -> Optional[UserDTO]:
+        """Получить пользователя по ID"""
+        return await self._run(self.sync_db.get_user_by_id, user_id)
+
+    async def get_user_publications(self, user_id: int, limit: int = 10) -> List[PublicationDTO]:
+        """Получить публикации пользователя"""
+        return await self._run(self.sync_db.get_user_publications, user_id, limit)
+
+    async def get_user_payments(self, user_id: int, limit: int = 10) -> List[PaymentDTO]:
+        """Получить платежи пользователя"""
+        return await self._run(self.sync_db.get_user_payments, user_id, limit)
+
+    # Статистические методы
+    async def get_total_users_count(self) -> int:
+        """Получить общее количество пользователей"""
+        return await self._run(self.sync_db.get_total_users_count)
+
+    async def get_total_publications_count(self) -> int:
+        """Получить общее количество публикаций"""
+        return await self._run(self.sync_db.get_total_publications_count)
+
+    async def get_total_payments_sum(self) -> float:
+        """Получить общую сумму платежей"""
+        return await self._run(self.sync_db.get_total_payments_sum)
+
+    async def init_stats_counters(self, rebuild: bool = False):
+        """Создать недостающие счетчики (rebuild - пересчитать все)"""
+        await self._run(self.sync_db.init_stats_counters, rebuild)
@@ -0,0 +1,77 @@
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Optional
+import threading
+import time
+
+# Маркер отсутствия значения в кэше (None - допустимое значение)
+MISSING = object()
+
+
+class LRUCache:
+    """
+    Внутрипроцессный кэш с вытеснением по LRU и времени жизни записей.
+
+    Используется перед таблицами, которые читаются на каждом сообщении
+    (например, users.current_state). Запись в БД выполняет вызывающий код,
+    кэш только хранит последнее записанное значение (write-through).
+    """
+
+    def __init__(self, max_size: int = 10000, ttl: Optional[float] = 600.0):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._data: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key: Hashable) -> Any:
+        """Получить значение или MISSING"""
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                self.misses += 1
+                return MISSING
+
+            value, expires_at = item
+            if expires_at is not None and expires_at < time.monotonic():
+                del self._data[key]
+                self.evictions += 1
+                self.misses += 1
+                return MISSING
+
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(self, key: Hashable, value: Any):
+        """Сохранить значение"""
+        expires_at = time.monotonic() + self.ttl if self.ttl else None
+        with self._lock:
+            self._data[key] = (value, expires_at)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_size:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def invalidate(self, key: Hashable):
+        """Удалить значение из кэша"""
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self):
+        """Очистить кэш"""
+        with self._lock:
+            self._data.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        """Счетчики попаданий и промахов"""
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                'size': len(self._data),
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'hit_rate': self.hits / total if total else 0.0,
+            }
@@ -1,29 +1,176 @@
 # Исправленный файл database/db_manager.py
 
-from sqlalchemy import create_engine, and_, or_
+from sqlalchemy import create_engine, and_, or_, update, select, insert, delete, func, literal, bindparam, inspect
+from sqlalchemy.engine import Engine
 from sqlalchemy.orm import sessionmaker, Session
 from sqlalchemy.exc import SQLAlchemyError
 from contextlib import contextmanager
-from typing import Optional, List, Dict, Any
+from typing import Optional, List, Dict, Any, Set, Tuple
 import json
 import logging
-from datetime import datetime
+import time
+from datetime import datetime, timedelta
 
-from .models import Base, User, Balance, Publication, Payment, ScheduledPost, StopWord, UserSession
+from .models import (Base, User, BalanceLedger, BalanceSnapshot, Publication, Payment, ScheduledPost,
+                     StopWord, UserSession, StatsCounter)
+from .cache import LRUCache, MISSING
+from .session_store import SessionStore
+from .query_stats import QueryStats
+from .retry import LockRetryPolicy, retry_on_lock
+from .dto import UserDTO, PublicationDTO, PaymentDTO, ScheduledPostDTO, LedgerEntryDTO
+from .migrations import run_migrations
+from .unit_of_work import UserUnitOfWork
+from .engine import engine_options, install_sqlite_pragmas, read_only_pragmas
 
 logger = logging.getLogger(__name__)
 
+# Счетчики статистики в таблице stats_counters
+USERS_COUNT = 'users_count'
+PUBLICATIONS_COUNT = 'publications_count'
+PAYMENTS_SUM = 'payments_completed_sum'
+# Версия списка стоп-слов: растет при каждом изменении, по ней процессы бота перечитывают список
+STOP_WORDS_VERSION = 'stop_words_version'
+
+# Размер пачки для IN (...) и многострочного INSERT (лимит переменных SQLite - 999)
+STOP_WORDS_CHUNK_SIZE = 500
+# Размер пачки для DELETE ... WHERE user_id IN (...) при сбросе сессий
+SESSION_FLUSH_CHUNK_SIZE = 500
+# Публичные помощники, а не запросы: операторы в их кадре (flush при commit в get_session)
+# статистика запросов относит к вызвавшему их методу
+QUERY_STATS_HELPERS = ('get_session', 'get_read_session', 'user_work')
+
+
+def to_kopecks(amount: float) -> int:
+    """Сумма в рублях -> целые копейки"""
+    return int(round(amount * 100))
+
+
+def from_kopecks(kopecks: int) -> float:
+    """Целые копейки -> сумма в рублях"""
+    return kopecks / 100
+
+
+def balance_kopecks_expr(user_id):
+    """
+    Баланс в копейках: снимок + записи журнала после снимка
+
+    user_id - значение, bindparam или колонка (для подзапроса в запросах по users).
+    """
+    last_ledger_id = select(BalanceSnapshot.last_ledger_id).where(
+        BalanceSnapshot.user_id == user_id
+    ).scalar_subquery()
+    snapshot = select(BalanceSnapshot.amount_kopecks).where(
+        BalanceSnapshot.user_id == user_id
+    ).scalar_subquery()
+    tail = select(func.coalesce(func.sum(BalanceLedger.amount_kopecks), 0)).where(
+        BalanceLedger.user_id == user_id,
+        BalanceLedger.id > func.coalesce(last_ledger_id, 0)
+    ).scalar_subquery()
+    return func.coalesce(snapshot, 0) + tail
+
+
+# Выражения горячих запросов строятся один раз при импорте: параметры передаются
+# при выполнении, скомпилированный SQL берется из кэша SQLAlchemy по ключу выражения
+USER_STATE_STMT = select(User.current_state).where(User.user_id == bindparam('user_id'))
+UPDATE_USER_STATE_STMT = update(User).where(
+    User.user_id == bindparam('b_user_id')
+).values(
+    current_state=bindparam('b_state'), state_updated_at=bindparam('b_state_updated_at')
+).execution_options(synchronize_session=False)
+ADMIN_IDS_STMT = select(User.user_id).where(User.is_admin == True)
+USER_BALANCE_STMT = select(balance_kopecks_expr(bindparam('user_id')))
+STOP_WORDS_VERSION_STMT = select(StatsCounter.value).where(StatsCounter.name == STOP_WORDS_VERSION)
+USER_WORK_STMT = select(
+    User.current_state,
+    User.is_admin,
+    balance_kopecks_expr(User.user_id).label('balance_kopecks'),
+    UserSession.id,
+    UserSession.session_data
+).outerjoin(
+    UserSession, UserSession.user_id == User.user_id
+).where(User.user_id == bindparam('user_id'))
+
+
+def state_updated_at(state: str) -> Optional[datetime]:
+    """Значение users.state_updated_at при переходе в state (NULL в idle)"""
+    return None if state == 'idle' else datetime.utcnow()
+
 
 class DatabaseManager:
     """Менеджер для работы с базой данных"""
 
-    def __init__(self, database_url: str, echo: bool = False):
-        self.engine = create_engine(database_url, echo=echo)
+    def __init__(self, database_url: str = None, echo: bool = False, engine: Engine = None,
+                 read_database_url: str = None, read_engine: Engine = None,
+                 pool_options: Optional[Dict[str, Any]] = None,
+                 sqlite_pragmas: Optional[Dict[str, Any]] = None,
+                 state_cache_size: int = 10000, state_cache_ttl: float = 600.0,
+                 admin_refresh_interval: Optional[float] = 300.0,
+                 session_store_size: int = 10000, session_max_unflushed_age: Optional[float] = 30.0,
+                 query_stats: bool = False, slow_query_ms: Optional[float] = 200.0,
+                 lock_retry_attempts: int = 5, lock_retry_base_delay: float = 0.05,
+                 lock_retry_max_delay: float = 1.0):
+        # engine передается AsyncDatabaseManager (sync-фасад AsyncEngine)
+        if engine is None:
+            engine = create_engine(database_url, echo=echo, **engine_options(database_url, pool_options))
+            install_sqlite_pragmas(engine, sqlite_pragmas)
+        self.engine = engine
         self.SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=self.engine)
+        # Движок для отчетных чтений (реплика или отдельное соединение SQLite только на чтение)
+        if read_engine is None and read_database_url:
+            read_engine = create_engine(read_database_url, echo=echo,
+                                        **engine_options(read_database_url, pool_options))
+            install_sqlite_pragmas(read_engine, read_only_pragmas(sqlite_pragmas))
+        self.read_engine = read_engine or self.engine
+        self.ReadSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=self.read_engine)
+        # Кэш users.current_state: чтение состояния на каждом сообщении без обращения к БД
+        self.state_cache = LRUCache(max_size=state_cache_size, ttl=state_cache_ttl)
+        # Множество ID админов: загружается при старте, None - еще не загружено
+        self.admin_refresh_interval = admin_refresh_interval
+        self._admin_ids: Optional[Set[int]] = None
+        self._admin_ids_loaded_at = 0.0
+        # Данные сессий: изменения копятся в памяти и сбрасываются в user_sessions пачками
+        self.session_store = SessionStore(max_size=session_store_size,
+                                          max_unflushed_age=session_max_unflushed_age)
+        # Латентность запросов по методам: слушатели ставятся только при включении
+        self.query_stats = QueryStats(type(self), slow_query_ms=slow_query_ms, helpers=QUERY_STATS_HELPERS)
+        if query_stats:
+            self.enable_query_stats()
+        # Повтор записей при "database is locked" (методы с @retry_on_lock)
+        self.retry_policy = LockRetryPolicy(attempts=lock_retry_attempts, base_delay=lock_retry_base_delay,
+                                            max_delay=lock_retry_max_delay)
 
     def create_tables(self):
-        """Создание всех таблиц"""
-        Base.metadata.create_all(bind=self.engine)
+        """Создание всех таблиц (через миграции схемы)"""
+        self.migrate()
+
+    def migrate(self) -> Dict[str, Any]:
+        """
+        Применить недостающие миграции схемы
+
+        Returns:
+            Dict[str, Any]: version_before, version, applied, elapsed_ms
+        """
+        return run_migrations(self)
+
+    def create_indexes(self, bind=None):
+        """
+        Создать недостающие индексы на существующих таблицах.
+
+        create_all не добавляет новые индексы в уже созданные таблицы,
+        поэтому каждый индекс создается отдельно с checkfirst (идемпотентно).
+        Индексы по колонкам, которых в таблице еще нет (их добавит
+        следующая миграция), пропускаются: ранние миграции выполняются
+        на схеме старой версии.
+        """
+        bind = bind or self.engine
+        inspector = inspect(bind)
+        for table in Base.metadata.sorted_tables:
+            if not inspector.has_table(table.name):
+                continue
+            columns = {column['name'] for column in inspector.get_columns(table.name)}
+            for index in table.indexes:
+                if all(column.name in columns for column in index.columns):
+                    index.create(bind=bind, checkfirst=True)
 
     @contextmanager
     def get_session(self) -> Session:
@@ -38,84 +185,319 @@ class DatabaseManager:
         finally:
             session.close()
 
+    # Статистика запросов
+    def enable_query_stats(self, slow_query_ms: Optional[float] = None):
+        """Включить сбор латентности запросов (slow_query_ms - порог лога медленных запросов)"""
+        if slow_query_ms is not None:
+            self.query_stats.slow_query_ms = slow_query_ms
+        self.query_stats.enable(self.engine, self.read_engine)
+
+    def disable_query_stats(self):
+        """Выключить сбор латентности запросов"""
+        self.query_stats.disable()
+
+    def reset_query_stats(self):
+        """Обнулить статистику запросов"""
+        self.query_stats.reset()
+
+    def get_query_stats(self, top: int = 10) -> Dict[str, Any]:
+        """Латентность по методам и самые дорогие SQL-выражения"""
+        return self.query_stats.snapshot(top)
+
+    def get_lock_retry_stats(self) -> Dict[str, Any]:
+        """Метрики повторов записей при блокировке БД"""
+        return self.retry_policy.stats()
+
+    @contextmanager
+    def get_read_session(self) -> Session:
+        """
+        Сессия для отчетных чтений (статистика, истории, списки)
+
+        Работает через движок чтения, если он задан, и ничего не фиксирует.
+        Чтения, которые должны видеть только что записанные данные
+        (состояние, unit of work), выполняются через get_session.
+        """
+        session = self.ReadSessionLocal()
+        try:
+            yield session
+        finally:
+            session.close()
+
     # Методы для работы с пользователями
+    @retry_on_lock
     def get_or_create_user(self, user_id: int, username: str = None,
-                           first_name: str = None, last_name: str = None) -> User:
+                           first_name: str = None, last_name: str = None) -> UserDTO:
         """Получить или создать пользователя"""
         with self.get_session() as session:
-            user = session.query(User).filter(User.user_id == user_id).first()
-            if not user:
-                user = User(
-                    user_id=user_id,
-                    username=username,
-                    first_name=first_name,
-                    last_name=last_name
-                )
-                session.add(user)
-                session.flush()
+            row = session.execute(
+                self._select_dto(UserDTO, User).where(User.user_id == user_id)
+            ).first()
+            if row:
+                return UserDTO(*row)
+
+            user = User(
+                user_id=user_id,
+                username=username,
+                first_name=first_name,
+                last_name=last_name
+            )
+            session.add(user)
+            session.flush()
+            self._increment_counter(session, USERS_COUNT)
 
-                # Создаем баланс для нового пользователя
-                balance = Balance(user_id=user_id, amount=0.0)
-                session.add(balance)
-            return user
+            # Создаем снимок баланса для нового пользователя
+            session.add(BalanceSnapshot(user_id=user_id, amount_kopecks=0, last_ledger_id=0))
+            return self._to_dto(UserDTO, user)
 
+    @retry_on_lock
     def set_user_admin(self, user_id: int, is_admin: bool = True):
         """Установить/снять административные права"""
         with self.get_session() as session:
-            user = session.query(User).filter(User.user_id == user_id).first()
-            if user:
-                user.is_admin = is_admin
+            updated = session.query(User).filter(User.user_id == user_id).update(
+                {User.is_admin: is_admin}, synchronize_session=False
+            )
+
+        # Инвалидация кэша админов
+        if self._admin_ids is not None:
+            if updated and is_admin:
+                self._admin_ids.add(user_id)
+            else:
+                self._admin_ids.discard(user_id)
+
+    def refresh_admin_ids(self) -> Set[int]:
+        """Перезагрузить множество админов из БД"""
+        with self.get_session() as session:
+            admin_ids = set(session.execute(ADMIN_IDS_STMT).scalars())
+        self._admin_ids = admin_ids
+        self._admin_ids_loaded_at = time.monotonic()
+        logger.debug(f"Загружено {len(admin_ids)} админов")
+        return admin_ids
 
     def is_user_admin(self, user_id: int) -> bool:
         """Проверить является ли пользователь админом"""
-        with self.get_session() as session:
-            user = session.query(User).filter(User.user_id == user_id).first()
-            return user.is_admin if user else False
+        if self._admin_ids is None or (
+            self.admin_refresh_interval
+            and time.monotonic() - self._admin_ids_loaded_at > self.admin_refresh_interval
+        ):
+            self.refresh_admin_ids()
+        return user_id in self._admin_ids
 
+    @retry_on_lock
     def update_user_state(self, user_id: int, state: str):
-        """Обновить состояние пользователя"""
+        """Обновить состояние пользователя (write-through в кэш состояний)"""
+        if self.state_cache.get(user_id) == state:
+            return
+
         with self.get_session() as session:
-            user = session.query(User).filter(User.user_id == user_id).first()
-            if user:
-                user.current_state = state
-                logger.info(f"Обновлено состояние пользователя {user_id}: {state}")
+            updated = session.execute(UPDATE_USER_STATE_STMT, {
+                'b_user_id': user_id, 'b_state': state, 'b_state_updated_at': state_updated_at(state)
+            }).rowcount
+            # Смена состояния: сессия пользователя сбрасывается в той же транзакции
+            batch = self._write_user_session(session, user_id)
+        self.session_store.mark_flushed(batch)
+        if updated:
+            self.state_cache.set(user_id, state)
+            logger.info(f"Обновлено состояние пользователя {user_id}: {state}")
+        else:
+            self.state_cache.invalidate(user_id)
 
     def get_user_state(self, user_id: int) -> str:
         """Получить текущее состояние пользователя"""
+        state = self.state_cache.get(user_id)
+        if state is not MISSING:
+            return state
+
         with self.get_session() as session:
-            user = session.query(User).filter(User.user_id == user_id).first()
-            return user.current_state if user else 'idle'
+            state = session.execute(USER_STATE_STMT, {'user_id': user_id}).scalar() or 'idle'
+        self.state_cache.set(user_id, state)
+        return state
+
+    def get_state_cache_stats(self) -> Dict[str, Any]:
+        """Статистика кэша состояний"""
+        return self.state_cache.stats()
 
     # Методы для работы с балансом
+    def _append_ledger(self, session: Session, user_id: int, amount_kopecks: int,
+                       kind: str, reference: str = None):
+        """Добавить запись в журнал в транзакции вызывающего кода"""
+        session.execute(insert(BalanceLedger).values(
+            user_id=user_id,
+            amount_kopecks=amount_kopecks,
+            kind=kind,
+            reference=reference,
+            created_at=datetime.utcnow()
+        ))
+
     def get_user_balance(self, user_id: int) -> float:
         """Получить баланс пользователя"""
         with self.get_session() as session:
-            balance = session.query(Balance).filter(Balance.user_id == user_id).first()
-            return balance.amount if balance else 0.0
+            return from_kopecks(session.execute(USER_BALANCE_STMT, {'user_id': user_id}).scalar() or 0)
 
     def update_balance(self, user_id: int, amount: float) -> bool:
         """Обновить баланс пользователя (может быть отрицательным для списания)"""
         try:
-            with self.get_session() as session:
-                balance = session.query(Balance).filter(Balance.user_id == user_id).first()
-                if balance:
-                    new_amount = balance.amount + amount
-                    if new_amount >= 0 or amount > 0:  # Разрешаем списание если есть средства или пополнение
-                        balance.amount = new_amount
-                        balance.last_updated = datetime.utcnow()
-                        logger.info(f"Обновлен баланс пользователя {user_id}: {amount}, новый баланс: {new_amount}")
-                        return True
-                return False
+            if amount < 0:
+                return self.debit_if_sufficient(user_id, -amount) is not None
+            self._credit_balance(user_id, to_kopecks(amount))
+            logger.info(f"Обновлен баланс пользователя {user_id}: {amount}")
+            return True
         except SQLAlchemyError as e:
             logger.error(f"Ошибка обновления баланса: {e}")
             return False
 
+    @retry_on_lock
+    def _credit_balance(self, user_id: int, amount_kopecks: int):
+        with self.get_session() as session:
+            self._append_ledger(session, user_id, amount_kopecks, 'credit')
+
     def check_balance(self, user_id: int, required_amount: float) -> bool:
         """Проверить достаточность средств"""
         current_balance = self.get_user_balance(user_id)
         return current_balance >= required_amount
 
+    @retry_on_lock
+    def debit_if_sufficient(self, user_id: int, amount: float, reference: str = None) -> Optional[float]:
+        """
+        Атомарно списать средства, если их достаточно.
+
+        Списание - запись в журнал одним INSERT ... SELECT с условием
+        "баланс >= суммы", поэтому параллельные списания не уводят баланс
+        в минус. Вне SQLite (где запись и так сериализована) списания
+        одного пользователя дополнительно сериализуются блокировкой строки
+        снимка (SELECT ... FOR UPDATE); зачисления блокировок не берут.
+
+        Returns:
+            Optional[float]: Новый баланс или None, если средств недостаточно
+        """
+        amount_kopecks = to_kopecks(amount)
+        balance = balance_kopecks_expr(user_id)
+
+        with self.get_session() as session:
+            if self.engine.dialect.name != 'sqlite':
+                session.execute(
+                    select(BalanceSnapshot.user_id).where(BalanceSnapshot.user_id == user_id).with_for_update()
+                )
+            inserted = session.execute(insert(BalanceLedger).from_select(
+                ['user_id', 'amount_kopecks', 'kind', 'reference', 'created_at'],
+                select(
+                    literal(user_id),
+                    literal(-amount_kopecks),
+                    literal('charge'),
+                    literal(reference),
+                    literal(datetime.utcnow())
+                ).where(balance >= amount_kopecks)
+            )).rowcount
+            new_amount = session.execute(select(balance)).scalar() if inserted else None
+
+        if new_amount is None:
+            logger.warning(f"Недостаточно средств у пользователя {user_id} для списания {amount}")
+            return None
+
+        new_amount = from_kopecks(new_amount)
+        logger.info(f"Списано {amount} с баланса пользователя {user_id}, новый баланс: {new_amount}")
+        return new_amount
+
+    def get_balance_history(self, user_id: int, limit: int = 50,
+                            before_id: int = None) -> List[LedgerEntryDTO]:
+        """
+        Выписка по балансу: последние записи журнала (диапазон по индексу (user_id, id))
+
+        Args:
+            user_id: ID пользователя
+            limit: Количество записей
+            before_id: Записи с ID меньше before_id (постраничный вывод)
+        """
+        query = self._select_dto(LedgerEntryDTO, BalanceLedger).where(BalanceLedger.user_id == user_id)
+        if before_id is not None:
+            query = query.where(BalanceLedger.id < before_id)
+        with self.get_read_session() as session:
+            rows = session.execute(query.order_by(BalanceLedger.id.desc()).limit(limit))
+            return [LedgerEntryDTO(*row) for row in rows]
+
+    @retry_on_lock
+    def compact_balance_snapshots(self, min_age: float = 60.0, batch_size: int = 500,
+                                  bind=None) -> Dict[str, int]:
+        """
+        Перенести хвосты журнала в снимки балансов
+
+        Записи журнала не удаляются (история и аудит), снимок лишь
+        продвигается, чтобы чтение баланса суммировало короткий хвост.
+
+        Args:
+            min_age: Учитывать записи старше min_age секунд. Идентификаторы
+                последовательности PostgreSQL могут фиксироваться не по
+                порядку; окно гарантирует, что младшие ID уже зафиксированы
+            batch_size: Пользователей в одной транзакции
+            bind: Соединение вызывающего кода (миграции)
+        Returns:
+            Dict[str, int]: users - обновлено снимков, entries - свернуто записей
+        """
+        if bind is None:
+            result = {'users': 0, 'entries': 0}
+            while True:
+                with self.get_session() as session:
+                    batch = self.compact_balance_snapshots(min_age, batch_size, bind=session)
+                result['users'] += batch['users']
+                result['entries'] += batch['entries']
+                if batch['users'] < batch_size:
+                    break
+            if result['users']:
+                logger.info(f"Снимки балансов: обновлено {result['users']}, свернуто записей {result['entries']}")
+            return result
+
+        cutoff = datetime.utcnow() - timedelta(seconds=min_age)
+        last_ledger_id = func.coalesce(BalanceSnapshot.last_ledger_id, 0)
+        max_ids = select(
+            BalanceLedger.user_id,
+            func.max(BalanceLedger.id).label('max_id')
+        ).outerjoin(
+            BalanceSnapshot, BalanceSnapshot.user_id == BalanceLedger.user_id
+        ).where(
+            BalanceLedger.id > last_ledger_id,
+            BalanceLedger.created_at <= cutoff
+        ).group_by(BalanceLedger.user_id).limit(batch_size).subquery()
+
+        rows = bind.execute(
+            select(
+                max_ids.c.user_id,
+                max_ids.c.max_id,
+                BalanceSnapshot.last_ledger_id,
+                func.sum(BalanceLedger.amount_kopecks).label('tail'),
+                func.count(BalanceLedger.id).label('entries')
+            ).join(
+                BalanceLedger, BalanceLedger.user_id == max_ids.c.user_id
+            ).outerjoin(
+                BalanceSnapshot, BalanceSnapshot.user_id == max_ids.c.user_id
+            ).where(
+                BalanceLedger.id > last_ledger_id,
+                BalanceLedger.id <= max_ids.c.max_id
+            ).group_by(max_ids.c.user_id, max_ids.c.max_id, BalanceSnapshot.last_ledger_id)
+        ).all()
+
+        result = {'users': 0, 'entries': 0}
+        now = datetime.utcnow()
+        for row in rows:
+            if row.last_ledger_id is None:
+                bind.execute(insert(BalanceSnapshot).values(
+                    user_id=row.user_id, amount_kopecks=row.tail, last_ledger_id=row.max_id, updated_at=now
+                ))
+            else:
+                # Условие по last_ledger_id защищает от параллельной компакции
+                updated = bind.execute(
+                    update(BalanceSnapshot)
+                    .where(BalanceSnapshot.user_id == row.user_id,
+                           BalanceSnapshot.last_ledger_id == row.last_ledger_id)
+                    .values(amount_kopecks=BalanceSnapshot.amount_kopecks + row.tail,
+                            last_ledger_id=row.max_id, updated_at=now)
+                ).rowcount
+                if not updated:
+                    continue
+            result['users'] += 1
+            result['entries'] += row.entries
+        return result
+
     # Методы для работы с публикациями
+    @retry_on_lock
     def create_publication(self, user_id: int, pub_type: str, text: str,
                            cost: float, **kwargs) -> int:
         """Создать новую публикацию"""
@@ -127,13 +509,75 @@ class DatabaseManager:
                 cost=cost,
                 firm_type=kwargs.get('firm_type'),
                 firm_name=kwargs.get('firm_name'),
+                status=kwargs.get('status', 'draft'),
                 created_at=datetime.utcnow()
             )
             session.add(publication)
             session.flush()
+            self._increment_counter(session, PUBLICATIONS_COUNT)
             logger.info(f"Создана публикация {publication.id} для пользователя {user_id}")
             return publication.id
 
+    @retry_on_lock
+    def create_publications_bulk(self, user_id: int, pub_type: str, text: str, cost: float,
+                                 planned_times: List[datetime], status: str = 'scheduled',
+                                 frequency: str = None, day_of_week: int = None,
+                                 **kwargs) -> List[Tuple[int, int]]:
+        """
+        Создать публикации для всех запланированных повторов одной транзакцией
+
+        Для каждого повтора создается публикация со статусом status и
+        запланированная публикация с плановым временем.
+
+        Args:
+            user_id: ID пользователя
+            pub_type: Тип публикации
+            text: Текст публикации
+            cost: Стоимость одной публикации
+            planned_times: Плановое время каждого повтора
+            status: Статус публикаций
+            frequency: Частота ('daily', 'weekly')
+            day_of_week: День недели для еженедельных публикаций
+        Returns:
+            List[Tuple[int, int]]: (ID публикации, ID запланированной публикации) в порядке planned_times
+        """
+        if not planned_times:
+            return []
+
+        now = datetime.utcnow()
+        with self.get_session() as session:
+            publication_ids = session.scalars(
+                insert(Publication).returning(Publication.id, sort_by_parameter_order=True),
+                [{
+                    'user_id': user_id,
+                    'type': pub_type,
+                    'text': text,
+                    'cost': cost,
+                    'firm_type': kwargs.get('firm_type'),
+                    'firm_name': kwargs.get('firm_name'),
+                    'status': status,
+                    'created_at': now,
+                } for _ in planned_times]
+            ).all()
+            scheduled_post_ids = session.scalars(
+                insert(ScheduledPost).returning(ScheduledPost.id, sort_by_parameter_order=True),
+                [{
+                    'user_id': user_id,
+                    'publication_id': publication_id,
+                    'scheduled_time': planned_time,
+                    'frequency': frequency,
+                    'day_of_week': day_of_week,
+                    'repetitions_left': len(planned_times) - index,
+                    'is_active': True,
+                    'created_at': now,
+                } for index, (publication_id, planned_time) in enumerate(zip(publication_ids, planned_times))]
+            ).all()
+            self._increment_counter(session, PUBLICATIONS_COUNT, len(publication_ids))
+
+        logger.info(f"Создано {len(publication_ids)} публикаций ({status}) для пользователя {user_id}")
+        return list(zip(publication_ids, scheduled_post_ids))
+
+    @retry_on_lock
     def update_publication_status(self, publication_id: int, status: str,
                                   message_id: int = None):
         """Обновить статус публикации"""
@@ -150,6 +594,7 @@ class DatabaseManager:
                 logger.info(f"Обновлен статус публикации {publication_id}: {status}")
 
     # Методы для работы с платежами
+    @retry_on_lock
     def create_payment(self, user_id: int, amount: float,
                        payment_method: str = None) -> int:
         """Создать новый платеж"""
@@ -168,106 +613,411 @@ class DatabaseManager:
     def complete_payment(self, payment_id: int, transaction_id: str = None) -> bool:
         """Завершить платеж"""
         try:
-            with self.get_session() as session:
-                payment = session.query(Payment).filter(Payment.id == payment_id).first()
-                if payment and payment.status == 'pending':
-                    payment.status = 'completed'
-                    payment.transaction_id = transaction_id
-                    payment.completed_at = datetime.utcnow()
-
-                    # Обновляем баланс пользователя
-                    self.update_balance(payment.user_id, payment.amount)
-                    logger.info(f"Платеж {payment_id} завершен успешно")
-                    return True
-                return False
+            return self._complete_payment(payment_id, transaction_id)
         except SQLAlchemyError as e:
             logger.error(f"Ошибка завершения платежа: {e}")
             return False
 
+    @retry_on_lock
+    def _complete_payment(self, payment_id: int, transaction_id: str = None) -> bool:
+        with self.get_session() as session:
+            payment = session.query(Payment).filter(Payment.id == payment_id).first()
+            if payment and payment.status == 'pending':
+                payment.status = 'completed'
+                payment.transaction_id = transaction_id
+                payment.completed_at = datetime.utcnow()
+
+                # Зачисление в журнал баланса в той же транзакции
+                self._append_ledger(session, payment.user_id, to_kopecks(payment.amount),
+                                    'topup', f"payment:{payment_id}")
+                self._increment_counter(session, PAYMENTS_SUM, payment.amount)
+                logger.info(f"Платеж {payment_id} завершен успешно")
+                return True
+            return False
+
     # Методы для работы со стоп-словами
-    def add_stop_words(self, words: List[str], added_by: int):
-        """Добавить стоп-слова"""
+    @retry_on_lock
+    def add_stop_words(self, words: List[str], added_by: int) -> Dict[str, int]:
+        """
+        Добавить стоп-слова пачками
+
+        Args:
+            words: Список слов
+            added_by: ID пользователя, добавляющего слова
+        Returns:
+            Dict[str, int]: added - добавлено, skipped - дубликаты и уже существующие
+        """
+        unique_words = list(dict.fromkeys(
+            word.strip().lower() for word in words if word and word.strip()
+        ))
+        added = 0
+
         with self.get_session() as session:
-            for word in words:
-                word = word.strip().lower()
-                if not session.query(StopWord).filter(StopWord.word == word).first():
-                    stop_word = StopWord(
-                        word=word,
-                        added_by=added_by,
-                        created_at=datetime.utcnow()
-                    )
-                    session.add(stop_word)
-            logger.info(f"Добавлено {len(words)} стоп-слов пользователем {added_by}")
+            for start in range(0, len(unique_words), STOP_WORDS_CHUNK_SIZE):
+                chunk = unique_words[start:start + STOP_WORDS_CHUNK_SIZE]
+                existing = set(session.scalars(
+                    select(StopWord.word).where(StopWord.word.in_(chunk))
+                ))
+                now = datetime.utcnow()
+                rows = [
+                    {'word': word, 'added_by': added_by, 'created_at': now}
+                    for word in chunk if word not in existing
+                ]
+                if rows:
+                    # rowcount, а не len(rows): ON CONFLICT DO NOTHING молча пропускает слова,
+                    # одновременно добавленные другим администратором или процессом
+                    result = session.connection().execute(self._insert_ignore_duplicates(StopWord, ['word']), rows)
+                    added += max(result.rowcount, 0)
+            if added:
+                self._increment_counter(session, STOP_WORDS_VERSION)
+
+        skipped = len(words) - added
+        logger.info(f"Добавлено {added} стоп-слов пользователем {added_by}, пропущено {skipped}")
+        return {'added': added, 'skipped': skipped}
+
+    def _insert_ignore_duplicates(self, model, index_elements: List[str]):
+        """INSERT ... ON CONFLICT DO NOTHING для SQLite/PostgreSQL (гонки параллельных вставок)"""
+        stmt = self._dialect_insert(model)
+        if stmt is None:
+            return insert(model)
+        return stmt.on_conflict_do_nothing(index_elements=index_elements)
+
+    def _dialect_insert(self, model):
+        """INSERT с поддержкой ON CONFLICT (SQLite/PostgreSQL), иначе None"""
+        dialect = self.engine.dialect.name
+        if dialect == 'sqlite':
+            from sqlalchemy.dialects.sqlite import insert as dialect_insert
+        elif dialect == 'postgresql':
+            from sqlalchemy.dialects.postgresql import insert as dialect_insert
+        else:
+            return None
+        return dialect_insert(model)
 
     def get_all_stop_words(self) -> List[str]:
         """Получить все стоп-слова"""
-        with self.get_session() as session:
+        with self.get_read_session() as session:
             return [sw.word for sw in session.query(StopWord).all()]
 
+    @retry_on_lock
     def clear_stop_words(self):
         """Очистить все стоп-слова"""
         with self.get_session() as session:
             deleted_count = session.query(StopWord).count()
             session.query(StopWord).delete()
+            self._increment_counter(session, STOP_WORDS_VERSION)
             logger.info(f"Удалено {deleted_count} стоп-слов")
 
-    def check_text_for_stop_words(self, text: str) -> List[str]:
-        """Проверить текст на наличие стоп-слов"""
-        stop_words = self.get_all_stop_words()
-        text_lower = text.lower()
-        found_words = []
-
-        for stop_word in stop_words:
-            if stop_word in text_lower:
-                found_words.append(stop_word)
+    def get_stop_words_version(self) -> int:
+        """Версия списка стоп-слов (чтение одной строки stats_counters по ключу)"""
+        with self.get_session() as session:
+            return int(session.execute(STOP_WORDS_VERSION_STMT).scalar() or 0)
 
-        return found_words
+    def get_stop_words_snapshot(self) -> Tuple[int, List[str]]:
+        """
+        Версия и список стоп-слов с основной БД (реплика может отставать)
 
-    # Методы для работы с сессиями
-    def save_session_data(self, user_id: int, data: Dict[str, Any]):
-        """Сохранить данные сессии"""
+        Версия читается раньше списка: если список изменится между чтениями,
+        кэш получит более новый список со старой версией и перечитает его
+        при следующей проверке, а не останется с устаревшим списком.
+        """
         with self.get_session() as session:
-            user_session = session.query(UserSession).filter(
-                UserSession.user_id == user_id
-            ).first()
+            version = int(session.execute(STOP_WORDS_VERSION_STMT).scalar() or 0)
+            words = list(session.scalars(select(StopWord.word)))
+        return version, words
 
-            if not user_session:
-                user_session = UserSession(
-                    user_id=user_id,
-                    session_data=json.dumps(data, ensure_ascii=False),
-                    last_updated=datetime.utcnow()
-                )
-                session.add(user_session)
-            else:
-                user_session.session_data = json.dumps(data, ensure_ascii=False)
-                user_session.last_updated = datetime.utcnow()
+    def init_stop_words_version(self, bind=None):
+        """Создать счетчик версии списка стоп-слов, если его нет"""
+        if bind is None:
+            with self.get_session() as session:
+                return self.init_stop_words_version(bind=session)
 
-            logger.debug(f"Сохранены данные сессии для пользователя {user_id}")
+        if bind.execute(STOP_WORDS_VERSION_STMT).first() is None:
+            bind.execute(insert(StatsCounter).values(name=STOP_WORDS_VERSION, value=0,
+                                                     updated_at=datetime.utcnow()))
+
+    # Методы для работы с сессиями
+    def save_session_data(self, user_id: int, data: Dict[str, Any]):
+        """Сохранить данные сессии (в памяти, запись в БД при сбросе)"""
+        self.session_store.put(user_id, data)
+        logger.debug(f"Сохранены данные сессии для пользователя {user_id}")
+        self._flush_sessions_if_due()
 
     def get_session_data(self, user_id: int) -> Dict[str, Any]:
         """Получить данные сессии"""
+        data = self.session_store.get(user_id)
+        if data is not MISSING:
+            return data or {}
+
         with self.get_session() as session:
             user_session = session.query(UserSession).filter(
                 UserSession.user_id == user_id
             ).first()
 
+            data = None
             if user_session and user_session.session_data:
                 try:
-                    return json.loads(user_session.session_data)
+                    data = json.loads(user_session.session_data)
                 except json.JSONDecodeError:
                     logger.error(f"Ошибка декодирования JSON сессии для пользователя {user_id}")
                     return {}
-            return {}
+        self.session_store.load(user_id, data)
+        return data or {}
 
     def clear_session_data(self, user_id: int):
         """Очистить данные сессии"""
+        self.session_store.delete(user_id)
+        logger.info(f"Очищены данные сессии для пользователя {user_id}")
+        self._flush_sessions_if_due()
+
+    @retry_on_lock
+    def flush_sessions(self) -> int:
+        """
+        Сбросить все измененные сессии в user_sessions одной транзакцией
+
+        Returns:
+            int: Количество записанных (и удаленных) строк
+        """
+        batch = self.session_store.dirty_batch()
+        if not batch:
+            return 0
+
         with self.get_session() as session:
-            deleted_count = session.query(UserSession).filter(
-                UserSession.user_id == user_id
-            ).delete()
-            logger.info(f"Очищены данные сессии для пользователя {user_id}")
+            self._write_sessions(session, batch)
+        self.session_store.mark_flushed(batch)
+        logger.debug(f"Сброшено {len(batch)} сессий")
+        return len(batch)
+
+    @retry_on_lock
+    def sweep_stale_sessions(self, ttl: float, batch_size: int = SESSION_FLUSH_CHUNK_SIZE) -> Dict[str, int]:
+        """
+        Вернуть в idle пользователей брошенных мастеров и удалить их сессии
+
+        Мастер брошен, если ни состояние (users.state_updated_at), ни данные
+        сессии (user_sessions.last_updated) не менялись дольше ttl. Сначала
+        по состоянию выбираются застрявшие пользователи - в том числе без
+        строки сессии (или со строкой, удаленной раньше), затем удаляются
+        оставшиеся устаревшие строки сессий. Каждая пачка - отдельная
+        транзакция, чтобы не держать блокировку записи. Пользователи с
+        несброшенными изменениями сессии пропускаются.
+
+        Args:
+            ttl: Мастер без изменений дольше ttl секунд считается брошенным
+            batch_size: Размер пачки
+        Returns:
+            Dict[str, int]: sessions_deleted, states_reset, batches
+        """
+        # Несброшенные изменения получают свежий last_updated и не попадают под TTL
+        self.flush_sessions()
+        cutoff = datetime.utcnow() - timedelta(seconds=ttl)
+        result = {'sessions_deleted': 0, 'states_reset': 0, 'batches': 0}
+        fresh_session = select(UserSession.id).where(
+            UserSession.user_id == User.user_id, UserSession.last_updated >= cutoff
+        ).exists()
+        fresh_state = select(User.id).where(
+            User.user_id == UserSession.user_id, User.state_updated_at >= cutoff
+        ).exists()
+
+        # Застрявшие в мастере пользователи
+        position = None  # (state_updated_at, user_id) последней просмотренной строки
+        while True:
+            with self.get_session() as session:
+                query = select(User.user_id, User.state_updated_at).where(
+                    User.state_updated_at < cutoff, ~fresh_session
+                )
+                if position is not None:
+                    query = query.where(or_(
+                        User.state_updated_at > position[0],
+                        and_(User.state_updated_at == position[0], User.user_id > position[1])
+                    ))
+                rows = session.execute(
+                    query.order_by(User.state_updated_at, User.user_id).limit(batch_size)
+                ).all()
+                if not rows:
+                    break
+                position = (rows[-1].state_updated_at, rows[-1].user_id)
+
+                user_ids = [row.user_id for row in rows if self.session_store.dirty_entry(row.user_id) is None]
+                if user_ids:
+                    result['states_reset'] += session.execute(
+                        update(User)
+                        .where(User.user_id.in_(user_ids), User.state_updated_at < cutoff)
+                        .values(current_state='idle', state_updated_at=None)
+                    ).rowcount
+                    result['sessions_deleted'] += session.execute(
+                        delete(UserSession)
+                        .where(UserSession.user_id.in_(user_ids), UserSession.last_updated < cutoff)
+                    ).rowcount
+                result['batches'] += 1
+
+            for user_id in user_ids:
+                self.session_store.discard(user_id)
+                self.state_cache.invalidate(user_id)
+
+        # Оставшиеся устаревшие сессии (пользователь в idle или без отметки времени состояния)
+        position = None  # (last_updated, id) последней просмотренной строки
+        while True:
+            with self.get_session() as session:
+                query = select(UserSession.id, UserSession.user_id, UserSession.last_updated).where(
+                    UserSession.last_updated < cutoff, ~fresh_state
+                )
+                if position is not None:
+                    # Пропущенные строки не выбираются повторно
+                    query = query.where(or_(
+                        UserSession.last_updated > position[0],
+                        and_(UserSession.last_updated == position[0], UserSession.id > position[1])
+                    ))
+                rows = session.execute(
+                    query.order_by(UserSession.last_updated, UserSession.id).limit(batch_size)
+                ).all()
+                if not rows:
+                    break
+                position = (rows[-1].last_updated, rows[-1].id)
+
+                user_ids = [row.user_id for row in rows if self.session_store.dirty_entry(row.user_id) is None]
+                if user_ids:
+                    result['sessions_deleted'] += session.execute(
+                        delete(UserSession)
+                        .where(UserSession.user_id.in_(user_ids), UserSession.last_updated < cutoff)
+                    ).rowcount
+                    result['states_reset'] += session.execute(
+                        update(User)
+                        .where(User.user_id.in_(user_ids), User.current_state != 'idle',
+                               or_(User.state_updated_at.is_(None), User.state_updated_at < cutoff))
+                        .values(current_state='idle', state_updated_at=None)
+                    ).rowcount
+                result['batches'] += 1
+
+            for user_id in user_ids:
+                self.session_store.discard(user_id)
+                self.state_cache.invalidate(user_id)
+
+        return result
+
+    def get_session_store_stats(self) -> Dict[str, Any]:
+        """Размер хранилища сессий и метрики сбросов"""
+        return self.session_store.stats()
+
+    def _flush_sessions_if_due(self):
+        """Сбросить сессии, если превышен допустимый возраст несброшенных изменений"""
+        if self.session_store.flush_due():
+            self.flush_sessions()
+
+    def _write_user_session(self, session: Session, user_id: int) -> List[Tuple]:
+        """Записать измененную сессию пользователя в транзакции вызывающего кода"""
+        entry = self.session_store.dirty_entry(user_id)
+        batch = [entry] if entry else []
+        self._write_sessions(session, batch)
+        return batch
+
+    def _write_sessions(self, session: Session, batch: List[Tuple]):
+        """Удалить очищенные сессии и выполнить upsert остальных"""
+        now = datetime.utcnow()
+        deleted = [user_id for user_id, data, _ in batch if data is None]
+        rows = [
+            {'user_id': user_id, 'session_data': json.dumps(data, ensure_ascii=False), 'last_updated': now}
+            for user_id, data, _ in batch if data is not None
+        ]
+
+        for start in range(0, len(deleted), SESSION_FLUSH_CHUNK_SIZE):
+            session.execute(
+                delete(UserSession)
+                .where(UserSession.user_id.in_(deleted[start:start + SESSION_FLUSH_CHUNK_SIZE]))
+            )
+        if not rows:
+            return
+
+        stmt = self._dialect_insert(UserSession)
+        if stmt is not None:
+            stmt = stmt.on_conflict_do_update(
+                index_elements=['user_id'],
+                set_={'session_data': stmt.excluded.session_data, 'last_updated': stmt.excluded.last_updated}
+            )
+            session.execute(stmt, rows)
+            return
+
+        for row in rows:
+            updated = session.execute(
+                update(UserSession)
+                .where(UserSession.user_id == row['user_id'])
+                .values(session_data=row['session_data'], last_updated=row['last_updated'])
+            ).rowcount
+            if not updated:
+                session.execute(insert(UserSession).values(**row))
+
+    # Unit of work: одно чтение и одна транзакция на обработчик
+    def load_user_work(self, user_id: int) -> UserUnitOfWork:
+        """Загрузить состояние, сессию, баланс и флаг админа одним запросом"""
+        with self.get_session() as session:
+            row = session.execute(USER_WORK_STMT, {'user_id': user_id}).first()
+
+        if row is None:
+            return UserUnitOfWork(user_id, user_exists=False)
+
+        state = row.current_state or 'idle'
+        self.state_cache.set(user_id, state)
+
+        # Несброшенные изменения сессии в памяти новее строки user_sessions
+        stored = self.session_store.get(user_id)
+        if stored is MISSING:
+            session_json, session_exists = row.session_data, row.id is not None
+        else:
+            session_json = json.dumps(stored, ensure_ascii=False) if stored is not None else None
+            session_exists = stored is not None
+
+        work = UserUnitOfWork(
+            user_id,
+            state=state,
+            session_json=session_json,
+            balance=from_kopecks(row.balance_kopecks or 0),
+            is_admin=bool(row.is_admin),
+            session_exists=session_exists
+        )
+        if stored is MISSING:
+            self.session_store.load(user_id, work.session_data if session_exists else None)
+        return work
+
+    @retry_on_lock
+    def commit_user_work(self, work: UserUnitOfWork):
+        """
+        Применить изменения состояния и сессии.
+
+        Изменения сессии попадают в хранилище сессий. При смене состояния
+        сессия пользователя записывается в той же транзакции, что и состояние,
+        иначе - при следующем пакетном сбросе.
+        """
+        if not work.has_changes:
+            return
+
+        if work.session_changed:
+            if work.session_cleared:
+                self.session_store.delete(work.user_id)
+            else:
+                self.session_store.put(work.user_id, work.session_data)
+
+        if not (work.state_changed and work.user_exists):
+            self._flush_sessions_if_due()
+            return
+
+        with self.get_session() as session:
+            session.query(User).filter(User.user_id == work.user_id).update(
+                {User.current_state: work.state, User.state_updated_at: state_updated_at(work.state)},
+                synchronize_session=False
+            )
+            batch = self._write_user_session(session, work.user_id)
+        self.session_store.mark_flushed(batch)
+
+        self.state_cache.set(work.user_id, work.state)
+        logger.info(f"Обновлено состояние пользователя {work.user_id}: {work.state}")
+
+    @contextmanager
+    def user_work(self, user_id: int) -> UserUnitOfWork:
+        """Контекстный менеджер unit of work: изменения применяются при выходе без ошибок"""
+        work = self.load_user_work(user_id)
+        yield work
+        self.commit_user_work(work)
 
     # Методы для работы с запланированными публикациями
+    @retry_on_lock
     def create_scheduled_post(self, user_id: int, publication_id: int,
                               scheduled_time: datetime, frequency: str = 'once',
                               day_of_week: int = None, repetitions_left: int = 1) -> int:
@@ -287,14 +1037,34 @@ class DatabaseManager:
             logger.info(f"Создана запланированная публикация {scheduled_post.id}")
             return scheduled_post.id
 
-    def get_scheduled_posts(self, user_id: int = None) -> List[ScheduledPost]:
+    def get_scheduled_publications_chunk(self, after_id: int = 0,
+                                         limit: int = 1000) -> List[Tuple[int, int, str, str]]:
+        """
+        Пачка запланированных публикаций для пересканирования стоп-словами
+
+        Keyset-пагинация по id (индекс (status, id)): следующая пачка - after_id
+        последней строки, память ограничена размером пачки.
+
+        Returns:
+            List[Tuple[int, int, str, str]]: (id, user_id, type, text)
+        """
+        with self.get_read_session() as session:
+            return [tuple(row) for row in session.execute(
+                select(Publication.id, Publication.user_id, Publication.type, Publication.text)
+                .where(Publication.status == 'scheduled', Publication.id > after_id)
+                .order_by(Publication.id)
+                .limit(limit)
+            )]
+
+    def get_scheduled_posts(self, user_id: int = None) -> List[ScheduledPostDTO]:
         """Получить запланированные публикации"""
-        with self.get_session() as session:
-            query = session.query(ScheduledPost).filter(ScheduledPost.is_active == True)
-            if user_id:
-                query = query.filter(ScheduledPost.user_id == user_id)
-            return query.all()
+        query = self._select_dto(ScheduledPostDTO, ScheduledPost).where(ScheduledPost.is_active == True)
+        if user_id:
+            query = query.where(ScheduledPost.user_id == user_id)
+        with self.get_read_session() as session:
+            return [ScheduledPostDTO(*row) for row in session.execute(query)]
 
+    @retry_on_lock
     def update_scheduled_post_repetitions(self, scheduled_post_id: int, repetitions_left: int):
         """Обновить количество оставшихся повторений"""
         with self.get_session() as session:
@@ -306,6 +1076,7 @@ class DatabaseManager:
                 if repetitions_left <= 0:
                     scheduled_post.is_active = False
 
+    @retry_on_lock
     def deactivate_scheduled_post(self, scheduled_post_id: int):
         """Деактивировать запланированную публикацию"""
         with self.get_session() as session:
@@ -316,41 +1087,145 @@ class DatabaseManager:
                 scheduled_post.is_active = False
                 logger.info(f"Деактивирована запланированная публикация {scheduled_post_id}")
 
+    @retry_on_lock
+    def expire_scheduled_occurrences(self, occurrences: List[Tuple[int, int]]) -> int:
+        """
+        Снять неопубликованные повторы завершенной задачи одной транзакцией
+
+        Публикации, оставшиеся в статусе 'scheduled', получают статус
+        'expired' (и больше не попадают в пересканирование), запланированные
+        публикации деактивируются.
+
+        Args:
+            occurrences: (ID публикации, ID запланированной публикации)
+        Returns:
+            int: Число снятых публикаций
+        """
+        if not occurrences:
+            return 0
+
+        publication_ids = [publication_id for publication_id, _ in occurrences]
+        scheduled_post_ids = [scheduled_post_id for _, scheduled_post_id in occurrences]
+        with self.get_session() as session:
+            expired = session.execute(
+                update(Publication)
+                .where(Publication.id.in_(publication_ids), Publication.status == 'scheduled')
+                .values(status='expired')
+            ).rowcount
+            session.execute(
+                update(ScheduledPost)
+                .where(ScheduledPost.id.in_(scheduled_post_ids))
+                .values(is_active=False)
+            )
+        logger.info(f"Сняты неопубликованные повторы: {expired}")
+        return expired
+
     # Вспомогательные методы
-    def get_user_by_id(self, user_id: int) -> Optional[User]:
+    def get_user_by_id(self, user_id: int) -> Optional[UserDTO]:
         """Получить пользователя по ID"""
         with self.get_session() as session:
-            return session.query(User).filter(User.user_id == user_id).first()
+            row = session.execute(
+                self._select_dto(UserDTO, User).where(User.user_id == user_id)
+            ).first()
+            return UserDTO(*row) if row else None
 
-    def get_user_publications(self, user_id: int, limit: int = 10) -> List[Publication]:
+    def get_user_publications(self, user_id: int, limit: int = 10) -> List[PublicationDTO]:
         """Получить публикации пользователя"""
-        with self.get_session() as session:
-            return session.query(Publication).filter(
-                Publication.user_id == user_id
-            ).order_by(Publication.created_at.desc()).limit(limit).all()
+        with self.get_read_session() as session:
+            rows = session.execute(
+                self._select_dto(PublicationDTO, Publication)
+                .where(Publication.user_id == user_id)
+                .order_by(Publication.created_at.desc())
+                .limit(limit)
+            )
+            return [PublicationDTO(*row) for row in rows]
 
-    def get_user_payments(self, user_id: int, limit: int = 10) -> List[Payment]:
+    def get_user_payments(self, user_id: int, limit: int = 10) -> List[PaymentDTO]:
         """Получить платежи пользователя"""
-        with self.get_session() as session:
-            return session.query(Payment).filter(
-                Payment.user_id == user_id
-            ).order_by(Payment.created_at.desc()).limit(limit).all()
+        with self.get_read_session() as session:
+            rows = session.execute(
+                self._select_dto(PaymentDTO, Payment)
+                .where(Payment.user_id == user_id)
+                .order_by(Payment.created_at.desc())
+                .limit(limit)
+            )
+            return [PaymentDTO(*row) for row in rows]
+
+    @staticmethod
+    def _select_dto(dto_class, model):
+        """SELECT только колонок DTO в порядке его полей"""
+        return select(*(getattr(model, name) for name in dto_class.__slots__))
+
+    @staticmethod
+    def _to_dto(dto_class, obj):
+        """DTO из ORM-объекта (до закрытия сессии)"""
+        return dto_class(*(getattr(obj, name) for name in dto_class.__slots__))
 
     # Статистические методы
+    @staticmethod
+    def _aggregate_queries() -> Dict[str, Any]:
+        """SQL-агрегаты, из которых инициализируются счетчики"""
+        return {
+            USERS_COUNT: select(func.count()).select_from(User),
+            PUBLICATIONS_COUNT: select(func.count()).select_from(Publication),
+            PAYMENTS_SUM: select(func.coalesce(func.sum(Payment.amount), 0.0)).where(
+                Payment.status == 'completed'
+            ),
+        }
+
+    def _increment_counter(self, session: Session, name: str, delta: float = 1):
+        """Увеличить счетчик в транзакции вызывающего кода"""
+        session.execute(
+            update(StatsCounter)
+            .where(StatsCounter.name == name)
+            .values(value=StatsCounter.value + delta, updated_at=datetime.utcnow())
+        )
+
+    def init_stats_counters(self, rebuild: bool = False, bind=None):
+        """
+        Создать недостающие счетчики из SQL-агрегатов.
+
+        Args:
+            rebuild: Пересчитать все счетчики, а не только отсутствующие
+            bind: Соединение вызывающего кода (миграции); по умолчанию - новая сессия
+        """
+        if bind is None:
+            with self.get_session() as session:
+                return self.init_stats_counters(rebuild, bind=session)
+
+        existing = set(bind.scalars(select(StatsCounter.name)))
+        for name, query in self._aggregate_queries().items():
+            if name in existing and not rebuild:
+                continue
+            value = bind.execute(query).scalar() or 0
+            if name in existing:
+                bind.execute(
+                    update(StatsCounter)
+                    .where(StatsCounter.name == name)
+                    .values(value=value, updated_at=datetime.utcnow())
+                )
+            else:
+                bind.execute(insert(StatsCounter).values(name=name, value=value, updated_at=datetime.utcnow()))
+            logger.info(f"Счетчик {name} инициализирован: {value}")
+
+    def _get_counter(self, name: str) -> float:
+        """Значение счетчика; без счетчика - SQL-агрегат"""
+        with self.get_read_session() as session:
+            value = session.execute(
+                select(StatsCounter.value).where(StatsCounter.name == name)
+            ).scalar()
+            if value is None:
+                value = session.execute(self._aggregate_queries()[name]).scalar() or 0
+            return value
+
     def get_total_users_count(self) -> int:
         """Получить общее количество пользователей"""
-        with self.get_session() as session:
-            return session.query(User).count()
+        return int(self._get_counter(USERS_COUNT))
 
     def get_total_publications_count(self) -> int:
         """Получить общее количество публикаций"""
-        with self.get_session() as session:
-            return session.query(Publication).count()
+        return int(self._get_counter(PUBLICATIONS_COUNT))
 
     def get_total_payments_sum(self) -> float:
         """Получить общую сумму платежей"""
-        with self.get_session() as session:
-            result = session.query(Payment.amount).filter(
-                Payment.status == 'completed'
-            ).all()
-            return sum(payment.amount for payment in result) if result else 0.0
\ No newline at end of file
+        return float(self._get_counter(PAYMENTS_SUM))
\ No newline at end of file
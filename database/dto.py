@@ -0,0 +1,92 @@
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Optional
+
+# Неизменяемые DTO для результатов запросов.
+# Заполняются запросами по колонкам (без ORM-объектов и identity map),
+# поля совпадают с колонками моделей, порядок полей = порядок __slots__.
+
+
+@dataclass(frozen=True)
+class UserDTO:
+    """Пользователь (users)"""
+    __slots__ = ('id', 'user_id', 'username', 'first_name', 'last_name',
+                 'is_admin', 'current_state', 'registration_date')
+    id: int
+    user_id: int
+    username: Optional[str]
+    first_name: Optional[str]
+    last_name: Optional[str]
+    is_admin: bool
+    current_state: str
+    registration_date: Optional[datetime]
+
+
+@dataclass(frozen=True)
+class PublicationDTO:
+    """Публикация (publications)"""
+    __slots__ = ('id', 'user_id', 'type', 'firm_type', 'firm_name', 'job_title',
+                 'worker_count', 'work_period', 'work_conditions', 'requirements',
+                 'salary', 'contacts', 'text', 'status', 'created_at', 'published_at',
+                 'cost', 'message_id')
+    id: int
+    user_id: int
+    type: str
+    firm_type: Optional[str]
+    firm_name: Optional[str]
+    job_title: Optional[str]
+    worker_count: Optional[str]
+    work_period: Optional[str]
+    work_conditions: Optional[str]
+    requirements: Optional[str]
+    salary: Optional[str]
+    contacts: Optional[str]
+    text: str
+    status: str
+    created_at: Optional[datetime]
+    published_at: Optional[datetime]
+    cost: float
+    message_id: Optional[int]
+
+
+@dataclass(frozen=True)
+class PaymentDTO:
+    """Платеж (payments)"""
+    __slots__ = ('id', 'user_id', 'amount', 'status', 'payment_method',
+                 'transaction_id', 'created_at', 'completed_at')
+    id: int
+    user_id: int
+    amount: float
+    status: str
+    payment_method: Optional[str]
+    transaction_id: Optional[str]
+    created_at: Optional[datetime]
+    completed_at: Optional[datetime]
+
+
+@dataclass(frozen=True)
+class LedgerEntryDTO:
+    """Запись журнала баланса (balance_ledger), сумма в копейках"""
+    __slots__ = ('id', 'user_id', 'amount_kopecks', 'kind', 'reference', 'created_at')
+    id: int
+    user_id: int
+    amount_kopecks: int
+    kind: str
+    reference: Optional[str]
+    created_at: Optional[datetime]
+
+
+@dataclass(frozen=True)
+class ScheduledPostDTO:
+    """Запланированная публикация (scheduled_posts)"""
+    __slots__ = ('id', 'user_id', 'publication_id', 'scheduled_time', 'frequency',
+                 'day_of_week', 'repetitions_left', 'is_active', 'created_at')
+    id: int
+    user_id: int
+    publication_id: int
+    scheduled_time: datetime
+    frequency: Optional[str]
+    day_of_week: Optional[int]
+    repetitions_left: int
+    is_active: bool
+    created_at: Optional[datetime]
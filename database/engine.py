@@ -0,0 +1,91 @@
+from sqlalchemy import event
+from sqlalchemy.engine import Engine, make_url
+from typing import Optional, Dict, Any
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Профиль SQLite: применяется к каждому новому соединению
+SQLITE_PRAGMAS = {
+    'journal_mode': 'WAL',  # Читатели не блокируют писателя
+    'synchronous': 'NORMAL',  # В режиме WAL достаточно для сохранности данных
+    'busy_timeout': 5000,  # мс ожидания блокировки вместо мгновенного "database is locked"
+    'cache_size': -64000,  # ~64 МБ страничного кэша на соединение
+    'mmap_size': 268435456,  # 256 МБ memory-mapped I/O
+    'temp_store': 'MEMORY',
+}
+
+# Для соединений только на чтение: journal_mode задает пишущее соединение,
+# query_only запрещает запись даже без mode=ro в URL
+READ_ONLY_SQLITE_PRAGMAS = {'query_only': 'ON'}
+
+# Профиль PostgreSQL: проверка соединения перед выдачей и ротация долгоживущих соединений
+POSTGRES_POOL_DEFAULTS = {
+    'pool_pre_ping': True,
+    'pool_recycle': 1800,
+}
+
+# Параметры QueuePool, которые не поддерживают пулы in-memory SQLite
+QUEUE_POOL_OPTIONS = ('pool_size', 'max_overflow', 'pool_timeout')
+
+
+def is_memory_sqlite(database_url: str) -> bool:
+    """Проверить, что URL указывает на in-memory SQLite"""
+    url = make_url(database_url)
+    return url.get_backend_name() == 'sqlite' and (
+        url.database in (None, '', ':memory:') or url.query.get('mode') == 'memory'
+    )
+
+
+def engine_options(database_url: str, pool_options: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """
+    Параметры пула для create_engine/create_async_engine с учетом СУБД
+
+    Args:
+        database_url: URL базы данных
+        pool_options: pool_size, max_overflow, pool_timeout, pool_recycle, pool_pre_ping
+    Returns:
+        Dict[str, Any]: Параметры, допустимые для пула данной СУБД
+    """
+    options = {key: value for key, value in (pool_options or {}).items() if value is not None}
+    backend = make_url(database_url).get_backend_name()
+
+    if backend == 'sqlite':
+        # Локальный файл: ping и ротация соединений не нужны
+        options.pop('pool_pre_ping', None)
+        options.pop('pool_recycle', None)
+        if is_memory_sqlite(database_url):
+            for key in QUEUE_POOL_OPTIONS:
+                options.pop(key, None)
+    elif backend == 'postgresql':
+        for key, value in POSTGRES_POOL_DEFAULTS.items():
+            options.setdefault(key, value)
+
+    return options
+
+
+def read_only_pragmas(pragmas: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """Профиль SQLite для движка чтения на основе профиля пишущего движка"""
+    pragmas = dict(SQLITE_PRAGMAS if pragmas is None else pragmas)
+    pragmas.pop('journal_mode', None)
+    pragmas.update(READ_ONLY_SQLITE_PRAGMAS)
+    return pragmas
+
+
+def install_sqlite_pragmas(engine: Engine, pragmas: Optional[Dict[str, Any]] = None):
+    """Применять PRAGMA профиля SQLite при каждом новом соединении"""
+    if engine.dialect.name != 'sqlite':
+        return
+
+    pragmas = SQLITE_PRAGMAS if pragmas is None else pragmas
+
+    @event.listens_for(engine, 'connect')
+    def _apply_sqlite_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        try:
+            for name, value in pragmas.items():
+                cursor.execute(f"PRAGMA {name}={value}")
+        finally:
+            cursor.close()
+
+    logger.info(f"SQLite: применен профиль {pragmas}")
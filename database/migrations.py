@@ -0,0 +1,148 @@
+from dataclasses import dataclass
+from sqlalchemy import inspect, insert, select, update, func, literal, text
+from typing import Any, Callable, Dict, List
+import logging
+import time
+from datetime import datetime
+
+from .models import Base, SchemaVersion, Balance, BalanceLedger, BalanceSnapshot, User
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class Migration:
+    """
+    Миграция схемы.
+
+    apply(db, connection) выполняется в одной транзакции с записью версии.
+    Базовая миграция создает схему текущих моделей, поэтому последующие
+    миграции должны быть идемпотентными (checkfirst, проверка колонок).
+    """
+    version: int
+    description: str
+    apply: Callable[[Any, Any], None]
+
+
+def _create_base_schema(db, connection):
+    # Новая БД - все таблицы; существующая (create_all до миграций) - недостающие таблицы и индексы
+    Base.metadata.create_all(bind=connection)
+    db.create_indexes(bind=connection)
+
+
+def _seed_stats_counters(db, connection):
+    db.init_stats_counters(bind=connection)
+
+
+def _seed_stop_words_version(db, connection):
+    db.init_stop_words_version(bind=connection)
+
+
+def _create_publications_status_index(db, connection):
+    db.create_indexes(bind=connection)
+
+
+def _add_user_state_updated_at(db, connection):
+    # Пользователи, уже находящиеся в мастере, получают полный TTL с момента миграции
+    column = User.__table__.c.state_updated_at
+    if column.name not in {info['name'] for info in inspect(connection).get_columns('users')}:
+        connection.execute(text(
+            f"ALTER TABLE users ADD COLUMN {column.name} {column.type.compile(dialect=connection.dialect)}"
+        ))
+    connection.execute(
+        update(User)
+        .where(User.current_state != 'idle', User.state_updated_at.is_(None))
+        .values(state_updated_at=datetime.utcnow())
+    )
+    for index in User.__table__.indexes:
+        if index.columns.contains_column(column):
+            index.create(bind=connection, checkfirst=True)
+
+
+def _create_balance_ledger(db, connection):
+    # Остатки из balance.amount переносятся в журнал записями 'opening'
+    BalanceLedger.__table__.create(bind=connection, checkfirst=True)
+    BalanceSnapshot.__table__.create(bind=connection, checkfirst=True)
+    for index in BalanceLedger.__table__.indexes:
+        index.create(bind=connection, checkfirst=True)
+
+    if connection.execute(select(func.count()).select_from(BalanceLedger)).scalar() == 0:
+        now = datetime.utcnow()
+        connection.execute(insert(BalanceLedger).from_select(
+            ['user_id', 'amount_kopecks', 'kind', 'reference', 'created_at'],
+            select(
+                Balance.user_id,
+                func.round(Balance.amount * 100),
+                literal('opening'),
+                literal('balance'),
+                literal(now)
+            ).where(Balance.amount != 0)
+        ))
+    connection.execute(insert(BalanceSnapshot).from_select(
+        ['user_id', 'amount_kopecks', 'last_ledger_id', 'updated_at'],
+        select(User.user_id, literal(0), literal(0), literal(datetime.utcnow())).where(
+            ~select(BalanceSnapshot.user_id).where(BalanceSnapshot.user_id == User.user_id).exists()
+        )
+    ))
+    db.compact_balance_snapshots(min_age=0, bind=connection)
+
+
+# Упорядоченный список миграций: новые добавляются только в конец
+MIGRATIONS: List[Migration] = [
+    Migration(1, "Базовая схема: таблицы и индексы", _create_base_schema),
+    Migration(2, "Счетчики статистики stats_counters", _seed_stats_counters),
+    Migration(3, "Журнал баланса balance_ledger и снимки balance_snapshots", _create_balance_ledger),
+    Migration(4, "Версия списка стоп-слов в stats_counters", _seed_stop_words_version),
+    Migration(5, "Индекс publications (status, id)", _create_publications_status_index),
+    Migration(6, "Время смены состояния users.state_updated_at", _add_user_state_updated_at),
+]
+
+LATEST_VERSION = MIGRATIONS[-1].version
+
+
+def current_version(connection) -> int:
+    """Текущая версия схемы (0 - таблицы schema_version еще нет)"""
+    if not inspect(connection).has_table(SchemaVersion.__tablename__):
+        return 0
+    return connection.execute(select(func.max(SchemaVersion.version))).scalar() or 0
+
+
+def run_migrations(db) -> Dict[str, Any]:
+    """
+    Применить недостающие миграции по порядку
+
+    Если версия схемы актуальна, выполняется только чтение версии.
+
+    Args:
+        db: DatabaseManager
+    Returns:
+        Dict[str, Any]: version_before, version, applied, elapsed_ms
+    """
+    started = time.perf_counter()
+    with db.engine.connect() as connection:
+        version_before = current_version(connection)
+
+    applied = []
+    for migration in MIGRATIONS:
+        if migration.version <= version_before:
+            continue
+        with db.engine.begin() as connection:
+            SchemaVersion.__table__.create(bind=connection, checkfirst=True)
+            migration.apply(db, connection)
+            connection.execute(insert(SchemaVersion).values(
+                version=migration.version,
+                description=migration.description,
+                applied_at=datetime.utcnow()
+            ))
+        applied.append(migration.version)
+        logger.info(f"Применена миграция {migration.version}: {migration.description}")
+
+    result = {
+        'version_before': version_before,
+        'version': applied[-1] if applied else version_before,
+        'applied': applied,
+        'elapsed_ms': (time.perf_counter() - started) * 1000,
+    }
+    if version_before > LATEST_VERSION:
+        logger.warning(f"Версия схемы {version_before} новее известной коду ({LATEST_VERSION})")
+    return result
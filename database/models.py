@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Boolean, Text, DateTime, Float, ForeignKey
+from sqlalchemy import Column, Integer, BigInteger, String, Boolean, Text, DateTime, Float, ForeignKey, Index
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import relationship
 from datetime import datetime
@@ -16,6 +16,8 @@ class User(Base):
     last_name = Column(String(255), nullable=True)
     is_admin = Column(Boolean, default=False)
     current_state = Column(String(50), default='idle')
+    # Время перехода в текущее состояние мастера (NULL в idle): TTL брошенных мастеров
+    state_updated_at = Column(DateTime, nullable=True, index=True)
     registration_date = Column(DateTime, default=datetime.utcnow)
 
     # Связи
@@ -25,7 +27,7 @@ class User(Base):
     scheduled_posts = relationship("ScheduledPost", back_populates="user")
 
 class Balance(Base):
-    """Модель баланса пользователя"""
+    """Модель баланса пользователя (устаревшая: баланс ведется в balance_ledger)"""
     __tablename__ = 'balance'
 
     id = Column(Integer, primary_key=True)
@@ -36,6 +38,31 @@ class Balance(Base):
     # Связи
     user = relationship("User", back_populates="balance")
 
+class BalanceLedger(Base):
+    """Журнал движения средств (только добавление записей)"""
+    __tablename__ = 'balance_ledger'
+
+    id = Column(Integer, primary_key=True)
+    user_id = Column(Integer, ForeignKey('users.user_id'), nullable=False)
+    amount_kopecks = Column(BigInteger, nullable=False)  # > 0 - зачисление, < 0 - списание
+    kind = Column(String(32), nullable=False)  # 'opening', 'topup', 'credit', 'charge'
+    reference = Column(String(255), nullable=True)  # Например, 'payment:42'
+    created_at = Column(DateTime, default=datetime.utcnow)
+
+    __table_args__ = (
+        # Баланс (хвост после снимка) и выписка пользователя: диапазон по (user_id, id)
+        Index('ix_balance_ledger_user_id_id', user_id, id),
+    )
+
+class BalanceSnapshot(Base):
+    """Снимок баланса: сумма записей журнала до last_ledger_id включительно"""
+    __tablename__ = 'balance_snapshots'
+
+    user_id = Column(Integer, ForeignKey('users.user_id'), primary_key=True, autoincrement=False)
+    amount_kopecks = Column(BigInteger, nullable=False, default=0)
+    last_ledger_id = Column(Integer, nullable=False, default=0)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
 class Publication(Base):
     """Модель публикации"""
     __tablename__ = 'publications'
@@ -59,6 +86,13 @@ class Publication(Base):
     cost = Column(Float, nullable=False)
     message_id = Column(Integer, nullable=True)  # ID сообщения в группе
 
+    __table_args__ = (
+        # get_user_publications: последние публикации пользователя
+        Index('ix_publications_user_id_created_at', user_id, created_at.desc()),
+        # Пересканирование стоп-словами: запланированные публикации пачками по id
+        Index('ix_publications_status_id', status, id),
+    )
+
     # Связи
     user = relationship("User", back_populates="publications")
 
@@ -75,6 +109,13 @@ class Payment(Base):
     created_at = Column(DateTime, default=datetime.utcnow)
     completed_at = Column(DateTime, nullable=True)
 
+    __table_args__ = (
+        # get_user_payments: последние платежи пользователя
+        Index('ix_payments_user_id_created_at', user_id, created_at.desc()),
+        # get_total_payments_sum: покрывающий индекс, сумма считается без чтения таблицы
+        Index('ix_payments_status_amount', status, amount),
+    )
+
     # Связи
     user = relationship("User", back_populates="payments")
 
@@ -92,6 +133,13 @@ class ScheduledPost(Base):
     is_active = Column(Boolean, default=True)
     created_at = Column(DateTime, default=datetime.utcnow)
 
+    __table_args__ = (
+        # get_scheduled_posts(): активные публикации в порядке времени
+        Index('ix_scheduled_posts_is_active_scheduled_time', is_active, scheduled_time),
+        # get_scheduled_posts(user_id): активные публикации пользователя
+        Index('ix_scheduled_posts_user_id_is_active', user_id, is_active),
+    )
+
     # Связи
     user = relationship("User", back_populates="scheduled_posts")
     publication = relationship("Publication")
@@ -113,3 +161,24 @@ class UserSession(Base):
     user_id = Column(Integer, ForeignKey('users.user_id'), unique=True)
     session_data = Column(Text)  # JSON данные сессии
     last_updated = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    __table_args__ = (
+        # sweep_stale_sessions: поиск сессий старше TTL
+        Index('ix_user_sessions_last_updated', last_updated),
+    )
+
+class SchemaVersion(Base):
+    """Модель примененных миграций схемы"""
+    __tablename__ = 'schema_version'
+
+    version = Column(Integer, primary_key=True, autoincrement=False)
+    description = Column(String(255), nullable=False)
+    applied_at = Column(DateTime, default=datetime.utcnow)
+
+class StatsCounter(Base):
+    """Модель счетчиков статистики (обновляются в транзакции вставки)"""
+    __tablename__ = 'stats_counters'
+
+    name = Column(String(64), primary_key=True)
+    value = Column(Float, nullable=False, default=0.0)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
@@ -0,0 +1,179 @@
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from typing import Any, Dict, Iterable, List, Optional
+import logging
+import sys
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+# Границы гистограммы латентности, мс (последняя корзина - все, что больше)
+LATENCY_BUCKETS_MS = (1, 5, 10, 50, 100, 500, 1000)
+# Ограничение числа различных SQL-выражений в статистике
+MAX_STATEMENTS = 500
+OTHER_STATEMENTS = '<other>'
+UNKNOWN_METHOD = '<unknown>'
+
+
+class _Timing:
+    """Счетчики одного ключа (метода или SQL-выражения)"""
+    __slots__ = ('count', 'total_ms', 'max_ms', 'rows', 'buckets')
+
+    def __init__(self):
+        self.count = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+        self.rows = 0
+        self.buckets = [0] * (len(LATENCY_BUCKETS_MS) + 1)
+
+    def add(self, elapsed_ms: float, rows: int):
+        self.count += 1
+        self.total_ms += elapsed_ms
+        self.max_ms = max(self.max_ms, elapsed_ms)
+        if rows > 0:
+            self.rows += rows
+        for index, bound in enumerate(LATENCY_BUCKETS_MS):
+            if elapsed_ms <= bound:
+                self.buckets[index] += 1
+                break
+        else:
+            self.buckets[-1] += 1
+
+    def as_dict(self) -> Dict[str, Any]:
+        labels = [f"<={bound}ms" for bound in LATENCY_BUCKETS_MS] + [f">{LATENCY_BUCKETS_MS[-1]}ms"]
+        return {
+            'count': self.count,
+            'total_ms': round(self.total_ms, 3),
+            'avg_ms': round(self.total_ms / self.count, 3) if self.count else 0.0,
+            'max_ms': round(self.max_ms, 3),
+            'rows': self.rows,
+            'histogram': dict(zip(labels, self.buckets)),
+        }
+
+
+class QueryStats:
+    """
+    Латентность запросов по методам DatabaseManager и по SQL-выражениям.
+
+    Слушатели before/after_cursor_execute ставятся на движки только при
+    включении и снимаются при выключении, поэтому выключенная статистика
+    ничего не стоит. Метод определяется по стеку вызовов: ближайший
+    публичный метод DatabaseManager (приватные помощники и публичные из
+    helpers, например контекстные менеджеры сессий, относятся к вызвавшему
+    их методу). rows - cursor.rowcount (для SELECT драйверы
+    обычно его не сообщают).
+    """
+
+    def __init__(self, owner_class: type, slow_query_ms: Optional[float] = 200.0,
+                 helpers: Iterable[str] = ()):
+        self.slow_query_ms = slow_query_ms
+        self.enabled = False
+        self._engines: List[Engine] = []
+        self._lock = threading.Lock()
+        self._methods: Dict[str, _Timing] = {}
+        self._statements: Dict[str, _Timing] = {}
+        self.slow_queries = 0
+        self.started_at: Optional[float] = None
+        # Код публичных методов -> имя метода
+        self._method_codes = {}
+        helpers = set(helpers)
+        for name, attr in vars(owner_class).items():
+            if name.startswith('_') or name in helpers:
+                continue
+            func = getattr(attr, '__func__', attr)
+            func = getattr(func, '__wrapped__', func)
+            code = getattr(func, '__code__', None)
+            if code is not None:
+                self._method_codes[code] = name
+
+    def enable(self, *engines: Engine):
+        """Поставить слушатели на движки"""
+        if self.enabled:
+            return
+        self._engines = list(dict.fromkeys(engines))
+        for engine in self._engines:
+            event.listen(engine, 'before_cursor_execute', self._before_cursor_execute)
+            event.listen(engine, 'after_cursor_execute', self._after_cursor_execute)
+        self.enabled = True
+        self.started_at = time.time()
+        logger.info("Статистика запросов включена")
+
+    def disable(self):
+        """Снять слушатели (накопленная статистика сохраняется)"""
+        if not self.enabled:
+            return
+        for engine in self._engines:
+            event.remove(engine, 'before_cursor_execute', self._before_cursor_execute)
+            event.remove(engine, 'after_cursor_execute', self._after_cursor_execute)
+        self._engines = []
+        self.enabled = False
+        logger.info("Статистика запросов выключена")
+
+    def reset(self):
+        """Обнулить накопленную статистику"""
+        with self._lock:
+            self._methods.clear()
+            self._statements.clear()
+            self.slow_queries = 0
+            self.started_at = time.time() if self.enabled else None
+
+    def _current_method(self) -> str:
+        frame = sys._getframe(2)
+        while frame is not None:
+            name = self._method_codes.get(frame.f_code)
+            if name is not None:
+                return name
+            frame = frame.f_back
+        return UNKNOWN_METHOD
+
+    def _before_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault('query_stats_start', []).append((time.perf_counter(), self._current_method()))
+
+    def _after_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        started = conn.info.get('query_stats_start')
+        if not started:
+            return
+        start, method = started.pop()
+        elapsed_ms = (time.perf_counter() - start) * 1000
+        rows = cursor.rowcount if cursor.rowcount is not None else -1
+
+        with self._lock:
+            self._methods.setdefault(method, _Timing()).add(elapsed_ms, rows)
+            key = statement
+            if key not in self._statements and len(self._statements) >= MAX_STATEMENTS:
+                key = OTHER_STATEMENTS
+            self._statements.setdefault(key, _Timing()).add(elapsed_ms, rows)
+            slow = self.slow_query_ms is not None and elapsed_ms >= self.slow_query_ms
+            if slow:
+                self.slow_queries += 1
+
+        if slow:
+            logger.warning(f"Медленный запрос {elapsed_ms:.1f} мс в {method}: {statement[:500]}")
+
+    def snapshot(self, top: int = 10) -> Dict[str, Any]:
+        """
+        Снимок статистики
+
+        Args:
+            top: Сколько SQL-выражений вернуть (по суммарному времени)
+        Returns:
+            Dict[str, Any]: enabled, since, slow_query_ms, slow_queries, methods, statements
+        """
+        with self._lock:
+            methods = {
+                name: timing.as_dict()
+                for name, timing in sorted(self._methods.items(), key=lambda item: -item[1].total_ms)
+            }
+            statements = [
+                {'statement': statement, **timing.as_dict()}
+                for statement, timing in sorted(self._statements.items(), key=lambda item: -item[1].total_ms)[:top]
+            ]
+            return {
+                'enabled': self.enabled,
+                'since': self.started_at,
+                'slow_query_ms': self.slow_query_ms,
+                'slow_queries': self.slow_queries,
+                'methods': methods,
+                'statements': statements,
+            }
@@ -0,0 +1,133 @@
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.util import await_only
+from sqlalchemy.util.concurrency import in_greenlet
+from typing import Any, Callable, Dict
+import asyncio
+import contextvars
+import functools
+import logging
+import random
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+# Сообщения SQLite о временной блокировке (SQLITE_BUSY / SQLITE_LOCKED)
+LOCK_ERROR_MESSAGES = ('database is locked', 'database table is locked', 'database is busy')
+# Гистограмма числа повторов на вызов (последняя корзина - все, что больше)
+RETRY_BUCKETS = (1, 2, 3, 5)
+
+# Глубина вложенности: повторяет только внешний вызов, вложенные выполняются как есть
+_retry_depth: contextvars.ContextVar = contextvars.ContextVar('db_lock_retry_depth', default=0)
+
+
+def is_lock_error(error: BaseException) -> bool:
+    """Временная блокировка БД, после которой транзакцию можно повторить"""
+    if not isinstance(error, OperationalError):
+        return False
+    message = str(error.orig).lower()
+    return any(text in message for text in LOCK_ERROR_MESSAGES)
+
+
+class LockRetryPolicy:
+    """
+    Повтор транзакции при "database is locked".
+
+    busy_timeout не помогает, когда транзакция сначала читала, а затем
+    пытается писать: SQLite сразу возвращает SQLITE_BUSY. Такая транзакция
+    уже откачена get_session, поэтому метод записи выполняется заново
+    целиком после паузы: base_delay * 2^n (не больше max_delay) со
+    случайным разбросом ("full jitter"). Внутри greenlet_spawn пауза
+    выполняется через asyncio.sleep и не блокирует event loop.
+    """
+
+    def __init__(self, attempts: int = 5, base_delay: float = 0.05, max_delay: float = 1.0):
+        self.attempts = max(1, attempts)
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self._lock = threading.Lock()
+        self.calls_retried = 0
+        self.retries = 0
+        self.recovered = 0
+        self.exhausted = 0
+        self.max_retries = 0
+        self.retry_histogram = {bucket: 0 for bucket in RETRY_BUCKETS + (None,)}
+
+    def call(self, func: Callable, *args, **kwargs) -> Any:
+        """Выполнить func, повторяя его при временной блокировке БД"""
+        if _retry_depth.get():
+            return func(*args, **kwargs)
+
+        token = _retry_depth.set(1)
+        try:
+            retry = 0
+            while True:
+                try:
+                    result = func(*args, **kwargs)
+                except OperationalError as e:
+                    if not is_lock_error(e):
+                        raise
+                    if retry + 1 >= self.attempts:
+                        self._record(retry, recovered=False)
+                        logger.error(f"БД заблокирована, {getattr(func, '__name__', func)} "
+                                     f"не выполнен после {retry + 1} попыток")
+                        raise
+                    retry += 1
+                    delay = random.uniform(0, min(self.max_delay, self.base_delay * 2 ** (retry - 1)))
+                    logger.warning(f"БД заблокирована, повтор {getattr(func, '__name__', func)} "
+                                   f"#{retry} через {delay * 1000:.0f} мс")
+                    self._sleep(delay)
+                    continue
+                if retry:
+                    self._record(retry, recovered=True)
+                return result
+        finally:
+            _retry_depth.reset(token)
+
+    @staticmethod
+    def _sleep(delay: float):
+        if in_greenlet():
+            await_only(asyncio.sleep(delay))
+        else:
+            time.sleep(delay)
+
+    def _record(self, retries: int, recovered: bool):
+        with self._lock:
+            if retries:
+                self.calls_retried += 1
+                self.retries += retries
+                self.max_retries = max(self.max_retries, retries)
+                for bucket in RETRY_BUCKETS:
+                    if retries <= bucket:
+                        self.retry_histogram[bucket] += 1
+                        break
+                else:
+                    self.retry_histogram[None] += 1
+            if recovered:
+                self.recovered += 1
+            else:
+                self.exhausted += 1
+
+    def stats(self) -> Dict[str, Any]:
+        """Число повторов, успешных после повтора и исчерпавших попытки вызовов"""
+        with self._lock:
+            return {
+                'attempts': self.attempts,
+                'calls_retried': self.calls_retried,
+                'retries': self.retries,
+                'recovered': self.recovered,
+                'exhausted': self.exhausted,
+                'max_retries': self.max_retries,
+                'retry_histogram': {
+                    (f"<={bucket}" if bucket is not None else f">{RETRY_BUCKETS[-1]}"): count
+                    for bucket, count in self.retry_histogram.items()
+                },
+            }
+
+
+def retry_on_lock(method: Callable) -> Callable:
+    """Декоратор метода DatabaseManager: повтор по self.retry_policy"""
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        return self.retry_policy.call(method, self, *args, **kwargs)
+    return wrapper
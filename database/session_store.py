@@ -0,0 +1,181 @@
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, List, Optional, Tuple
+import threading
+import time
+
+from .cache import MISSING
+
+# Границы гистограммы размеров пачек сброса (верхняя граница включительно)
+FLUSH_BATCH_BUCKETS = (1, 10, 100, 1000)
+
+
+class _Entry:
+    __slots__ = ('data', 'dirty_since', 'version', 'flushed_version')
+
+    def __init__(self, data: Optional[Dict[str, Any]]):
+        self.data = data  # None - сессия удалена, строку нужно удалить из БД
+        self.dirty_since: Optional[float] = None
+        self.version = 0
+        self.flushed_version = 0
+
+    @property
+    def dirty(self) -> bool:
+        return self.version != self.flushed_version
+
+
+class SessionStore:
+    """
+    Внутрипроцессное хранилище данных сессий (write-behind).
+
+    Изменения сессии сохраняются в памяти и помечаются как "грязные".
+    Запись в user_sessions выполняет DatabaseManager.flush_sessions пачками:
+    по интервалу, при смене состояния пользователя и при остановке бота.
+    Грязные записи не вытесняются, чистые вытесняются по LRU.
+    """
+
+    def __init__(self, max_size: int = 10000, max_unflushed_age: Optional[float] = 30.0):
+        self.max_size = max_size
+        self.max_unflushed_age = max_unflushed_age
+        self._data: "OrderedDict[Hashable, _Entry]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.flushes = 0
+        self.rows_flushed = 0
+        self.last_batch_size = 0
+        self.max_batch_size = 0
+        self.max_flushed_age = 0.0
+        self.batch_histogram = {bucket: 0 for bucket in FLUSH_BATCH_BUCKETS + (None,)}
+
+    def get(self, key: Hashable) -> Any:
+        """Данные сессии (копия), None для удаленной сессии или MISSING"""
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return MISSING
+            self._data.move_to_end(key)
+            return dict(entry.data) if entry.data is not None else None
+
+    def load(self, key: Hashable, data: Optional[Dict[str, Any]]):
+        """Запомнить данные, прочитанные из БД (чистая запись)"""
+        with self._lock:
+            if key not in self._data:
+                self._data[key] = _Entry(dict(data) if data is not None else None)
+                self._evict()
+
+    def put(self, key: Hashable, data: Dict[str, Any]):
+        """Изменить данные сессии (запись будет сброшена в БД позже)"""
+        self._write(key, dict(data))
+
+    def delete(self, key: Hashable):
+        """Удалить сессию (строка будет удалена из БД при сбросе)"""
+        self._write(key, None)
+
+    def _write(self, key: Hashable, data: Optional[Dict[str, Any]]):
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                entry = self._data[key] = _Entry(data)
+            else:
+                entry.data = data
+            if not entry.dirty:
+                entry.dirty_since = time.monotonic()
+            entry.version += 1
+            self._data.move_to_end(key)
+            self._evict()
+
+    def discard(self, key: Hashable) -> bool:
+        """Удалить чистую запись (строка удалена из БД); грязные не трогаются"""
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None or entry.dirty:
+                return False
+            del self._data[key]
+            return True
+
+    def dirty_entry(self, key: Hashable) -> Optional[Tuple[Hashable, Optional[Dict[str, Any]], int]]:
+        """Грязная запись одного пользователя: (ключ, данные, версия) или None"""
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None or not entry.dirty:
+                return None
+            return key, dict(entry.data) if entry.data is not None else None, entry.version
+
+    def dirty_batch(self) -> List[Tuple[Hashable, Optional[Dict[str, Any]], int]]:
+        """Снимок грязных записей: (ключ, данные, версия)"""
+        with self._lock:
+            return [
+                (key, dict(entry.data) if entry.data is not None else None, entry.version)
+                for key, entry in self._data.items() if entry.dirty
+            ]
+
+    def mark_flushed(self, batch: List[Tuple[Hashable, Optional[Dict[str, Any]], int]]):
+        """
+        Отметить пачку записанной.
+
+        Записи, измененные во время сброса (версия выросла), остаются грязными.
+        """
+        now = time.monotonic()
+        with self._lock:
+            for key, _, version in batch:
+                entry = self._data.get(key)
+                if entry is None or entry.version != version:
+                    continue
+                self.max_flushed_age = max(self.max_flushed_age, now - entry.dirty_since)
+                entry.flushed_version = version
+                entry.dirty_since = None
+                if entry.data is None:
+                    del self._data[key]
+            if batch:
+                self._record_batch(len(batch))
+            self._evict()
+
+    def oldest_dirty_age(self) -> float:
+        """Возраст самого старого несброшенного изменения, сек"""
+        now = time.monotonic()
+        with self._lock:
+            ages = [now - entry.dirty_since for entry in self._data.values() if entry.dirty]
+        return max(ages, default=0.0)
+
+    def flush_due(self) -> bool:
+        """Превышен ли допустимый возраст несброшенных изменений"""
+        return self.max_unflushed_age is not None and self.oldest_dirty_age() > self.max_unflushed_age
+
+    def _evict(self):
+        # Вытесняются только чистые записи, начиная с самых старых
+        if len(self._data) <= self.max_size:
+            return
+        for key in [key for key, entry in self._data.items() if not entry.dirty]:
+            if len(self._data) <= self.max_size:
+                break
+            del self._data[key]
+
+    def _record_batch(self, size: int):
+        self.flushes += 1
+        self.rows_flushed += size
+        self.last_batch_size = size
+        self.max_batch_size = max(self.max_batch_size, size)
+        for bucket in FLUSH_BATCH_BUCKETS:
+            if size <= bucket:
+                self.batch_histogram[bucket] += 1
+                break
+        else:
+            self.batch_histogram[None] += 1
+
+    def stats(self) -> Dict[str, Any]:
+        """Размер, число грязных записей и метрики сбросов"""
+        oldest_dirty_age = self.oldest_dirty_age()
+        with self._lock:
+            return {
+                'size': len(self._data),
+                'dirty': sum(1 for entry in self._data.values() if entry.dirty),
+                'oldest_dirty_age': oldest_dirty_age,
+                'flushes': self.flushes,
+                'rows_flushed': self.rows_flushed,
+                'last_batch_size': self.last_batch_size,
+                'max_batch_size': self.max_batch_size,
+                'avg_batch_size': self.rows_flushed / self.flushes if self.flushes else 0.0,
+                'max_flushed_age': self.max_flushed_age,
+                'batch_histogram': {
+                    (f"<={bucket}" if bucket is not None else f">{FLUSH_BATCH_BUCKETS[-1]}"): count
+                    for bucket, count in self.batch_histogram.items()
+                },
+            }
@@ -0,0 +1,69 @@
+from typing import Any, Dict, Optional
+import json
+
+
+class UserUnitOfWork:
+    """
+    Снимок данных пользователя на время обработки одного апдейта.
+
+    Загружается одним запросом (состояние, данные сессии, баланс, флаг
+    админа). Изменения состояния и сессии накапливаются в памяти и
+    применяются одной транзакцией в DatabaseManager.commit_user_work.
+    """
+
+    def __init__(self, user_id: int, state: str = 'idle', session_json: Optional[str] = None,
+                 balance: float = 0.0, is_admin: bool = False, user_exists: bool = True,
+                 session_exists: bool = False):
+        self.user_id = user_id
+        self.balance = balance
+        self.is_admin = is_admin
+        self.user_exists = user_exists
+        self.session_exists = session_exists
+
+        self._state = state
+        self._state_changed = False
+        self._session_cleared = False
+        self._original_session_json = session_json
+
+        try:
+            self.session_data: Dict[str, Any] = json.loads(session_json) if session_json else {}
+        except json.JSONDecodeError:
+            self.session_data = {}
+
+    @property
+    def state(self) -> str:
+        return self._state
+
+    @state.setter
+    def state(self, value: str):
+        if value != self._state:
+            self._state = value
+            self._state_changed = True
+
+    @property
+    def state_changed(self) -> bool:
+        return self._state_changed
+
+    @property
+    def session_cleared(self) -> bool:
+        return self._session_cleared and not self.session_data
+
+    def clear_session(self):
+        """Очистить данные сессии (строка user_sessions будет удалена)"""
+        self.session_data = {}
+        self._session_cleared = True
+
+    def session_json(self) -> str:
+        return json.dumps(self.session_data, ensure_ascii=False)
+
+    @property
+    def session_changed(self) -> bool:
+        if self.session_cleared:
+            return self.session_exists
+        if not self.session_data and not self.session_exists:
+            return False
+        return self.session_json() != self._original_session_json
+
+    @property
+    def has_changes(self) -> bool:
+        return self.state_changed or self.session_changed
@@ -2,13 +2,16 @@ from telegram import Update, InlineKeyboardButton, InlineKeyboardMarkup
 from telegram.ext import ContextTypes, ConversationHandler
 import logging
 
+from services.filter_service import StopWordsFilter
+
 logger = logging.getLogger(__name__)
 
 class AdminHandlers:
     """Обработчики для администраторов"""
 
-    def __init__(self, db_manager):
+    def __init__(self, db_manager, filter_service: StopWordsFilter = None):
         self.db = db_manager
+        self.filter_service = filter_service or StopWordsFilter(db_manager)
 
     async def admin_start(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
         """Стартовое сообщение для админа"""
@@ -24,12 +27,95 @@ class AdminHandlers:
 
         await update.message.reply_text(welcome_text, reply_markup=reply_markup)
 
+    async def db_stats_command(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
+        """Команда /dbstats [on|off|reset]: латентность запросов к БД"""
+        if not await self.db.is_user_admin(update.effective_user.id):
+            return
+
+        action = context.args[0].lower() if context.args else None
+        if action == "on":
+            await self.db.enable_query_stats()
+            await update.message.reply_text("✅ Сбор статистики запросов включен")
+            return
+        if action == "off":
+            await self.db.disable_query_stats()
+            await update.message.reply_text("⏸ Сбор статистики запросов выключен")
+            return
+        if action == "reset":
+            await self.db.reset_query_stats()
+            await update.message.reply_text("🗑 Статистика запросов обнулена")
+            return
+
+        stats = await self.db.get_query_stats(top=5)
+        retry = await self.db.get_lock_retry_stats()
+        lines = [
+            f"📊 Статистика запросов ({'включена' if stats['enabled'] else 'выключена'})",
+            f"Медленных (≥ {stats['slow_query_ms']} мс): {stats['slow_queries']}",
+            f"Повторов при блокировке БД: {retry['retries']} "
+            f"(успешно {retry['recovered']}, неудачно {retry['exhausted']})",
+            "",
+            "Методы (всего мс / вызовов / среднее / макс):"
+        ]
+        for name, timing in list(stats['methods'].items())[:15]:
+            lines.append(f"• {name}: {timing['total_ms']:.1f} / {timing['count']} / "
+                         f"{timing['avg_ms']:.2f} / {timing['max_ms']:.1f}")
+        if not stats['methods']:
+            lines.append("нет данных (/dbstats on - включить)")
+
+        lines += ["", "Самые дорогие запросы:"]
+        for item in stats['statements']:
+            statement = " ".join(item['statement'].split())[:120]
+            lines.append(f"• {item['total_ms']:.1f} мс / {item['count']}: {statement}")
+
+        await update.message.reply_text("\n".join(lines)[:4000])
+
+    async def rescan_command(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
+        """Команда /rescan: проверить запланированные публикации по текущему списку стоп-слов"""
+        if not await self.db.is_user_admin(update.effective_user.id):
+            return
+
+        await update.message.reply_text(
+            "🔎 Проверка запланированных публикаций запущена, отчет придет отдельным сообщением"
+        )
+        # Проверка идет в фоне: обработка остальных обновлений не ждет ее окончания
+        context.application.create_task(
+            self._rescan_and_report(context.bot, update.effective_chat.id), update=update
+        )
+
+    async def _rescan_and_report(self, bot, chat_id: int):
+        """Пересканировать запланированные публикации и отправить отчет"""
+        try:
+            report = await self.filter_service.rescan_scheduled_publications()
+        except Exception as e:
+            logger.error(f"Ошибка пересканирования публикаций: {e}")
+            await bot.send_message(chat_id, "❌ Не удалось проверить запланированные публикации")
+            return
+
+        lines = [
+            f"🔎 Проверено запланированных публикаций: {report['scanned']} "
+            f"за {report['elapsed_ms'] / 1000:.1f} с",
+            f"Со стоп-словами: {report['flagged']}",
+        ]
+        if report['words']:
+            lines.append("Чаще всего: " + ", ".join(
+                f"{word} ({count})" for word, count in list(report['words'].items())[:10]
+            ))
+        if report['publications']:
+            lines.append("")
+        for item in report['publications']:
+            lines.append(f"• #{item['publication_id']} (пользователь {item['user_id']}, {item['type']}): "
+                         f"{', '.join(item['words'])}")
+        if report['flagged'] > len(report['publications']):
+            lines.append(f"... и еще {report['flagged'] - len(report['publications'])}")
+
+        await bot.send_message(chat_id, "\n".join(lines)[:4000])
+
     async def show_stop_words(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
         """Показать список стоп-слов"""
         query = update.callback_query
         await query.answer()
 
-        stop_words = self.db.get_all_stop_words()
+        stop_words = await self.db.get_all_stop_words()
         if stop_words:
             words_text = "📝 Список стоп-слов:\n\n" + "\n".join(f"• {word}" for word in stop_words)
         else:
@@ -52,7 +138,7 @@ class AdminHandlers:
         await query.edit_message_text(text, reply_markup=reply_markup)
 
         # Устанавливаем состояние ожидания ввода стоп-слов
-        self.db.update_user_state(update.effective_user.id, "waiting_stop_words")
+        await self.db.update_user_state(update.effective_user.id, "waiting_stop_words")
         return "WAITING_STOP_WORDS"
 
     async def process_stop_words(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
@@ -60,12 +146,15 @@ class AdminHandlers:
         user_id = update.effective_user.id
         text = update.message.text
 
-        # Разбираем введенные слова
-        words = [word.strip() for word in text.split(",") if word.strip()]
+        # Разбираем введенные слова (сохраняются как введены, нормализуются при проверке)
+        words = StopWordsFilter.clean_words(text.split(","))
 
         if words:
-            self.db.add_stop_words(words, user_id)
-            response = f"✅ Стоп-слова добавлены: {', '.join(words)}"
+            result = await self.db.add_stop_words(words, user_id)
+            response = (f"✅ Стоп-слова добавлены: {result['added']}\n"
+                        f"Пропущено (дубликаты и уже в списке): {result['skipped']}")
+            if result['added']:
+                response += "\n\n/rescan - проверить уже запланированные публикации"
         else:
             response = "❌ Не удалось распознать стоп-слова"
 
@@ -82,7 +171,7 @@ class AdminHandlers:
         await update.message.reply_text(response)
         await update.message.reply_text(welcome_text, reply_markup=reply_markup)
 
-        self.db.update_user_state(user_id, "idle")
+        await self.db.update_user_state(user_id, "idle")
         return ConversationHandler.END
 
     async def clear_stop_words(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
@@ -90,7 +179,7 @@ class AdminHandlers:
         query = update.callback_query
         await query.answer()
 
-        self.db.clear_stop_words()
+        await self.db.clear_stop_words()
         text = "🗑️ Список стоп-слов очищен"
         keyboard = [[InlineKeyboardButton("◀️ Назад", callback_data="admin_back_to_main")]]
         reply_markup = InlineKeyboardMarkup(keyboard)
@@ -131,7 +220,7 @@ class AdminHandlers:
         await query.answer()
 
         user_id = update.effective_user.id
-        self.db.update_user_state(user_id, "idle")
+        await self.db.update_user_state(user_id, "idle")
 
         await self.admin_back_to_main(update, context)
         return ConversationHandler.END
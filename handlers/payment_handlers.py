@@ -4,7 +4,7 @@ from telegram import Update, InlineKeyboardButton, InlineKeyboardMarkup, Labeled
 from telegram.ext import ContextTypes
 import logging
 
-from database.db_manager import DatabaseManager
+from database.async_db_manager import AsyncDatabaseManager
 from config.settings import PACKAGE_PRICING, MESSAGES
 from services.payment_service import PaymentService
 
@@ -14,7 +14,7 @@ logger = logging.getLogger(__name__)
 class PaymentHandlers:
     """Обработчики платежей"""
 
-    def __init__(self, db_manager: DatabaseManager, payment_service: PaymentService):
+    def __init__(self, db_manager: AsyncDatabaseManager, payment_service: PaymentService):
         self.db = db_manager
         self.payment_service = payment_service
 
@@ -32,7 +32,7 @@ class PaymentHandlers:
         await query.edit_message_text(text, reply_markup=reply_markup)
 
         user_id = update.effective_user.id
-        self.db.update_user_state(user_id, "entering_payment_amount_ad")
+        await self.db.update_user_state(user_id, "entering_payment_amount_ad")
 
     async def shop_job_scenario(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
         """Сценарий покупки объявления о работе"""
@@ -48,7 +48,7 @@ class PaymentHandlers:
         await query.edit_message_text(text, reply_markup=reply_markup)
 
         user_id = update.effective_user.id
-        self.db.update_user_state(user_id, "entering_payment_amount_job")
+        await self.db.update_user_state(user_id, "entering_payment_amount_job")
 
     def _format_pricing_text(self, service_type: str) -> str:
         """Форматирование текста с ценами"""
@@ -84,26 +84,23 @@ class PaymentHandlers:
             )
             return
 
-        # Сохраняем сумму в сессии
-        session_data = self.db.get_session_data(user_id)
-        session_data['payment_amount'] = amount
-        self.db.save_session_data(user_id, session_data)
+        async with self.db.user_work(user_id) as work:
+            # Сохраняем сумму в сессии
+            work.session_data['payment_amount'] = amount
 
-        # Показываем кнопки для оплаты
-        keyboard = [
-            [InlineKeyboardButton("💳 Перейти к оплате", callback_data=f"pay_{amount}")],
-            [InlineKeyboardButton("◀️ Назад", callback_data="menu_магазин")]
-        ]
-        reply_markup = InlineKeyboardMarkup(keyboard)
-        
+            # Показываем кнопки для оплаты
+            keyboard = [
+                [InlineKeyboardButton("💳 Перейти к оплате", callback_data=f"pay_{amount}")],
+                [InlineKeyboardButton("◀️ Назад", callback_data="menu_магазин")]
+            ]
+            reply_markup = InlineKeyboardMarkup(keyboard)
 
-        
-        await update.message.reply_text(
-            f"Оплата {int(amount)} рублей",
-            reply_markup=reply_markup
-        )
+            await update.message.reply_text(
+                f"Оплата {int(amount)} рублей",
+                reply_markup=reply_markup
+            )
 
-        self.db.update_user_state(user_id, "confirming_payment")
+            work.state = "confirming_payment"
 
     async def initiate_payment(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
         """Инициация платежа"""
@@ -115,7 +112,7 @@ class PaymentHandlers:
         amount = float(amount_str)
 
         # Создаем платеж в базе данных
-        payment_id = self.db.create_payment(user_id, amount, "telegram_payments")
+        payment_id = await self.db.create_payment(user_id, amount, "telegram_payments")
 
         # Сохраняем ID платежа в контексте
         context.user_data['payment_id'] = payment_id
@@ -170,11 +167,11 @@ class PaymentHandlers:
         payment_id = int(payment.invoice_payload.split("_")[1])
 
         # Завершаем платеж в базе данных
-        success = self.db.complete_payment(payment_id, payment.telegram_payment_charge_id)
+        success = await self.db.complete_payment(payment_id, payment.telegram_payment_charge_id)
 
         if success:
             amount = payment.total_amount / 100  # Конвертируем из копеек
-            balance = self.db.get_user_balance(user_id)
+            balance = await self.db.get_user_balance(user_id)
 
             response_text = MESSAGES["payment_success"].format(
                 amount=int(amount),
@@ -187,8 +184,8 @@ class PaymentHandlers:
             await update.message.reply_text(response_text, reply_markup=reply_markup)
 
             # Очищаем состояние пользователя
-            self.db.update_user_state(user_id, "idle")
-            self.db.clear_session_data(user_id)
+            await self.db.update_user_state(user_id, "idle")
+            await self.db.clear_session_data(user_id)
         else:
             await update.message.reply_text(
                 "❌ Произошла ошибка при обработке платежа. Обратитесь в поддержку."
@@ -205,4 +202,4 @@ class PaymentHandlers:
         await update.message.reply_text(text, reply_markup=reply_markup)
 
         # Очищаем состояние пользователя
-        self.db.update_user_state(user_id, "idle")
+        await self.db.update_user_state(user_id, "idle")
@@ -2,11 +2,12 @@ from telegram import Update, InlineKeyboardButton, InlineKeyboardMarkup, Keyboar
     ReplyKeyboardRemove
 from telegram.ext import ContextTypes, ConversationHandler
 from datetime import datetime, timedelta
+import functools
 import re
 import os
 import logging
 
-from database.db_manager import DatabaseManager
+from database.async_db_manager import AsyncDatabaseManager
 from config.settings import (
     MESSAGES, KEYBOARDS, UserState, FirmType, PACKAGE_PRICING,
     DELAYED_BALANCE_REQUIREMENTS, FORMATS, WEEKDAY_NAMES, ERROR_MESSAGES
@@ -17,12 +18,29 @@ from services.scheduler import PublicationScheduler
 logger = logging.getLogger(__name__)
 
 
+def with_user_work(handler):
+    """
+    Декоратор шага мастера: если unit of work не передан вызывающим
+    обработчиком, открыть его на время шага (первый аргумент - Update
+    или CallbackQuery)
+    """
+    @functools.wraps(handler)
+    async def wrapper(self, update, context: ContextTypes.DEFAULT_TYPE, work=None):
+        if work is not None:
+            return await handler(self, update, context, work)
+        user = update.effective_user if isinstance(update, Update) else update.from_user
+        async with self.db.user_work(user.id) as work:
+            return await handler(self, update, context, work)
+    return wrapper
+
+
 class UserHandlers:
     """Обработчики для обычных пользователей"""
 
-    def __init__(self, db_manager: DatabaseManager):
+    def __init__(self, db_manager: AsyncDatabaseManager, filter_service: StopWordsFilter = None):
         self.db = db_manager
-        self.filter_service = StopWordsFilter(db_manager)
+        # Общий с ботом фильтр: один автомат стоп-слов в памяти и одна перестройка на изменение списка
+        self.filter_service = filter_service or StopWordsFilter(db_manager)
         self.scheduler = None
 
     def set_scheduler(self, scheduler: PublicationScheduler):
@@ -34,7 +52,7 @@ class UserHandlers:
         user = update.effective_user
 
         # Создаем или получаем пользователя
-        db_user = self.db.get_or_create_user(
+        db_user = await self.db.get_or_create_user(
             user_id=user.id,
             username=user.username,
             first_name=user.first_name,
@@ -42,9 +60,9 @@ class UserHandlers:
         )
 
         # Проверяем права администратора
-        if self.db.is_user_admin(user.id):
+        if await self.db.is_user_admin(user.id):
             from .admin_handlers import AdminHandlers
-            admin_handlers = AdminHandlers(self.db)
+            admin_handlers = AdminHandlers(self.db, self.filter_service)
             await admin_handlers.admin_start(update, context)
         else:
             # Показываем приветственное сообщение для обычного пользователя
@@ -110,7 +128,7 @@ class UserHandlers:
         await query.answer()
 
         user_id = update.effective_user.id
-        balance = self.db.get_user_balance(user_id)
+        balance = await self.db.get_user_balance(user_id)
 
         text = MESSAGES["balance_info"].format(balance=int(balance))
 
@@ -128,7 +146,7 @@ class UserHandlers:
         await query.answer()
 
         user_id = update.effective_user.id
-        balance = self.db.get_user_balance(user_id)
+        balance = await self.db.get_user_balance(user_id)
 
         text = f"Ваш баланс: {int(balance)} рублей\nВыберите что покупаем:"
 
@@ -149,9 +167,9 @@ class UserHandlers:
         user_id = update.effective_user.id
 
         # Проверяем права админа или баланс
-        if not self.db.is_user_admin(user_id):
-            balance = self.db.get_user_balance(user_id)
-            if balance < 160:
+        work = await self.db.load_user_work(user_id)
+        if not work.is_admin:
+            if work.balance < 160:
                 # Перенаправляем в магазин
                 from .payment_handlers import PaymentHandlers
                 payment_handlers = PaymentHandlers(self.db, None)
@@ -169,9 +187,9 @@ class UserHandlers:
         user_id = update.effective_user.id
 
         # Проверяем права админа или баланс
-        if not self.db.is_user_admin(user_id):
-            balance = self.db.get_user_balance(user_id)
-            if balance < 100:
+        work = await self.db.load_user_work(user_id)
+        if not work.is_admin:
+            if work.balance < 100:
                 # Перенаправляем в магазин
                 from .payment_handlers import PaymentHandlers
                 payment_handlers = PaymentHandlers(self.db, None)
@@ -207,22 +225,21 @@ class UserHandlers:
 
             user_id = update.effective_user.id
 
-            # Сохраняем тип публикации в сессии
-            session_data = self.db.get_session_data(user_id)
-            session_data['publication_type'] = pub_type
-            self.db.save_session_data(user_id, session_data)
+            async with self.db.user_work(user_id) as work:
+                # Сохраняем тип публикации в сессии
+                work.session_data['publication_type'] = pub_type
 
-            keyboard = [
-                [InlineKeyboardButton("ИП", callback_data="firm_type_ИП")],
-                [InlineKeyboardButton("ФИЗ ЛИЦО", callback_data="firm_type_ФИЗ ЛИЦО")],
-                [InlineKeyboardButton("ЮР ЛИЦО", callback_data="firm_type_ЮР ЛИЦО")],
-                [InlineKeyboardButton("◀️ Назад", callback_data="main_menu")]
-            ]
-            reply_markup = InlineKeyboardMarkup(keyboard)
+                keyboard = [
+                    [InlineKeyboardButton("ИП", callback_data="firm_type_ИП")],
+                    [InlineKeyboardButton("ФИЗ ЛИЦО", callback_data="firm_type_ФИЗ ЛИЦО")],
+                    [InlineKeyboardButton("ЮР ЛИЦО", callback_data="firm_type_ЮР ЛИЦО")],
+                    [InlineKeyboardButton("◀️ Назад", callback_data="main_menu")]
+                ]
+                reply_markup = InlineKeyboardMarkup(keyboard)
 
-            text = "От какого лица будет идти размещение:"
-            await query.edit_message_text(text, reply_markup=reply_markup)
-            self.db.update_user_state(update.effective_user.id, UserState.CHOOSING_FIRM_TYPE.value)
+                text = "От какого лица будет идти размещение:"
+                await query.edit_message_text(text, reply_markup=reply_markup)
+                work.state = UserState.CHOOSING_FIRM_TYPE.value
 
     async def process_firm_type(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
         """Обработка выбора типа фирмы"""
@@ -234,20 +251,19 @@ class UserHandlers:
 
         logger.info(f"Пользователь {user_id} выбрал тип фирмы: {firm_type}")
 
-        # Сохраняем тип фирмы в сессии
-        session_data = self.db.get_session_data(user_id)
-        session_data['firm_type'] = firm_type
-        self.db.save_session_data(user_id, session_data)
+        async with self.db.user_work(user_id) as work:
+            # Сохраняем тип фирмы в сессии
+            work.session_data['firm_type'] = firm_type
 
-        # Переходим к вводу названия фирмы
-        keyboard = [[InlineKeyboardButton("◀️ Назад", callback_data="back_to_firm_type")]]
-        reply_markup = InlineKeyboardMarkup(keyboard)
+            # Переходим к вводу названия фирмы
+            keyboard = [[InlineKeyboardButton("◀️ Назад", callback_data="back_to_firm_type")]]
+            reply_markup = InlineKeyboardMarkup(keyboard)
 
-        await query.edit_message_text(
-            "Введите название фирмы:",
-            reply_markup=reply_markup
-        )
-        self.db.update_user_state(user_id, UserState.ENTERING_FIRM_NAME.value)
+            await query.edit_message_text(
+                "Введите название фирмы:",
+                reply_markup=reply_markup
+            )
+            work.state = UserState.ENTERING_FIRM_NAME.value
 
     async def back_to_firm_type(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
         """Возврат к выбору типа фирмы"""
@@ -255,7 +271,7 @@ class UserHandlers:
         await query.answer()
 
         user_id = update.effective_user.id
-        session_data = self.db.get_session_data(user_id)
+        session_data = await self.db.get_session_data(user_id)
         pub_type = session_data.get('publication_type', 'advertisement')
 
         await self.choose_firm_type(update, context, pub_type)
@@ -267,221 +283,210 @@ class UserHandlers:
 
         logger.info(f"Обработка названия фирмы '{firm_name}' для пользователя {user_id}")
 
-        # Сохраняем название фирмы
-        session_data = self.db.get_session_data(user_id)
-        session_data['firm_name'] = firm_name
-        self.db.save_session_data(user_id, session_data)
+        async with self.db.user_work(user_id) as work:
+            # Сохраняем название фирмы
+            work.session_data['firm_name'] = firm_name
 
-        # Определяем следующий шаг в зависимости от типа публикации
-        pub_type = session_data.get('publication_type', 'advertisement')
+            # Определяем следующий шаг в зависимости от типа публикации
+            pub_type = work.session_data.get('publication_type', 'advertisement')
 
-        if pub_type == 'advertisement':
-            next_text = "Введите текст для объявления:"
-            next_state = UserState.ENTERING_AD_TEXT.value
-        elif pub_type == 'job_offer':
-            next_text = """Введите название вакансии/специальности на которую ищите специалиста:
+            if pub_type == 'advertisement':
+                next_text = "Введите текст для объявления:"
+                next_state = UserState.ENTERING_AD_TEXT.value
+            elif pub_type == 'job_offer':
+                next_text = """Введите название вакансии/специальности на которую ищите специалиста:
 Можете воспользоваться сервисом для просмотра наименований профессий https://окпдтр.рф/"""
-            next_state = UserState.ENTERING_JOB_TITLE.value
-        else:  # job_search
-            next_text = """Введите название вакансии/специальности на которую хотите устроиться:
+                next_state = UserState.ENTERING_JOB_TITLE.value
+            else:  # job_search
+                next_text = """Введите название вакансии/специальности на которую хотите устроиться:
 Можете воспользоваться сервисом для просмотра наименований профессий https://окпдтр.рф/"""
-            next_state = UserState.ENTERING_JOB_TITLE.value
+                next_state = UserState.ENTERING_JOB_TITLE.value
 
-        keyboard = [[InlineKeyboardButton("◀️ Начать заново", callback_data="back_to_firm_type")]]
-        reply_markup = InlineKeyboardMarkup(keyboard)
+            keyboard = [[InlineKeyboardButton("◀️ Начать заново", callback_data="back_to_firm_type")]]
+            reply_markup = InlineKeyboardMarkup(keyboard)
 
-        await update.message.reply_text(next_text, reply_markup=reply_markup)
-        self.db.update_user_state(user_id, next_state)
+            await update.message.reply_text(next_text, reply_markup=reply_markup)
+            work.state = next_state
 
     async def process_ad_text(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
         """Обработка текста рекламы"""
         user_id = update.effective_user.id
         ad_text = update.message.text
 
-        # Сохраняем текст рекламы
-        session_data = self.db.get_session_data(user_id)
-        session_data['ad_text'] = ad_text
-        self.db.save_session_data(user_id, session_data)
+        async with self.db.user_work(user_id) as work:
+            # Сохраняем текст рекламы
+            work.session_data['ad_text'] = ad_text
 
-        # Переходим к вводу контактов
-        keyboard = [
-            [KeyboardButton("📞 Поделиться вашим номером телефона", request_contact=True)],
-            [InlineKeyboardButton("◀️ Начать заново", callback_data="back_to_firm_type")]
-        ]
+            # Переходим к вводу контактов
+            keyboard = [
+                [KeyboardButton("📞 Поделиться вашим номером телефона", request_contact=True)],
+                [InlineKeyboardButton("◀️ Начать заново", callback_data="back_to_firm_type")]
+            ]
 
-        reply_markup = InlineKeyboardMarkup(keyboard[1:])  # Только инлайн кнопки для reply_markup
+            reply_markup = InlineKeyboardMarkup(keyboard[1:])  # Только инлайн кнопки для reply_markup
 
-        await update.message.reply_text(
-            "Укажите ваш(и) контакт(ы), либо нажмите на кнопку для автоматической отправки:",
-            reply_markup=reply_markup
-        )
+            await update.message.reply_text(
+                "Укажите ваш(и) контакт(ы), либо нажмите на кнопку для автоматической отправки:",
+                reply_markup=reply_markup
+            )
 
-        # Также отправляем клавиатуру с кнопкой контакта
-        contact_markup = ReplyKeyboardMarkup([[keyboard[0][0]]], one_time_keyboard=True, resize_keyboard=True)
-        await update.message.reply_text(
-            "Или нажмите кнопку ниже:",
-            reply_markup=contact_markup
-        )
+            # Также отправляем клавиатуру с кнопкой контакта
+            contact_markup = ReplyKeyboardMarkup([[keyboard[0][0]]], one_time_keyboard=True, resize_keyboard=True)
+            await update.message.reply_text(
+                "Или нажмите кнопку ниже:",
+                reply_markup=contact_markup
+            )
 
-        self.db.update_user_state(user_id, UserState.ENTERING_CONTACTS.value)
+            work.state = UserState.ENTERING_CONTACTS.value
 
     async def process_job_title(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
         """Обработка названия вакансии"""
         user_id = update.effective_user.id
         job_title = update.message.text
 
-        # Сохраняем название вакансии
-        session_data = self.db.get_session_data(user_id)
-        session_data['job_title'] = job_title
-        pub_type = session_data.get('publication_type')
-        self.db.save_session_data(user_id, session_data)
+        async with self.db.user_work(user_id) as work:
+            # Сохраняем название вакансии
+            work.session_data['job_title'] = job_title
+            pub_type = work.session_data.get('publication_type')
 
-        if pub_type == 'job_offer':
-            next_text = "Укажите требуемое количество работников по выбранной специальности:"
-            next_state = UserState.ENTERING_WORKER_COUNT.value
-        else:  # job_search
-            next_text = "На какой период требуется работа?"
-            next_state = UserState.ENTERING_WORK_PERIOD.value
+            if pub_type == 'job_offer':
+                next_text = "Укажите требуемое количество работников по выбранной специальности:"
+                next_state = UserState.ENTERING_WORKER_COUNT.value
+            else:  # job_search
+                next_text = "На какой период требуется работа?"
+                next_state = UserState.ENTERING_WORK_PERIOD.value
 
-        keyboard = [[InlineKeyboardButton("◀️ Начать заново", callback_data="back_to_firm_type")]]
-        reply_markup = InlineKeyboardMarkup(keyboard)
+            keyboard = [[InlineKeyboardButton("◀️ Начать заново", callback_data="back_to_firm_type")]]
+            reply_markup = InlineKeyboardMarkup(keyboard)
 
-        await update.message.reply_text(next_text, reply_markup=reply_markup)
-        self.db.update_user_state(user_id, next_state)
+            await update.message.reply_text(next_text, reply_markup=reply_markup)
+            work.state = next_state
 
     async def process_worker_count(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
         """Обработка количества работников"""
         user_id = update.effective_user.id
         worker_count = update.message.text
 
-        # Сохраняем количество работников
-        session_data = self.db.get_session_data(user_id)
-        session_data['worker_count'] = worker_count
-        self.db.save_session_data(user_id, session_data)
+        async with self.db.user_work(user_id) as work:
+            # Сохраняем количество работников
+            work.session_data['worker_count'] = worker_count
 
-        keyboard = [[InlineKeyboardButton("◀️ Начать заново", callback_data="back_to_firm_type")]]
-        reply_markup = InlineKeyboardMarkup(keyboard)
+            keyboard = [[InlineKeyboardButton("◀️ Начать заново", callback_data="back_to_firm_type")]]
+            reply_markup = InlineKeyboardMarkup(keyboard)
 
-        await update.message.reply_text(
-            "На какой период времени требуются сотрудники?",
-            reply_markup=reply_markup
-        )
-        self.db.update_user_state(user_id, UserState.ENTERING_WORK_PERIOD.value)
+            await update.message.reply_text(
+                "На какой период времени требуются сотрудники?",
+                reply_markup=reply_markup
+            )
+            work.state = UserState.ENTERING_WORK_PERIOD.value
 
     async def process_work_period(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
         """Обработка периода работы"""
         user_id = update.effective_user.id
         work_period = update.message.text
 
-        # Сохраняем период работы
-        session_data = self.db.get_session_data(user_id)
-        session_data['work_period'] = work_period
-        self.db.save_session_data(user_id, session_data)
+        async with self.db.user_work(user_id) as work:
+            # Сохраняем период работы
+            work.session_data['work_period'] = work_period
 
-        keyboard = [[InlineKeyboardButton("◀️ Начать заново", callback_data="back_to_firm_type")]]
-        reply_markup = InlineKeyboardMarkup(keyboard)
+            keyboard = [[InlineKeyboardButton("◀️ Начать заново", callback_data="back_to_firm_type")]]
+            reply_markup = InlineKeyboardMarkup(keyboard)
 
-        await update.message.reply_text(
-            "Опишите место работы, характер, условия:",
-            reply_markup=reply_markup
-        )
-        self.db.update_user_state(user_id, UserState.ENTERING_WORK_CONDITIONS.value)
+            await update.message.reply_text(
+                "Опишите место работы, характер, условия:",
+                reply_markup=reply_markup
+            )
+            work.state = UserState.ENTERING_WORK_CONDITIONS.value
 
     async def process_work_conditions(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
         """Обработка условий работы"""
         user_id = update.effective_user.id
         work_conditions = update.message.text
 
-        # Сохраняем условия работы
-        session_data = self.db.get_session_data(user_id)
-        session_data['work_conditions'] = work_conditions
-        pub_type = session_data.get('publication_type')
-        self.db.save_session_data(user_id, session_data)
+        async with self.db.user_work(user_id) as work:
+            # Сохраняем условия работы
+            work.session_data['work_conditions'] = work_conditions
+            pub_type = work.session_data.get('publication_type')
 
-        if pub_type == 'job_offer':
-            next_text = "Опишите требования к претендентам:"
-        else:  # job_search
-            next_text = "Опишите требования к работодателю:"
-        
-        keyboard = [[InlineKeyboardButton("◀️ Начать заново", callback_data="back_to_firm_type")]]
-        reply_markup = InlineKeyboardMarkup(keyboard)
+            if pub_type == 'job_offer':
+                next_text = "Опишите требования к претендентам:"
+            else:  # job_search
+                next_text = "Опишите требования к работодателю:"
+
+            keyboard = [[InlineKeyboardButton("◀️ Начать заново", callback_data="back_to_firm_type")]]
+            reply_markup = InlineKeyboardMarkup(keyboard)
 
-        await update.message.reply_text(next_text,reply_markup=reply_markup)
-        self.db.update_user_state(user_id, UserState.ENTERING_REQUIREMENTS.value)
+            await update.message.reply_text(next_text,reply_markup=reply_markup)
+            work.state = UserState.ENTERING_REQUIREMENTS.value
 
     async def process_requirements(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
         """Обработка требований"""
         user_id = update.effective_user.id
         requirements = update.message.text
 
-        # Сохраняем требования
-        session_data = self.db.get_session_data(user_id)
-        session_data['requirements'] = requirements
-        self.db.save_session_data(user_id, session_data)
+        async with self.db.user_work(user_id) as work:
+            # Сохраняем требования
+            work.session_data['requirements'] = requirements
 
-        keyboard = [[InlineKeyboardButton("◀️ Начать заново", callback_data="back_to_firm_type")]]
-        reply_markup = InlineKeyboardMarkup(keyboard)
+            keyboard = [[InlineKeyboardButton("◀️ Начать заново", callback_data="back_to_firm_type")]]
+            reply_markup = InlineKeyboardMarkup(keyboard)
 
-        await update.message.reply_text(
-            "Укажите размер зп и условия:",
-            reply_markup=reply_markup
-        )
-        self.db.update_user_state(user_id, UserState.ENTERING_SALARY.value)
+            await update.message.reply_text(
+                "Укажите размер зп и условия:",
+                reply_markup=reply_markup
+            )
+            work.state = UserState.ENTERING_SALARY.value
 
     async def process_salary(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
         """Обработка зарплаты"""
         user_id = update.effective_user.id
         salary = update.message.text
 
-        # Сохраняем зарплату
-        session_data = self.db.get_session_data(user_id)
-        session_data['salary'] = salary
-        self.db.save_session_data(user_id, session_data)
+        async with self.db.user_work(user_id) as work:
+            # Сохраняем зарплату
+            work.session_data['salary'] = salary
 
-        # Переходим к вводу контактов
-        keyboard = [
-            [KeyboardButton("📞 Поделиться вашим номером телефона", request_contact=True)],
-            [InlineKeyboardButton("◀️ Начать заново", callback_data="back_to_firm_type")]
-        ]
+            # Переходим к вводу контактов
+            keyboard = [
+                [KeyboardButton("📞 Поделиться вашим номером телефона", request_contact=True)],
+                [InlineKeyboardButton("◀️ Начать заново", callback_data="back_to_firm_type")]
+            ]
 
-        reply_markup = InlineKeyboardMarkup(keyboard[1:])
+            reply_markup = InlineKeyboardMarkup(keyboard[1:])
 
-        await update.message.reply_text(
-            "Укажите ваш(и) контакт(ы), либо нажмите на кнопку для автоматической отправки:",
-            reply_markup=reply_markup
-        )
+            await update.message.reply_text(
+                "Укажите ваш(и) контакт(ы), либо нажмите на кнопку для автоматической отправки:",
+                reply_markup=reply_markup
+            )
 
-        # Также отправляем клавиатуру с кнопкой контакта
-        contact_markup = ReplyKeyboardMarkup([[keyboard[0][0]]], one_time_keyboard=True, resize_keyboard=True)
-        await update.message.reply_text(
-            "Или нажмите кнопку ниже:",
-            reply_markup=contact_markup
-        )
+            # Также отправляем клавиатуру с кнопкой контакта
+            contact_markup = ReplyKeyboardMarkup([[keyboard[0][0]]], one_time_keyboard=True, resize_keyboard=True)
+            await update.message.reply_text(
+                "Или нажмите кнопку ниже:",
+                reply_markup=contact_markup
+            )
 
-        self.db.update_user_state(user_id, UserState.ENTERING_CONTACTS.value)
+            work.state = UserState.ENTERING_CONTACTS.value
 
     async def process_contacts(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
         """Обработка контактов"""
         user_id = update.effective_user.id
         contacts = update.message.text
 
-        # Сохраняем контакты
-        session_data = self.db.get_session_data(user_id)
-        session_data['contacts'] = contacts
-        self.db.save_session_data(user_id, session_data)
+        async with self.db.user_work(user_id) as work:
+            # Сохраняем контакты
+            work.session_data['contacts'] = contacts
 
-        await self.review_publication(update, context)
+            await self.review_publication(update, context, work)
 
-    async def review_publication(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
+    @with_user_work
+    async def review_publication(self, update: Update, context: ContextTypes.DEFAULT_TYPE, work=None):
         """Предварительный просмотр публикации"""
-        user_id = update.effective_user.id
-        session_data = self.db.get_session_data(user_id)
-
         # Форматируем текст публикации
-        publication_text = self.format_publication_text(session_data)
+        publication_text = self.format_publication_text(work.session_data)
 
         # Проверяем на стоп-слова
-        has_stop_words, stop_words = self.filter_service.check_text(publication_text)
+        has_stop_words, stop_words = await self.filter_service.check_text(publication_text)
 
         if has_stop_words:
             # Убираем клавиатуру с кнопкой контакта
@@ -516,7 +521,7 @@ class UserHandlers:
             reply_markup=reply_markup
         )
 
-        self.db.update_user_state(user_id, UserState.REVIEWING_POST.value)
+        work.state = UserState.REVIEWING_POST.value
 
     async def show_publication_options(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
         """Показать варианты публикации"""
@@ -536,13 +541,14 @@ class UserHandlers:
             reply_markup=reply_markup
         )
 
-    async def publish_immediately(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
+    @with_user_work
+    async def publish_immediately(self, update: Update, context: ContextTypes.DEFAULT_TYPE, work=None):
         """Опубликовать сразу"""
         query = update.callback_query
         await query.answer()
 
         user_id = update.effective_user.id
-        session_data = self.db.get_session_data(user_id)
+        session_data = work.session_data
 
         # Определяем стоимость ПРАВИЛЬНО в зависимости от типа публикации
         pub_type = session_data.get('publication_type', 'advertisement')
@@ -553,9 +559,10 @@ class UserHandlers:
 
         logger.info(f"Публикация типа {pub_type}, стоимость: {cost}")
 
-        # Проверяем баланс (если не админ)
-        if not self.db.is_user_admin(user_id):
-            if not self.db.check_balance(user_id, cost):
+        # Проверяем баланс и списываем деньги одним запросом (если не админ)
+        if not work.is_admin:
+            new_balance = await self.db.debit_if_sufficient(user_id, cost)
+            if new_balance is None:
                 await query.edit_message_text(
                     f"Недостаточно средств. Требуется: {cost} рублей",
                     reply_markup=InlineKeyboardMarkup([[
@@ -564,8 +571,7 @@ class UserHandlers:
                 )
                 return
 
-            # Списываем деньги
-            self.db.update_balance(user_id, -cost)
+            work.balance = new_balance
             logger.info(f"Списано {cost} рублей с баланса пользователя {user_id}")
 
         # Форматируем и публикуем
@@ -599,7 +605,7 @@ class UserHandlers:
                 )
 
             # Сохраняем в БД
-            publication_id = self.db.create_publication(
+            publication_id = await self.db.create_publication(
                 user_id=user_id,
                 pub_type=pub_type,
                 text=publication_text,
@@ -608,7 +614,7 @@ class UserHandlers:
                 firm_name=session_data.get('firm_name')
             )
 
-            self.db.update_publication_status(
+            await self.db.update_publication_status(
                 publication_id=publication_id,
                 status='published',
                 message_id=message.message_id
@@ -626,8 +632,8 @@ class UserHandlers:
             )
 
             # Очищаем сессию
-            self.db.clear_session_data(user_id)
-            self.db.update_user_state(user_id, UserState.IDLE.value)
+            work.clear_session()
+            work.state = UserState.IDLE.value
 
         except Exception as e:
             logger.error(f"Ошибка публикации: {e}")
@@ -639,12 +645,12 @@ class UserHandlers:
             )
 
     # АВТОПОСТИНГ - полная реализация согласно ТЗ
-    async def auto_posting(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
+    @with_user_work
+    async def auto_posting(self, update: Update, context: ContextTypes.DEFAULT_TYPE, work=None):
         """Автопостинг - выбор периодичности"""
         query = update.callback_query
 
-        user_id = update.effective_user.id
-        session_data = self.db.get_session_data(user_id)
+        session_data = work.session_data
         pub_type = session_data.get('publication_type', 'advertisement')
         await query.answer()
 
@@ -661,21 +667,19 @@ class UserHandlers:
             reply_markup=reply_markup
         )
 
-        user_id = update.effective_user.id
-        self.db.update_user_state(user_id, UserState.CHOOSING_AUTOPOST_FREQUENCY.value)
+        work.state = UserState.CHOOSING_AUTOPOST_FREQUENCY.value
 
-    async def process_frequency_choice(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
+    @with_user_work
+    async def process_frequency_choice(self, update: Update, context: ContextTypes.DEFAULT_TYPE, work=None):
         """Обработка выбора периодичности"""
         query = update.callback_query
         await query.answer()
 
-        user_id = update.effective_user.id
         frequency = query.data.split("_")[1]  # daily или weekly
 
         # Сохраняем частоту в сессии
-        session_data = self.db.get_session_data(user_id)
+        session_data = work.session_data
         session_data['autopost_frequency'] = frequency
-        self.db.save_session_data(user_id, session_data)
 
         if frequency == "weekly":
             # Показываем выбор дня недели
@@ -696,36 +700,35 @@ class UserHandlers:
                 f"Выберите день недели в который {typecal_text}:",
                 reply_markup=reply_markup
             )
-            self.db.update_user_state(user_id, UserState.CHOOSING_WEEKDAY.value)
+            work.state = UserState.CHOOSING_WEEKDAY.value
         else:
             # Для ежедневной публикации сразу переходим к вводу времени
-            await self.ask_for_time(query, context)
+            await self.ask_for_time(query, context, work)
 
-    async def process_weekday_choice(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
+    @with_user_work
+    async def process_weekday_choice(self, update: Update, context: ContextTypes.DEFAULT_TYPE, work=None):
         """Обработка выбора дня недели"""
         query = update.callback_query
         await query.answer()
 
-        user_id = update.effective_user.id
         weekday = int(query.data.split("_")[1])
 
         # Сохраняем день недели в сессии
-        session_data = self.db.get_session_data(user_id)
+        session_data = work.session_data
         session_data['autopost_weekday'] = weekday
-        self.db.save_session_data(user_id, session_data)
 
-        await self.ask_for_time(query, context)
+        await self.ask_for_time(query, context, work)
 
-    async def ask_for_time(self, query, context: ContextTypes.DEFAULT_TYPE):
+    @with_user_work
+    async def ask_for_time(self, query, context: ContextTypes.DEFAULT_TYPE, work=None):
         """Запрос времени для автопостинга"""
         keyboard = [[InlineKeyboardButton("◀️ Назад", callback_data="auto_posting")]]
         reply_markup = InlineKeyboardMarkup(keyboard)
 
 
-        user_id = query.from_user.id
-        self.db.update_user_state(user_id, UserState.ENTERING_TIME.value)
+        work.state = UserState.ENTERING_TIME.value
 
-        session_data = self.db.get_session_data(user_id)
+        session_data = work.session_data
         pub_type = session_data.get('publication_type', 'advertisement')
         typecal_text = "должно публиковаться рекламное объявление" if pub_type == 'advertisement' else "должно публиковаться объявление о работе"
 
@@ -736,7 +739,8 @@ class UserHandlers:
 
 
 
-    async def back_to_time_input(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
+    @with_user_work
+    async def back_to_time_input(self, update: Update, context: ContextTypes.DEFAULT_TYPE, work=None):
         """Возврат к вводу времени"""
         query = update.callback_query
         await query.answer()
@@ -744,10 +748,9 @@ class UserHandlers:
         keyboard = [[InlineKeyboardButton("◀️ Назад", callback_data="auto_posting")]]
         reply_markup = InlineKeyboardMarkup(keyboard)
 
-        user_id = update.effective_user.id
-        self.db.update_user_state(user_id, UserState.ENTERING_TIME.value)
+        work.state = UserState.ENTERING_TIME.value
 
-        session_data = self.db.get_session_data(user_id)
+        session_data = work.session_data
         pub_type = session_data.get('publication_type', 'advertisement')
         typecal_text = "должно публиковаться рекламное объявление" if pub_type == 'advertisement' else "должно публиковаться объявление о работе"
 
@@ -756,9 +759,9 @@ class UserHandlers:
             reply_markup=reply_markup
         )
 
-    async def process_time_input(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
+    @with_user_work
+    async def process_time_input(self, update: Update, context: ContextTypes.DEFAULT_TYPE, work=None):
         """Обработка ввода времени"""
-        user_id = update.effective_user.id
         time_text = update.message.text.strip()
 
         # Валидация времени
@@ -769,13 +772,12 @@ class UserHandlers:
             return
 
         # Сохраняем время в сессии
-        session_data = self.db.get_session_data(user_id)
+        session_data = work.session_data
         session_data['autopost_time'] = time_text
-        self.db.save_session_data(user_id, session_data)
 
         # Показываем информацию о ценах и запрашиваем количество повторений
         pub_type = session_data.get('publication_type', 'advertisement')
-        balance = self.db.get_user_balance(user_id)
+        balance = work.balance
 
         # Пробую подставить в текст Дней, недель и обьявление рекламу
         daynedel = session_data.get('autopost_frequency')
@@ -836,17 +838,17 @@ class UserHandlers:
         reply_markup = InlineKeyboardMarkup(keyboard)
 
         await update.message.reply_text(text, reply_markup=reply_markup)
-        self.db.update_user_state(user_id, UserState.ENTERING_REPETITIONS.value)
+        work.state = UserState.ENTERING_REPETITIONS.value
 
-    async def back_to_repetitions_input(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
+    @with_user_work
+    async def back_to_repetitions_input(self, update: Update, context: ContextTypes.DEFAULT_TYPE, work=None):
         """Возврат к вводу количества повторений"""
         query = update.callback_query
         await query.answer()
 
-        user_id = update.effective_user.id
-        session_data = self.db.get_session_data(user_id)
+        session_data = work.session_data
         pub_type = session_data.get('publication_type', 'advertisement')
-        balance = self.db.get_user_balance(user_id)
+        balance = work.balance
 
         # Пробую подставить в текст Дней, недель и обьявление рекламу
         daynedel = session_data.get('autopost_frequency')
@@ -907,11 +909,11 @@ class UserHandlers:
         reply_markup = InlineKeyboardMarkup(keyboard)
 
         await query.edit_message_text(text, reply_markup=reply_markup)
-        self.db.update_user_state(user_id, UserState.ENTERING_REPETITIONS.value)
+        work.state = UserState.ENTERING_REPETITIONS.value
 
-    async def process_repetitions_input(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
+    @with_user_work
+    async def process_repetitions_input(self, update: Update, context: ContextTypes.DEFAULT_TYPE, work=None):
         """Обработка ввода количества повторений"""
-        user_id = update.effective_user.id
         repetitions_text = update.message.text.strip()
 
         try:
@@ -924,7 +926,7 @@ class UserHandlers:
             )
             return
 
-        session_data = self.db.get_session_data(user_id)
+        session_data = work.session_data
         pub_type = session_data.get('publication_type', 'advertisement')
 
         # Рассчитываем стоимость с учетом пакетных скидок
@@ -940,9 +942,9 @@ class UserHandlers:
                 total_cost = base_price
 
         # Проверяем баланс (если не админ)
-        if not self.db.is_user_admin(user_id):
-            if not self.db.check_balance(user_id, total_cost):
-                balance = self.db.get_user_balance(user_id)
+        if not work.is_admin:
+            if work.balance < total_cost:
+                balance = work.balance
 
                 keyboard = [
                     [InlineKeyboardButton("Редактировать количество", callback_data="back_to_repetitions")],
@@ -961,14 +963,14 @@ class UserHandlers:
         # Сохраняем данные и планируем автопостинг
         session_data['autopost_repetitions'] = repetitions
         session_data['autopost_cost'] = total_cost
-        self.db.save_session_data(user_id, session_data)
 
-        await self.schedule_autopost(update, context)
+        await self.schedule_autopost(update, context, work)
 
-    async def schedule_autopost(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
+    @with_user_work
+    async def schedule_autopost(self, update: Update, context: ContextTypes.DEFAULT_TYPE, work=None):
         """Планирование автопостинга"""
         user_id = update.effective_user.id
-        session_data = self.db.get_session_data(user_id)
+        session_data = work.session_data
 
         frequency = session_data.get('autopost_frequency')
         time_str = session_data.get('autopost_time')
@@ -978,8 +980,20 @@ class UserHandlers:
         pub_type = session_data.get('publication_type', 'advertisement')
 
         # Списываем деньги (если не админ)
-        if not self.db.is_user_admin(user_id):
-            self.db.update_balance(user_id, -total_cost)
+        if not work.is_admin:
+            new_balance = await self.db.debit_if_sufficient(user_id, total_cost)
+            if new_balance is None:
+                keyboard = [
+                    [InlineKeyboardButton("Редактировать количество", callback_data="back_to_repetitions")],
+                    [InlineKeyboardButton("🛒 Магазин", callback_data="menu_магазин")]
+                ]
+                await update.message.reply_text(
+                    f"❌ Недостаточно средств. Требуется: {int(total_cost)} рублей",
+                    reply_markup=InlineKeyboardMarkup(keyboard)
+                )
+                return
+
+            work.balance = new_balance
             logger.info(f"Списано {total_cost} рублей за автопостинг с баланса пользователя {user_id}")
 
         # Планируем публикации через scheduler
@@ -1042,25 +1056,26 @@ class UserHandlers:
 
 
         # Очищаем сессию
-        self.db.clear_session_data(user_id)
-        self.db.update_user_state(user_id, UserState.IDLE.value)
+        work.clear_session()
+        work.state = UserState.IDLE.value
 
     # ОТЛОЖЕННАЯ ПУБЛИКАЦИЯ - полная реализация согласно ТЗ
-    async def delayed_publication(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
+    @with_user_work
+    async def delayed_publication(self, update: Update, context: ContextTypes.DEFAULT_TYPE, work=None):
         """Отложенная публикация - управление слотами"""
         query = update.callback_query
         await query.answer()
 
         user_id = update.effective_user.id
-        session_data = self.db.get_session_data(user_id)
+        session_data = work.session_data
         pub_type = session_data.get('publication_type', 'advertisement')
-        balance = self.db.get_user_balance(user_id)
+        balance = work.balance
 
         logger.info(f"Отложенная публикация для пользователя {user_id}, тип: {pub_type}, баланс: {balance}")
 
         # ИСПРАВЛЕНО: Правильные требования к балансу согласно ТЗ
         available_slots = []
-        if self.db.is_user_admin(user_id):
+        if work.is_admin:
             available_slots = [1, 2, 3]
             logger.info(f"Пользователь {user_id} - админ, доступны все слоты")
         else:
@@ -1105,9 +1120,10 @@ class UserHandlers:
             reply_markup=reply_markup
         )
 
-        self.db.update_user_state(user_id, UserState.CHOOSING_DELAYED_SLOT.value)
+        work.state = UserState.CHOOSING_DELAYED_SLOT.value
 
-    async def process_delayed_slot_choice(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
+    @with_user_work
+    async def process_delayed_slot_choice(self, update: Update, context: ContextTypes.DEFAULT_TYPE, work=None):
         """Обработка выбора слота для отложенной публикации"""
         query = update.callback_query
         await query.answer()
@@ -1118,9 +1134,8 @@ class UserHandlers:
         logger.info(f"Пользователь {user_id} выбрал слот {slot_num}")
 
         # Сохраняем номер выбранного слота
-        session_data = self.db.get_session_data(user_id)
+        session_data = work.session_data
         session_data['current_delayed_slot'] = slot_num
-        self.db.save_session_data(user_id, session_data)
 
         # Проверяем, есть ли уже время в этом слоте
         delayed_slots = session_data.get('delayed_slots', {})
@@ -1141,9 +1156,10 @@ class UserHandlers:
             reply_markup=reply_markup
         )
 
-        self.db.update_user_state(user_id, UserState.ENTERING_DELAYED_DATETIME.value)
+        work.state = UserState.ENTERING_DELAYED_DATETIME.value
 
-    async def process_delayed_datetime_input(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
+    @with_user_work
+    async def process_delayed_datetime_input(self, update: Update, context: ContextTypes.DEFAULT_TYPE, work=None):
         """ИСПРАВЛЕНО: Обработка ввода даты и времени для отложенной публикации"""
         user_id = update.effective_user.id
         datetime_text = update.message.text.strip()
@@ -1197,27 +1213,26 @@ class UserHandlers:
             return
 
         # Сохраняем время в соответствующий слот
-        session_data = self.db.get_session_data(user_id)
+        session_data = work.session_data
         slot_num = session_data.get('current_delayed_slot', 1)
 
         if 'delayed_slots' not in session_data:
             session_data['delayed_slots'] = {}
 
         session_data['delayed_slots'][f'slot_{slot_num}'] = datetime_text
-        self.db.save_session_data(user_id, session_data)
 
         logger.info(f"Время {datetime_text} сохранено в слот {slot_num}")
 
         # Возвращаемся к выбору слотов
-        await self.delayed_publication(update, context)
+        await self.delayed_publication(update, context, work)
 
-    async def retry_datetime_input(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
+    @with_user_work
+    async def retry_datetime_input(self, update: Update, context: ContextTypes.DEFAULT_TYPE, work=None):
         """ИСПРАВЛЕНО: Повторный ввод даты и времени"""
         query = update.callback_query
         await query.answer()
 
-        user_id = update.effective_user.id
-        session_data = self.db.get_session_data(user_id)
+        session_data = work.session_data
         slot_num = session_data.get('current_delayed_slot', 1)
 
         keyboard = [
@@ -1231,35 +1246,35 @@ class UserHandlers:
             reply_markup=reply_markup
         )
 
-        self.db.update_user_state(user_id, UserState.ENTERING_DELAYED_DATETIME.value)
+        work.state = UserState.ENTERING_DELAYED_DATETIME.value
 
-    async def remove_delayed_slot(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
+    @with_user_work
+    async def remove_delayed_slot(self, update: Update, context: ContextTypes.DEFAULT_TYPE, work=None):
         """Удаление времени из слота отложенной публикации"""
         query = update.callback_query
         await query.answer()
 
-        user_id = update.effective_user.id
         slot_num = int(query.data.split("_")[-1])
 
         # Удаляем время из слота
-        session_data = self.db.get_session_data(user_id)
+        session_data = work.session_data
         delayed_slots = session_data.get('delayed_slots', {})
 
         if f'slot_{slot_num}' in delayed_slots:
             del delayed_slots[f'slot_{slot_num}']
             session_data['delayed_slots'] = delayed_slots
-            self.db.save_session_data(user_id, session_data)
 
         # Возвращаемся к выбору слотов
-        await self.delayed_publication(update, context)
+        await self.delayed_publication(update, context, work)
 
-    async def confirm_delayed_publication(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
+    @with_user_work
+    async def confirm_delayed_publication(self, update: Update, context: ContextTypes.DEFAULT_TYPE, work=None):
         """ИСПРАВЛЕНО: Подтверждение и выполнение отложенной публикации"""
         query = update.callback_query
         await query.answer()
 
         user_id = update.effective_user.id
-        session_data = self.db.get_session_data(user_id)
+        session_data = work.session_data
         pub_type = session_data.get('publication_type', 'advertisement')
         delayed_slots = session_data.get('delayed_slots', {})
 
@@ -1293,9 +1308,10 @@ class UserHandlers:
 
         logger.info(f"Стоимость отложенной публикации: {cost} за {num_slots} слотов")
 
-        # Проверяем баланс (если не админ)
-        if not self.db.is_user_admin(user_id):
-            if not self.db.check_balance(user_id, cost):
+        # Проверяем баланс и списываем деньги одним запросом (если не админ)
+        if not work.is_admin:
+            new_balance = await self.db.debit_if_sufficient(user_id, cost)
+            if new_balance is None:
                 await query.edit_message_text(
                     f"❌ Недостаточно средств. Требуется: {cost} рублей",
                     reply_markup=InlineKeyboardMarkup([[
@@ -1304,8 +1320,7 @@ class UserHandlers:
                 )
                 return
 
-            # Списываем деньги
-            self.db.update_balance(user_id, -cost)
+            work.balance = new_balance
             logger.info(f"Списано {cost} рублей за отложенную публикацию с баланса пользователя {user_id}")
 
         # Планируем публикации
@@ -1350,8 +1365,8 @@ class UserHandlers:
         )
 
         # Очищаем сессию
-        self.db.clear_session_data(user_id)
-        self.db.update_user_state(user_id, UserState.IDLE.value)
+        work.clear_session()
+        work.state = UserState.IDLE.value
 
     # Дополнительные методы обработки ошибок
     async def handle_insufficient_balance(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
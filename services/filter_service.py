@@ -1,20 +1,92 @@
-import re
+import asyncio
+import functools
 import logging
+import time
 from datetime import datetime, timedelta
-from typing import List, Tuple, Dict, Any, Optional
+from typing import List, Tuple, Dict, Any, Optional, Union, Iterable
 
-from database.db_manager import DatabaseManager
+from database.async_db_manager import AsyncDatabaseManager
+from services.aho_corasick import AhoCorasick
+from services.fuzzy_index import FuzzyIndex
+from services.stemmer import StemIndex
+from services.text_normalizer import normalize_text
 
 logger = logging.getLogger(__name__)
 
+# Режимы проверки: подстрока (автомат Ахо-Корасик), совпадение основ слов (стеммер)
+# или подстрока плюс слова с опечатками (индекс удалений)
+MODE_SUBSTRING = 'substring'
+MODE_STEM = 'stem'
+MODE_FUZZY = 'fuzzy'
+MATCHERS = {
+    MODE_SUBSTRING: AhoCorasick,
+    MODE_STEM: StemIndex,
+    MODE_FUZZY: FuzzyIndex,
+}
+# Допустимое число опечаток в режиме fuzzy
+FUZZY_DISTANCES = (1, 2)
+
+# Пересканирование запланированных публикаций: размер пачки из БД и число публикаций в отчете
+RESCAN_CHUNK_SIZE = 1000
+RESCAN_REPORT_LIMIT = 50
+# Пакетная проверка: кэши слов и целых текстов (повторы одной публикации) очищаются при переполнении
+TOKEN_CACHE_SIZE = 200000
+TEXT_CACHE_SIZE = 1000
+
 
 class StopWordsFilter:
     """Сервис фильтрации стоп-слов"""
 
-    def __init__(self, db_manager: DatabaseManager):
+    def __init__(self, db_manager: AsyncDatabaseManager, mode: str = MODE_SUBSTRING, max_distance: int = 1):
+        if mode not in MATCHERS:
+            raise ValueError(f"Неизвестный режим проверки стоп-слов: {mode}")
+        if max_distance not in FUZZY_DISTANCES:
+            raise ValueError(f"Допустимое число опечаток - 1 или 2, получено: {max_distance}")
         self.db = db_manager
+        self.mode = mode
+        self.max_distance = max_distance
+        self._build_matcher = (functools.partial(FuzzyIndex, max_distance=max_distance)
+                               if mode == MODE_FUZZY else MATCHERS[mode])
+        # Автомат (или индекс основ) по списку стоп-слов и версия списка (stats_counters), по которой он построен.
+        # На проверку - одно чтение версии по ключу; список перечитывается только после изменения,
+        # в том числе сделанного другим процессом бота
+        self._matcher: Optional[Union[AhoCorasick, FuzzyIndex, StemIndex]] = None
+        # Стоп-слова в том виде, в каком их ввел администратор, по индексу слова в автомате
+        self._labels: List[str] = []
+        self._matcher_version: Optional[int] = None
+        self._matcher_lock = asyncio.Lock()
 
-    def check_text(self, text: str) -> Tuple[bool, List[str]]:
+    async def _get_matcher(self) -> Tuple[Union[AhoCorasick, FuzzyIndex, StemIndex], List[str]]:
+        """
+        Автомат стоп-слов и исходные слова по его индексам; перестраивается,
+        только если список изменился
+        """
+        version = await self.db.get_stop_words_version()
+        if self._matcher is not None and self._matcher_version == version:
+            return self._matcher, self._labels
+
+        async with self._matcher_lock:
+            if self._matcher is None or self._matcher_version != version:
+                version, words = await self.db.get_stop_words_snapshot()
+                # В БД слова хранятся как введены (их и видит администратор в списке и
+                # отчетах), поэтому нормализуются здесь - один раз на построение автомата,
+                # а не при каждой проверке. Несколько слов с одной нормальной формой
+                # показываются первым из них. Слова, нормальная форма которых схлопнулась
+                # до одной буквы ("ххх" -> "х"), пропускаются: они совпали бы с любым текстом
+                originals: Dict[str, str] = {}
+                for word in words:
+                    normalized = normalize_text(word)
+                    if len(normalized) > 1:
+                        originals.setdefault(normalized, word)
+                # Построение на десятках тысяч слов занимает секунды - вне event loop
+                matcher = await asyncio.to_thread(self._build_matcher, list(originals))
+                self._labels = [originals[pattern] for pattern in matcher.patterns]
+                self._matcher = matcher
+                self._matcher_version = version
+                logger.info(f"Автомат стоп-слов ({self.mode}) построен: {len(matcher)} слов")
+        return self._matcher, self._labels
+
+    async def check_text(self, text: str) -> Tuple[bool, List[str]]:
         """
         Проверить текст на наличие стоп-слов
         Args:
@@ -23,13 +95,135 @@ class StopWordsFilter:
             Tuple[bool, List[str]]: (содержит_стоп_слова, список_найденных_слов)
         """
         try:
-            found_words = self.db.check_text_for_stop_words(text)
+            matcher, labels = await self._get_matcher()
+            found_words = [labels[index] for index in matcher.find_indexes(normalize_text(text))]
             return bool(found_words), found_words
         except Exception as e:
             logger.error(f"Ошибка проверки стоп-слов: {e}")
             return False, []
 
-    def add_stop_words(self, words: List[str], added_by: int) -> bool:
+    async def check_many(self, texts: Iterable[str]) -> List[List[str]]:
+        """
+        Проверить пачку текстов одним автоматом
+        Args:
+            texts: Тексты для проверки
+        Returns:
+            List[List[str]]: Найденные стоп-слова для каждого текста (в том же порядке)
+        """
+        matcher, labels = await self._get_matcher()
+        return self._match_many(matcher, labels, texts, {}, {})
+
+    @staticmethod
+    def _match_many(matcher: Union[AhoCorasick, FuzzyIndex, StemIndex], labels: List[str],
+                    texts: Iterable[str], token_cache: Dict[str, Tuple[str, List[int]]],
+                    text_cache: Dict[str, List[str]]) -> List[List[str]]:
+        """
+        Найденные стоп-слова для каждого текста (результат тот же, что у check_text)
+
+        Нормализация не выходит за границы слов, а слово без пробелов входит
+        в текст, только если входит в одно из его слов. Поэтому каждое
+        различное слово пачки нормализуется и проходит автомат один раз
+        (token_cache: исходное слово -> (нормализованное, индексы)), фразы
+        ищутся подстрокой в собранном нормализованном тексте, а повторы
+        целых текстов берутся из text_cache. Опечатки FuzzyIndex тоже ищутся
+        в пределах одного слова, так что кэш слов точен и для него.
+        """
+        if not isinstance(matcher, AhoCorasick):
+            # Индекс основ кэширует основы сам
+            return [[labels[index] for index in matcher.find_indexes(normalize_text(text))]
+                    for text in texts]
+
+        phrases = matcher.phrases
+        results = []
+        for text in texts:
+            found_words = text_cache.get(text)
+            if found_words is None:
+                found = set()
+                normalized = []
+                tokens = text.split()
+                # Без фраз порядок слов не нужен - каждое слово текста проверяется один раз
+                for token in (tokens if phrases else set(tokens)):
+                    entry = token_cache.get(token)
+                    if entry is None:
+                        if len(token_cache) >= TOKEN_CACHE_SIZE:
+                            token_cache.clear()
+                        clean = normalize_text(token)
+                        entry = token_cache[token] = (clean, matcher.find_indexes(clean))
+                    if entry[1]:
+                        found.update(entry[1])
+                    if phrases:
+                        normalized.append(entry[0])
+                if phrases:
+                    normalized_text = ' '.join(filter(None, normalized))
+                    found.update(index for index, phrase in phrases if phrase in normalized_text)
+                found_words = [labels[index] for index in sorted(found)]
+                if len(text_cache) >= TEXT_CACHE_SIZE:
+                    text_cache.clear()
+                text_cache[text] = found_words
+            results.append(found_words)
+        return results
+
+    async def rescan_scheduled_publications(self, chunk_size: int = RESCAN_CHUNK_SIZE,
+                                            report_limit: int = RESCAN_REPORT_LIMIT) -> Dict[str, Any]:
+        """
+        Проверить запланированные публикации по текущему списку стоп-слов
+
+        Публикации читаются пачками по chunk_size (keyset по id), поэтому память
+        ограничена пачкой и отчетом. Весь проход идет по одному автомату, даже
+        если список изменится во время проверки.
+        Args:
+            chunk_size: Размер пачки из БД
+            report_limit: Сколько найденных публикаций включить в отчет
+        Returns:
+            Dict[str, Any]: scanned, flagged, publications (id, user_id, type, words),
+            words (стоп-слово -> число публикаций), version, elapsed_ms
+        """
+        started = time.perf_counter()
+        matcher, labels = await self._get_matcher()
+        version = self._matcher_version
+        token_cache: Dict[str, Tuple[str, List[int]]] = {}
+        text_cache: Dict[str, List[str]] = {}
+        scanned = flagged = 0
+        publications = []
+        word_counts: Dict[str, int] = {}
+
+        after_id = 0
+        while True:
+            rows = await self.db.get_scheduled_publications_chunk(after_id, chunk_size)
+            if not rows:
+                break
+            after_id = rows[-1][0]
+            found_lists = self._match_many(matcher, labels, (row[3] for row in rows), token_cache, text_cache)
+            for (publication_id, user_id, pub_type, _), found in zip(rows, found_lists):
+                if not found:
+                    continue
+                flagged += 1
+                for word in found:
+                    word_counts[word] = word_counts.get(word, 0) + 1
+                if len(publications) < report_limit:
+                    publications.append({
+                        'publication_id': publication_id,
+                        'user_id': user_id,
+                        'type': pub_type,
+                        'words': found,
+                    })
+            scanned += len(rows)
+            # Между пачками event loop обрабатывает другие обновления
+            await asyncio.sleep(0)
+
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        logger.info(f"Пересканировано {scanned} запланированных публикаций за {elapsed_ms:.0f} мс, "
+                    f"со стоп-словами: {flagged}")
+        return {
+            'scanned': scanned,
+            'flagged': flagged,
+            'publications': publications,
+            'words': dict(sorted(word_counts.items(), key=lambda item: -item[1])),
+            'version': version,
+            'elapsed_ms': elapsed_ms,
+        }
+
+    async def add_stop_words(self, words: List[str], added_by: int) -> bool:
         """
         Добавить стоп-слова в систему
         Args:
@@ -39,53 +233,48 @@ class StopWordsFilter:
             bool: Успешность операции
         """
         try:
-            # Очищаем и нормализуем слова
-            clean_words = []
-            for word in words:
-                clean_word = self._normalize_word(word)
-                if clean_word and len(clean_word) > 1:
-                    clean_words.append(clean_word)
+            clean_words = self.clean_words(words)
 
             if clean_words:
-                self.db.add_stop_words(clean_words, added_by)
-                logger.info(f"Добавлено {len(clean_words)} стоп-слов пользователем {added_by}")
+                result = await self.db.add_stop_words(clean_words, added_by)
+                logger.info(f"Добавлено {result['added']} стоп-слов пользователем {added_by}, "
+                            f"пропущено {result['skipped']}")
                 return True
             return False
         except Exception as e:
             logger.error(f"Ошибка добавления стоп-слов: {e}")
             return False
 
-    def get_all_stop_words(self) -> List[str]:
+    async def get_all_stop_words(self) -> List[str]:
         """Получить все стоп-слова"""
         try:
-            return self.db.get_all_stop_words()
+            return await self.db.get_all_stop_words()
         except Exception as e:
             logger.error(f"Ошибка получения стоп-слов: {e}")
             return []
 
-    def clear_all_stop_words(self) -> bool:
+    async def clear_all_stop_words(self) -> bool:
         """Очистить все стоп-слова"""
         try:
-            self.db.clear_stop_words()
+            await self.db.clear_stop_words()
             logger.info("Все стоп-слова очищены")
             return True
         except Exception as e:
             logger.error(f"Ошибка очистки стоп-слов: {e}")
             return False
 
-    def _normalize_word(self, word: str) -> str:
+    @staticmethod
+    def clean_words(words: List[str]) -> List[str]:
         """
-        Нормализовать слово для поиска
+        Отобрать стоп-слова для добавления
         Args:
-            word: Исходное слово
+            words: Исходные слова
         Returns:
-            str: Нормализованное слово
+            List[str]: Слова как введены (без пробелов по краям), нормальная форма
+            которых длиннее одного символа. Нормализуются они при построении автомата
         """
-        # Убираем пробелы и приводим к нижнему регистру
-        normalized = word.strip().lower()
-        # Убираем знаки препинания в начале и конце
-        normalized = re.sub(r'^[^\w\s]+|[^\w\s]+$', '', normalized)
-        return normalized
+        stripped = (word.strip() for word in words)
+        return [word for word in stripped if len(normalize_text(word)) > 1]
 
     def check_word_variants(self, text: str, stop_word: str) -> bool:
         """
@@ -96,31 +285,20 @@ class StopWordsFilter:
         Returns:
             bool: Найдено ли слово или его варианты
         """
-        text_lower = text.lower()
-        stop_word_lower = stop_word.lower()
+        text_lower = normalize_text(text)
+        stop_word_lower = normalize_text(stop_word)
 
         # Прямое вхождение
         if stop_word_lower in text_lower:
             return True
 
-        # Проверка с учетом границ слов
-        word_pattern = r'\b' + re.escape(stop_word_lower) + r'\b'
-        if re.search(word_pattern, text_lower):
-            return True
-
-        # Проверка вариантов с разными окончаниями (для русского языка)
-        if len(stop_word_lower) > 3:
-            root = stop_word_lower[:-2]  # Убираем последние 2 символа
-            root_pattern = r'\b' + re.escape(root) + r'\w*\b'
-            if re.search(root_pattern, text_lower):
-                return True
-
-        return False
+        # Другие формы слова: совпадение основ (без компиляции регулярных выражений на вызов)
+        return bool(StemIndex([stop_word_lower]).find_indexes(text_lower))
 
-    def get_statistics(self) -> dict:
+    async def get_statistics(self) -> dict:
         """Получить статистику по стоп-словам"""
         try:
-            stop_words = self.get_all_stop_words()
+            stop_words = await self.get_all_stop_words()
             return {
                 'total_words': len(stop_words),
                 'words': stop_words
@@ -0,0 +1,110 @@
+import re
+from typing import Dict, Iterable, List, Set
+
+from services.aho_corasick import AhoCorasick
+
+# Допустимое число опечаток зависит от длины стоп-слова: короткие слова ищутся
+# только точно, иначе "кот" совпадал бы с "кит", "код" и "кол"
+EXACT_MAX_LENGTH = 4
+ONE_TYPO_MAX_LENGTH = 8
+# Более длинные слова текста нечетко не проверяются: число удалений растет как длина^2
+MAX_TOKEN_LENGTH = 32
+# Слова текста для нечеткого поиска: знаки препинания по краям слова не входят
+TOKEN = re.compile(r'\w+')
+
+
+def allowed_distance(word: str, max_distance: int) -> int:
+    """Допустимое расстояние для стоп-слова с учетом его длины"""
+    if len(word) <= EXACT_MAX_LENGTH:
+        return 0
+    if len(word) <= ONE_TYPO_MAX_LENGTH:
+        return min(1, max_distance)
+    return max_distance
+
+
+def deletes(word: str, distance: int) -> Set[str]:
+    """Строки, получаемые из word удалением не более distance символов (включая само слово)"""
+    result = {word}
+    frontier = {word}
+    for _ in range(distance):
+        frontier = {variant[:i] + variant[i + 1:] for variant in frontier for i in range(len(variant))}
+        result |= frontier
+    return result
+
+
+def edit_distance(a: str, b: str, limit: int) -> int:
+    """
+    Расстояние Дамерау-Левенштейна (вставка, удаление, замена, перестановка
+    соседних символов); если оно больше limit, возвращается limit + 1
+    """
+    if abs(len(a) - len(b)) > limit:
+        return limit + 1
+    previous2: List[int] = []
+    previous = list(range(len(b) + 1))
+    for i in range(1, len(a) + 1):
+        current = [i] + [0] * len(b)
+        char_a = a[i - 1]
+        for j in range(1, len(b) + 1):
+            cost = 0 if char_a == b[j - 1] else 1
+            value = min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + cost)
+            if i > 1 and j > 1 and char_a == b[j - 2] and a[i - 2] == b[j - 1]:
+                value = min(value, previous2[j - 2] + 1)
+            current[j] = value
+        # Строка таблицы не убывает дальше своего минимума - можно остановиться
+        if min(current) > limit:
+            return limit + 1
+        previous2, previous = previous, current
+    return min(previous[-1], limit + 1)
+
+
+class FuzzyIndex(AhoCorasick):
+    """
+    Стоп-слова с опечатками: автомат Ахо-Корасик плюс индекс удалений
+    (symmetric delete).
+
+    Точные вхождения по-прежнему ищет автомат. Для нечеткого поиска каждое
+    стоп-слово без пробелов хранится под всеми строками, получаемыми
+    удалением до d символов; слово текста дает такие же строки, и общий
+    ключ находит кандидатов, которые проверяются точным расстоянием
+    Дамерау-Левенштейна. Фразы из нескольких слов ищутся только точно.
+    """
+
+    def __init__(self, patterns: Iterable[str], max_distance: int = 1):
+        super().__init__(patterns)
+        self.max_distance = max_distance
+        self._distances: List[int] = []
+        deletes_index: Dict[str, List[int]] = {}
+        for index, pattern in enumerate(self.patterns):
+            distance = allowed_distance(pattern, max_distance) if ' ' not in pattern else 0
+            self._distances.append(distance)
+            if not distance:
+                continue
+            for variant in deletes(pattern, distance):
+                deletes_index.setdefault(variant, []).append(index)
+        self._deletes = deletes_index
+        # Слово текста короче не может быть в пределах опечаток ни от одного стоп-слова
+        self._min_token_length = EXACT_MAX_LENGTH + 1 - max_distance
+
+    def find_token(self, token: str) -> List[int]:
+        """Индексы стоп-слов в пределах допустимого расстояния от слова текста"""
+        if not self._deletes or not self._min_token_length <= len(token) <= MAX_TOKEN_LENGTH:
+            return []
+        deletes_index = self._deletes
+        candidates = set()
+        for variant in deletes(token, self.max_distance):
+            matched = deletes_index.get(variant)
+            if matched:
+                candidates.update(matched)
+        patterns, distances = self.patterns, self._distances
+        return [
+            index for index in candidates
+            if edit_distance(token, patterns[index], distances[index]) <= distances[index]
+        ]
+
+    def find_indexes(self, text: str) -> List[int]:
+        """Индексы найденных слов (точные вхождения и слова с опечатками, по возрастанию)"""
+        found = set(super().find_indexes(text))
+        if self._deletes:
+            for token in set(TOKEN.findall(text)):
+                found.update(self.find_token(token))
+        return sorted(found)
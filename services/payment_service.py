@@ -2,7 +2,7 @@ from typing import Optional, Dict, Any
 import logging
 from decimal import Decimal
 
-from database.db_manager import DatabaseManager
+from database.async_db_manager import AsyncDatabaseManager
 from config.settings import PACKAGE_PRICING
 
 logger = logging.getLogger(__name__)
@@ -11,7 +11,7 @@ logger = logging.getLogger(__name__)
 class PaymentService:
     """Сервис для обработки платежей"""
 
-    def __init__(self, db_manager: DatabaseManager):
+    def __init__(self, db_manager: AsyncDatabaseManager):
         self.db = db_manager
 
     def calculate_cost(self, service_type: str, quantity: int) -> float:
@@ -34,21 +34,18 @@ class PaymentService:
 
         return base_price * quantity
 
-    def check_balance(self, user_id: int, required_amount: float) -> bool:
+    async def check_balance(self, user_id: int, required_amount: float) -> bool:
         """Проверить достаточность средств на балансе"""
-        return self.db.check_balance(user_id, required_amount)
+        return await self.db.check_balance(user_id, required_amount)
 
-    def process_payment(self, user_id: int, amount: float, description: str = None) -> bool:
+    async def process_payment(self, user_id: int, amount: float, description: str = None) -> bool:
         """Обработать платеж (списание с баланса)"""
         try:
-            if self.check_balance(user_id, amount):
-                success = self.db.update_balance(user_id, -amount)
-                if success:
-                    logger.info(f"Списано {amount} рублей с баланса пользователя {user_id}")
-                    return True
-                else:
-                    logger.error(f"Ошибка списания {amount} рублей с баланса пользователя {user_id}")
-                    return False
+            # Проверка и списание - одна запись журнала баланса (INSERT ... SELECT с условием на остаток)
+            new_balance = await self.db.debit_if_sufficient(user_id, amount)
+            if new_balance is not None:
+                logger.info(f"Списано {amount} рублей с баланса пользователя {user_id}")
+                return True
             else:
                 logger.warning(f"Недостаточно средств у пользователя {user_id} для списания {amount}")
                 return False
@@ -56,10 +53,10 @@ class PaymentService:
             logger.error(f"Ошибка обработки платежа для пользователя {user_id}: {e}")
             return False
 
-    def add_funds(self, user_id: int, amount: float) -> bool:
+    async def add_funds(self, user_id: int, amount: float) -> bool:
         """Пополнить баланс пользователя"""
         try:
-            success = self.db.update_balance(user_id, amount)
+            success = await self.db.update_balance(user_id, amount)
             if success:
                 logger.info(f"Пополнен баланс пользователя {user_id} на {amount} рублей")
                 return True
@@ -70,9 +67,9 @@ class PaymentService:
             logger.error(f"Ошибка пополнения баланса для пользователя {user_id}: {e}")
             return False
 
-    def get_balance(self, user_id: int) -> float:
+    async def get_balance(self, user_id: int) -> float:
         """Получить текущий баланс пользователя"""
-        return self.db.get_user_balance(user_id)
+        return await self.db.get_user_balance(user_id)
 
     def validate_payment_amount(self, amount: float) -> bool:
         """Валидация суммы платежа"""
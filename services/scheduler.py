@@ -1,12 +1,15 @@
+from apscheduler.events import EVENT_JOB_REMOVED, JobEvent
 from apscheduler.schedulers.asyncio import AsyncIOScheduler
 from apscheduler.triggers.date import DateTrigger
 from apscheduler.triggers.cron import CronTrigger
-from datetime import datetime, timedelta
+from apscheduler.triggers.interval import IntervalTrigger
+from datetime import datetime
+import asyncio
 import logging
-from typing import Optional
+from typing import Dict, List, Optional, Set, Tuple
 import pytz
 import os
-from database.db_manager import DatabaseManager
+from database.async_db_manager import AsyncDatabaseManager
 
 logger = logging.getLogger(__name__)
 
@@ -14,11 +17,17 @@ logger = logging.getLogger(__name__)
 class PublicationScheduler:
     """Планировщик для автоматических публикаций"""
 
-    def __init__(self, db_manager: DatabaseManager, bot, group_id: int):
+    def __init__(self, db_manager: AsyncDatabaseManager, bot, group_id: int):
         self.db = db_manager
         self.bot = bot
         self.group_id = group_id
+        # Неопубликованные повторы задач автопостинга: (ID публикации, ID запланированной публикации).
+        # Когда задача завершается (в том числе с пропущенными срабатываниями) или отменяется,
+        # остаток снимается в БД
+        self._recurring_occurrences: Dict[str, List[Tuple[int, int]]] = {}
+        self._expire_tasks: Set[asyncio.Task] = set()
         self.scheduler = AsyncIOScheduler()
+        self.scheduler.add_listener(self._on_job_removed, EVENT_JOB_REMOVED)
         self.scheduler.start()
         logger.info("Планировщик публикаций запущен")
 
@@ -64,7 +73,7 @@ class PublicationScheduler:
             job_id = f"single_{user_id}_{int(scheduled_time.timestamp())}"
 
             # Сохраняем публикацию в БД
-            publication_id = self.db.create_publication(
+            publication_id = await self.db.create_publication(
                 user_id=user_id,
                 pub_type=pub_type,
                 text=text,
@@ -112,44 +121,40 @@ class PublicationScheduler:
             # Парсим время
             hour, minute = map(int, time_str.split(':'))
 
-            # Определяем триггер в зависимости от частоты
+            # Определяем расписание в зависимости от частоты
             if frequency == "daily":
-                trigger = CronTrigger(hour=hour, minute=minute)
-                # Для ежедневной публикации рассчитываем, сколько дней публиковать
-                end_date = datetime.now() + timedelta(days=repetitions)
+                cron_fields = {'hour': hour, 'minute': minute}
             elif frequency == "weekly" and day_of_week is not None:
-                trigger = CronTrigger(day_of_week=day_of_week, hour=hour, minute=minute)
-                # Для еженедельной публикации рассчитываем дату окончания
-                # Например, для 4 повторений публикуем 4 недели
-                end_date = datetime.now() + timedelta(weeks=repetitions)
+                cron_fields = {'day_of_week': day_of_week, 'hour': hour, 'minute': minute}
             else:
                 raise ValueError(f"Неподдерживаемая частота: {frequency}")
 
-            # Сохраняем информацию о запланированных постах в БД
-            for i in range(repetitions):
-                # Рассчитываем примерную дату публикации для записи в БД
-                if frequency == "daily":
-                    planned_date = datetime.now() + timedelta(days=i)
-                else:  # weekly
-                    planned_date = datetime.now() + timedelta(weeks=i)
-                planned_date = planned_date.replace(hour=hour, minute=minute)
-
-                # Создаем запись в БД для каждого поста
-                self.db.create_publication(
-                    user_id=user_id,
-                    pub_type=pub_type,
-                    text=text,
-                    cost=0,  # Стоимость уже списана
-                    status='scheduled'
-                )
+            # Время каждого повтора берется у того же расписания, по которому сработает задача,
+            # последний повтор ограничивает задачу
+            fire_times = self._plan_fire_times(CronTrigger(**cron_fields), repetitions)
+            trigger = CronTrigger(**cron_fields, end_date=fire_times[-1])
+            # В БД время хранится без часового пояса (локальное время планировщика)
+            planned_times = [fire_time.replace(tzinfo=None) for fire_time in fire_times]
+
+            # Все повторы сохраняются одной транзакцией
+            occurrences = await self.db.create_publications_bulk(
+                user_id=user_id,
+                pub_type=pub_type,
+                text=text,
+                cost=0,  # Стоимость уже списана
+                planned_times=planned_times,
+                status='scheduled',
+                frequency=frequency,
+                day_of_week=day_of_week
+            )
 
             # Добавляем задачу в планировщик
+            self._recurring_occurrences[job_id] = occurrences
             self.scheduler.add_job(
                 self._publish_recurring_post,
                 trigger=trigger,
-                args=[user_id, text, pub_type, repetitions, job_id],
+                args=[user_id, text, pub_type, repetitions, job_id, occurrences],
                 id=job_id,
-                end_date=end_date,
                 replace_existing=True
             )
 
@@ -159,6 +164,25 @@ class PublicationScheduler:
             logger.error(f"Ошибка планирования повторяющейся публикации: {e}")
             raise
 
+    @staticmethod
+    def _plan_fire_times(trigger: CronTrigger, repetitions: int) -> List[datetime]:
+        """
+        Ближайшие repetitions срабатываний триггера
+
+        Args:
+            trigger: Триггер задачи
+            repetitions: Количество повторений
+
+        Returns:
+            List[datetime]: Время срабатываний (в часовом поясе триггера)
+        """
+        fire_time = trigger.get_next_fire_time(None, datetime.now(trigger.timezone))
+        fire_times = [fire_time]
+        while len(fire_times) < max(1, repetitions):
+            fire_time = trigger.get_next_fire_time(fire_time, fire_time)
+            fire_times.append(fire_time)
+        return fire_times
+
     async def _publish_post(self, user_id: int, text: str, pub_type: str, publication_id: int = None):
         """
         Опубликовать пост в группе
@@ -194,7 +218,7 @@ class PublicationScheduler:
 
             # Если не передан ID публикации, создаем новую запись
             if publication_id is None:
-                publication_id = self.db.create_publication(
+                publication_id = await self.db.create_publication(
                     user_id=user_id,
                     pub_type=pub_type,
                     text=text,
@@ -202,7 +226,7 @@ class PublicationScheduler:
                 )
 
             # Обновляем статус публикации
-            self.db.update_publication_status(
+            await self.db.update_publication_status(
                 publication_id=publication_id,
                 status='published',
                 message_id=message.message_id
@@ -216,7 +240,7 @@ class PublicationScheduler:
             await self._notify_user_error(user_id, str(e))
 
     async def _publish_recurring_post(self, user_id: int, text: str, pub_type: str,
-                                      repetitions_left: int, job_id: str):
+                                      repetitions_left: int, job_id: str, occurrences: list = None):
         """
         Опубликовать повторяющийся пост
 
@@ -226,10 +250,24 @@ class PublicationScheduler:
             pub_type: Тип публикации
             repetitions_left: Количество оставшихся повторений
             job_id: ID задачи
+            occurrences: Оставшиеся повторы (ID публикации, ID запланированной публикации)
         """
         try:
+            publication_id = None
+            if occurrences:
+                # Публикуется заранее созданная публикация очередного повтора
+                (publication_id, scheduled_post_id), rest = occurrences[0], occurrences[1:]
+                # До первого await: снятие остатка при завершении задачи его уже не видит
+                if job_id in self._recurring_occurrences:
+                    self._recurring_occurrences[job_id] = rest
+                await self.db.deactivate_scheduled_post(scheduled_post_id)
+                if rest:
+                    self.scheduler.modify_job(
+                        job_id, args=[user_id, text, pub_type, len(rest), job_id, rest]
+                    )
+
             # Публикуем пост
-            await self._publish_post(user_id, text, pub_type)
+            await self._publish_post(user_id, text, pub_type, publication_id)
 
             # Уменьшаем счетчик в БД если есть такая необходимость
             # Это не обязательно, так как мы используем end_date для ограничения
@@ -240,6 +278,32 @@ class PublicationScheduler:
             logger.error(f"Ошибка публикации повторяющегося поста: {e}")
             # Не уведомляем пользователя, так как это уже делается в _publish_post
 
+    def _on_job_removed(self, event: JobEvent):
+        """
+        Задача удалена: триггер дошел до end_date или задача отменена
+
+        Снятие выполняется отдельной задачей event loop. Планировщик создает
+        задачу последнего запуска раньше, чем удаляет задачу, поэтому
+        повтор, который публикуется сейчас, к этому моменту уже забран
+        из остатка.
+        """
+        if event.job_id not in self._recurring_occurrences:
+            return
+        task = asyncio.get_running_loop().create_task(self._expire_occurrences(event.job_id))
+        self._expire_tasks.add(task)
+        task.add_done_callback(self._expire_tasks.discard)
+
+    async def _expire_occurrences(self, job_id: str):
+        """Снять в БД неопубликованные повторы завершенной задачи"""
+        occurrences = self._recurring_occurrences.pop(job_id, None)
+        if not occurrences:
+            return
+        try:
+            expired = await self.db.expire_scheduled_occurrences(occurrences)
+            logger.warning(f"Задача {job_id} завершена, не опубликовано повторов: {expired}")
+        except Exception as e:
+            logger.error(f"Ошибка снятия повторов задачи {job_id}: {e}")
+
     async def _notify_user_published(self, user_id: int, pub_type: str, published_time: datetime):
         """
         Уведомить пользователя об успешной публикации
@@ -316,6 +380,29 @@ class PublicationScheduler:
                 })
         return jobs
 
+    def add_interval_job(self, func, seconds: float, job_id: str) -> str:
+        """
+        Добавить периодическую служебную задачу (сброс сессий, очистка и т.п.)
+
+        Args:
+            func: Корутина или функция без аргументов
+            seconds: Период запуска, сек
+            job_id: ID задачи (повторное добавление заменяет задачу)
+
+        Returns:
+            str: ID задачи планировщика
+        """
+        self.scheduler.add_job(
+            func,
+            trigger=IntervalTrigger(seconds=seconds),
+            id=job_id,
+            replace_existing=True,
+            max_instances=1,
+            coalesce=True
+        )
+        logger.info(f"Добавлена периодическая задача {job_id} (каждые {seconds} сек)")
+        return job_id
+
     def shutdown(self):
         """Остановить планировщик"""
         if self.scheduler.running:
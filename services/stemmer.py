@@ -0,0 +1,191 @@
+import re
+from functools import lru_cache
+from typing import Dict, FrozenSet, Iterable, List, Set, Tuple
+
+# Стеммер Портера (Snowball) для русского языка. Регулярные выражения
+# компилируются один раз при импорте; окончания ищутся как суффикс:
+# самое левое совпадение с якорем $ - самое длинное окончание
+VOWELS = 'аеиоуыэюя'
+
+PERFECTIVE_GERUND = re.compile(r'(?:ив|ивши|ившись|ыв|ывши|ывшись|(?<=[ая])(?:в|вши|вшись))$')
+REFLEXIVE = re.compile(r'(?:ся|сь)$')
+ADJECTIVE = re.compile(r'(?:ее|ие|ые|ое|ими|ыми|ей|ий|ый|ой|ем|им|ым|ом|его|ого|ему|ому|их|ых|ую|юю|ая|яя|ою|ею)$')
+PARTICIPLE = re.compile(r'(?:ивш|ывш|ующ|(?<=[ая])(?:ем|нн|вш|ющ|щ))$')
+VERB = re.compile(
+    r'(?:ила|ыла|ена|ейте|уйте|ите|или|ыли|ей|уй|ил|ыл|им|ым|ен|ило|ыло|ено|ят|ует|уют|ит|ыт|ены|ить|ыть|ишь|ую|ю'
+    r'|(?<=[ая])(?:ла|на|ете|йте|ли|й|л|ем|н|ло|но|ет|ют|ны|ть|ешь|нно))$'
+)
+NOUN = re.compile(
+    r'(?:а|ев|ов|ие|ье|е|иями|ями|ами|еи|ии|и|ией|ей|ой|ий|й|иям|ям|ием|ем|ам|ом|о|у|ах|иях|ях|ы|ь|ию|ью|ю|ия|ья|я)$'
+)
+SUPERLATIVE = re.compile(r'(?:ейше|ейш)$')
+DERIVATIONAL = re.compile(r'ость?$')
+
+# Слова текста: буквы и цифры
+TOKEN = re.compile(r'\w+')
+# Размер кэша основ: словарь объявлений ограничен, слова повторяются
+STEM_CACHE_SIZE = 100000
+# Более короткие основы слишком многозначны ("кред" - и "кредит", и "кредо";
+# "за" - и "заем", и предлог): такие слова сравниваются только целиком
+MIN_STEM_LENGTH = 5
+# Окончания существительных и прилагательных для форм стоп-слова в индексе
+ENDINGS = (
+    'а', 'я', 'о', 'е', 'и', 'ы', 'у', 'ю', 'ь', 'ой', 'ей', 'ом', 'ем', 'ам', 'ям', 'ах', 'ях',
+    'ами', 'ями', 'ов', 'ев', 'ий', 'ый', 'ая', 'ое', 'ые', 'ого', 'его', 'ому', 'ему', 'ых', 'их', 'ую',
+)
+ADJECTIVE_ENDINGS = ('ый', 'ий', 'ой', 'ая', 'яя', 'ое', 'ее', 'ые', 'ие')
+
+
+def _region_start(word: str, start: int) -> int:
+    """Начало области после первой пары "гласная + согласная" начиная с start"""
+    for index in range(start + 1, len(word)):
+        if word[index] not in VOWELS and word[index - 1] in VOWELS:
+            return index + 1
+    return len(word)
+
+
+def _cut(rv: str, pattern: re.Pattern) -> Tuple[str, bool]:
+    match = pattern.search(rv)
+    if match is None:
+        return rv, False
+    return rv[:match.start()], True
+
+
+def _snowball(word: str) -> str:
+    # RV - часть после первой гласной, R2 - вторая область Snowball
+    rv_start = next((index + 1 for index, char in enumerate(word) if char in VOWELS), len(word))
+    r2_start = _region_start(word, _region_start(word, 0))
+    prefix, rv = word[:rv_start], word[rv_start:]
+
+    # Шаг 1: деепричастие; иначе возвратность и прилагательное/глагол/существительное
+    rv, removed = _cut(rv, PERFECTIVE_GERUND)
+    if not removed:
+        rv, _ = _cut(rv, REFLEXIVE)
+        rv, removed = _cut(rv, ADJECTIVE)
+        if removed:
+            rv, _ = _cut(rv, PARTICIPLE)
+        else:
+            rv, removed = _cut(rv, VERB)
+            if not removed:
+                rv, _ = _cut(rv, NOUN)
+
+    # Шаг 2: конечное "и"
+    if rv.endswith('и'):
+        rv = rv[:-1]
+
+    # Шаг 3: словообразовательный суффикс в R2
+    match = DERIVATIONAL.search(rv)
+    if match is not None and rv_start + match.start() >= r2_start:
+        rv = rv[:match.start()]
+
+    # Шаг 4: "нн" -> "н", превосходная степень, мягкий знак
+    if rv.endswith('нн'):
+        rv = rv[:-1]
+    else:
+        rv, removed = _cut(rv, SUPERLATIVE)
+        if removed and rv.endswith('нн'):
+            rv = rv[:-1]
+        elif rv.endswith('ь'):
+            rv = rv[:-1]
+
+    return prefix + rv
+
+
+@lru_cache(maxsize=STEM_CACHE_SIZE)
+def stem(word: str) -> str:
+    """Основа слова (слово в нижнем регистре), один проход Snowball"""
+    return _snowball(word.replace('ё', 'е'))
+
+
+def word_key(word: str) -> str:
+    """
+    Ключ слова в индексе: основа, а если она короче MIN_STEM_LENGTH - само
+    слово с префиксом "=" (чтобы "занят" не совпало с основой "занятость")
+    """
+    return _key(word.replace('ё', 'е'), stem(word))
+
+
+def _key(word: str, word_stem: str) -> str:
+    return word_stem if len(word_stem) >= MIN_STEM_LENGTH else '=' + word
+
+
+def stem_tokens(text: str) -> List[str]:
+    """Ключи (word_key) всех слов текста (текст в нижнем регистре)"""
+    return [word_key(token) for token in TOKEN.findall(text)]
+
+
+def inflections(word: str) -> Set[str]:
+    """
+    Слово и его формы с окончаниями существительных и прилагательных
+
+    Snowball снимает у разных форм разные окончания: "кредит" -> "кред"
+    (как глагол на "-ит"), а "кредиты" -> "кредит". Поэтому в индекс
+    кладутся ключи всех форм стоп-слова, а не одна основа.
+    """
+    if word.endswith(ADJECTIVE_ENDINGS):
+        base = word[:-2]
+    elif word[-1:] in 'аяоеиыуюьй':
+        base = word[:-1]
+    else:
+        base = word
+    forms = {word}
+    if len(base) > 1:
+        forms.update(base + ending for ending in ENDINGS)
+    return forms
+
+
+def word_keys(word: str) -> FrozenSet[str]:
+    """Ключи всех форм слова (в обход кэша основ: формы стоп-слов вытеснили бы из него слова текстов)"""
+    return frozenset(_key(form, _snowball(form)) for form in inflections(word.replace('ё', 'е')))
+
+
+class StemIndex:
+    """
+    Хэш-индекс стоп-слов по основам.
+
+    Стоп-слово хранится под ключами (word_key) всех своих форм, поэтому
+    "кредит", "кредиты" и "кредитов" совпадают, а "кредо" - нет. Фраза из
+    нескольких слов хранится под ключами первого слова вместе с наборами
+    ключей остальных. Текст разбивается на слова и стеммируется один раз,
+    каждое слово проверяется одним обращением к словарю.
+    """
+
+    def __init__(self, patterns: Iterable[str]):
+        self.patterns: List[str] = []
+        self._words: Dict[str, List[int]] = {}
+        self._phrases: Dict[str, List[Tuple[int, List[FrozenSet[str]]]]] = {}
+        for pattern in dict.fromkeys(patterns):
+            words = TOKEN.findall(pattern)
+            if not words:
+                continue
+            index = len(self.patterns)
+            rest = [word_keys(word) for word in words[1:]]
+            for key in word_keys(words[0]):
+                if rest:
+                    self._phrases.setdefault(key, []).append((index, rest))
+                else:
+                    self._words.setdefault(key, []).append(index)
+            self.patterns.append(pattern)
+
+    def __len__(self) -> int:
+        return len(self.patterns)
+
+    def find_indexes(self, text: str) -> List[int]:
+        """Индексы найденных слов (по возрастанию, без повторов)"""
+        keys = stem_tokens(text)
+        words, phrases = self._words, self._phrases
+        found = set()
+        for start, key in enumerate(keys):
+            matched = words.get(key)
+            if matched:
+                found.update(matched)
+            for index, rest in phrases.get(key, ()):
+                if (start + len(rest) < len(keys)
+                        and all(keys[start + 1 + offset] in variants for offset, variants in enumerate(rest))):
+                    found.add(index)
+        return sorted(found)
+
+    def find_all(self, text: str) -> List[str]:
+        """Найденные в тексте слова в порядке построения индекса"""
+        patterns = self.patterns
+        return [patterns[index] for index in self.find_indexes(text)]
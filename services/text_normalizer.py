@@ -0,0 +1,78 @@
+import re
+import string
+
+# Латинские буквы, похожие на кириллические (после lower()), и "@" вместо "а".
+# Заменяются только в словах, где они смешаны с кириллицей ("кaзинo"): чисто
+# латинские слова остаются как есть, иначе "bet" -> "вет" находилось бы в "привет",
+# а "top" -> "тор" - в "сторож". Цифры не заменяются: иначе "100%" и "2018"
+# становились бы словами и совпадали со стоп-словами
+CONFUSABLES = {
+    'a': 'а', 'b': 'в', 'c': 'с', 'e': 'е', 'h': 'н', 'k': 'к', 'm': 'м', 'n': 'п',
+    'o': 'о', 'p': 'р', 'r': 'г', 't': 'т', 'u': 'и', 'x': 'х', 'y': 'у', '@': 'а',
+}
+CONFUSABLE_TRANSLATION = str.maketrans(CONFUSABLES)
+HAS_CONFUSABLE = re.compile(f'[{re.escape("".join(CONFUSABLES))}]')
+HAS_CYRILLIC = re.compile('[а-яё]')
+WORD = re.compile(r'[\w@]+')
+
+# Невидимые символы: мягкий перенос, нулевой ширины, управление направлением текста, BOM, ударение
+INVISIBLE = (
+    '\u00ad\u034f\u061c\u115f\u1160\u17b4\u17b5\u180e'
+    '\u200b\u200c\u200d\u200e\u200f\u202a\u202b\u202c\u202d\u202e'
+    '\u2060\u2061\u2062\u2063\u2064\u2066\u2067\u2068\u2069\ufeff'
+    '\u0300\u0301'
+)
+
+# Разделители внутри слов ("к.а.з.и.н.о", "к-а-з-и-н-о") удаляются только между
+# буквами: "18+" и "100%" остаются как есть
+SEPARATORS = ''.join(char for char in string.punctuation if char != '@') + '«»„“”‘’‹›–—…·•°№'
+LETTER = r'[^\W\d_]'
+INNER_SEPARATORS = re.compile(f'(?<={LETTER})[{re.escape(SEPARATORS)}]+(?={LETTER})')
+
+# Пробельные символы приводятся к обычному пробелу (тот же набор, что у str.split())
+WHITESPACE = (
+    '\t\n\r\x0b\x0c\x1c\x1d\x1e\x1f\x85\u00a0\u1680\u2028\u2029\u202f\u205f\u3000'
+    + ''.join(chr(code) for code in range(0x2000, 0x200b))
+)
+
+# Таблица строится один раз: один проход str.translate делает все замены и удаления.
+# Латиница, кириллица и общая пунктуация перечислены явно (символ -> он же): промах
+# в таблице для str.translate - это KeyError на символ, что вдвое замедляет проход
+IDENTITY_RANGES = ((0x0000, 0x0500), (0x2000, 0x2070))
+TRANSLATION = str.maketrans({
+    **{code: code for start, end in IDENTITY_RANGES for code in range(start, end)},
+    'ё': 'е',
+    **{char: None for char in INVISIBLE},
+    **{char: ' ' for char in WHITESPACE},
+})
+
+# Буква, повторенная три раза и больше ("кааазино"), схлопывается до одной. Двойные
+# буквы не трогаются: в русском они настоящие ("ссуда", "государственной")
+REPEATS = re.compile(f'({LETTER})\\1{{2,}}')
+SPACES = re.compile(' {2,}')
+
+
+def normalize_text(text: str) -> str:
+    """
+    Нормализовать текст для поиска стоп-слов
+
+    Нижний регистр, латинские двойники -> кириллица в словах со смесью
+    алфавитов, без невидимых символов и разделителей между буквами, тройные
+    и более повторы буквы схлопнуты.
+    Применяется и к тексту объявления, и к стоп-словам при построении
+    автомата, поэтому обе стороны сравниваются в одном виде. Функция
+    идемпотентна и не выходит за границы слов (пробелы не удаляются).
+    """
+    text = INNER_SEPARATORS.sub('', text.lower().translate(TRANSLATION))
+    # Большинство текстов без латиницы - проход по словам не нужен
+    if HAS_CONFUSABLE.search(text) and HAS_CYRILLIC.search(text):
+        text = WORD.sub(_fold_mixed_word, text)
+    return SPACES.sub(' ', REPEATS.sub(r'\1', text)).strip()
+
+
+def _fold_mixed_word(match: re.Match) -> str:
+    """Латинские двойники -> кириллица, если в слове есть и те, и другие буквы"""
+    word = match.group()
+    if HAS_CONFUSABLE.search(word) and HAS_CYRILLIC.search(word):
+        return word.translate(CONFUSABLE_TRANSLATION)
+    return word
@@ -0,0 +1,234 @@
+"""
+Воспроизводимый бенчмарк горячих запросов бота на файловой SQLite.
+
+Запуск: python -m tests.benchmark [--users N] [--operations N] [--stop-words N] [--seed N]
+
+База заполняется синтетическими пользователями с фиксированным seed,
+каждый замер повторяется --rounds раз, в отчет попадает медиана.
+Горячие запросы сравниваются с прежним вариантом через session.query(...)
+с ORM-объектами: SQL и обращения к БД те же, разница - накладные
+расходы Python на построение запроса и загрузку строк.
+"""
+import argparse
+import functools
+import logging
+import random
+import statistics
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Callable, List
+
+from sqlalchemy import insert
+
+from database.db_manager import DatabaseManager, balance_kopecks_expr, from_kopecks
+from database.models import BalanceLedger, User
+from services.aho_corasick import AhoCorasick
+from services.fuzzy_index import FuzzyIndex
+
+STATES = ['idle', 'creating_ad', 'entering_text', 'confirming_publication', 'payment']
+ALPHABET = 'абвгдежзийклмнопрстуфхцчшщыьэюя'
+
+
+def seed_database(db: DatabaseManager, users: int, rng: random.Random) -> List[int]:
+    """Пользователи и журнал баланса одним пакетом на таблицу"""
+    user_ids = list(range(1_000_000, 1_000_000 + users))
+    now = datetime.utcnow()
+    with db.get_session() as session:
+        session.execute(insert(User), [
+            {'user_id': user_id, 'username': f'user{user_id}', 'is_admin': rng.random() < 0.01,
+             'current_state': rng.choice(STATES), 'registration_date': now}
+            for user_id in user_ids
+        ])
+        session.execute(insert(BalanceLedger), [
+            {'user_id': user_id, 'amount_kopecks': rng.randrange(100, 100_000),
+             'kind': 'topup', 'created_at': now}
+            for user_id in user_ids for _ in range(rng.randrange(1, 6))
+        ])
+    return user_ids
+
+
+def measure(operation: Callable[[int], object], user_ids: List[int], rounds: int) -> float:
+    """Медианное время одной операции, мкс"""
+    timings = []
+    for _ in range(rounds):
+        started = time.perf_counter()
+        for user_id in user_ids:
+            operation(user_id)
+        timings.append((time.perf_counter() - started) / len(user_ids) * 1e6)
+    return statistics.median(timings)
+
+
+def run_lookups(db: DatabaseManager, sample: List[int], rounds: int, rng: random.Random) -> List[tuple]:
+    """Замеры горячих запросов на одной выборке пользователей"""
+
+    def get_state_uncached(user_id: int):
+        db.state_cache.invalidate(user_id)
+        return db.get_user_state(user_id)
+
+    def update_state(user_id: int):
+        db.update_user_state(user_id, rng.choice(STATES))
+
+    def refresh_admins(user_id: int):
+        db._admin_ids = None
+        return db.is_user_admin(user_id)
+
+    return [
+        ('get_user_state (без кэша)', measure(get_state_uncached, sample, rounds)),
+        ('get_user_state (кэш)', measure(db.get_user_state, sample, rounds)),
+        ('update_user_state', measure(update_state, sample, rounds)),
+        ('get_user_balance', measure(db.get_user_balance, sample, rounds)),
+        ('is_user_admin (refresh)', measure(refresh_admins, sample, rounds)),
+        ('is_user_admin (кэш)', measure(db.is_user_admin, sample, rounds)),
+        ('load_user_work', measure(db.load_user_work, sample, rounds)),
+    ]
+
+
+def run_legacy_comparison(db: DatabaseManager, sample: List[int], rounds: int,
+                          rng: random.Random) -> List[tuple]:
+    """
+    Те же запросы в прежнем виде (session.query на каждый вызов, ORM-объекты)
+    против заготовленных выражений; кэш состояний не используется.
+    is_user_admin не сравнивается: он читает не строку пользователя,
+    а множество админов раз в admin_refresh_interval
+    """
+
+    def legacy_get_user_state(user_id: int):
+        with db.get_session() as session:
+            user = session.query(User).filter(User.user_id == user_id).first()
+            return user.current_state if user else 'idle'
+
+    def get_user_state(user_id: int):
+        db.state_cache.invalidate(user_id)
+        return db.get_user_state(user_id)
+
+    def legacy_update_user_state(user_id: int):
+        with db.get_session() as session:
+            user = session.query(User).filter(User.user_id == user_id).first()
+            if user:
+                user.current_state = rng.choice(STATES)
+
+    def update_user_state(user_id: int):
+        db.state_cache.invalidate(user_id)
+        db.update_user_state(user_id, rng.choice(STATES))
+
+    def legacy_get_user_balance(user_id: int):
+        with db.get_session() as session:
+            return from_kopecks(session.query(balance_kopecks_expr(user_id)).scalar() or 0)
+
+    pairs = [
+        ('get_user_state', legacy_get_user_state, get_user_state),
+        ('update_user_state', legacy_update_user_state, update_user_state),
+        ('get_user_balance', legacy_get_user_balance, db.get_user_balance),
+    ]
+    return [(name, measure(legacy, sample, rounds), measure(current, sample, rounds))
+            for name, legacy, current in pairs]
+
+
+def random_word(rng: random.Random, min_length: int, max_length: int) -> str:
+    return ''.join(rng.choice(ALPHABET) for _ in range(rng.randint(min_length, max_length)))
+
+
+def add_typo(word: str, rng: random.Random) -> str:
+    """Одна опечатка: замена, вставка, удаление или перестановка соседних букв"""
+    position = rng.randrange(1, len(word) - 1)
+    kind = rng.randrange(4)
+    if kind == 0:
+        return word[:position] + rng.choice(ALPHABET) + word[position + 1:]
+    if kind == 1:
+        return word[:position] + rng.choice(ALPHABET) + word[position:]
+    if kind == 2:
+        return word[:position] + word[position + 1:]
+    return word[:position - 1] + word[position] + word[position - 1] + word[position + 1:]
+
+
+def run_stop_words(stop_words: int, texts: int, rng: random.Random) -> List[tuple]:
+    """
+    Полнота и пропускная способность поиска стоп-слов: подстрока против
+    опечаток d=1 и d=2. Каждый текст содержит одно стоп-слово длиннее
+    8 букв с одной опечаткой среди случайных слов
+    """
+    words = list({random_word(rng, 5, 12) for _ in range(stop_words)})
+    long_words = [word for word in words if len(word) > 8]
+    samples = []
+    for _ in range(texts):
+        filler = [random_word(rng, 2, 10) for _ in range(rng.randint(10, 40))]
+        filler.insert(rng.randrange(len(filler)), add_typo(rng.choice(long_words), rng))
+        samples.append(' '.join(filler))
+
+    matchers = [
+        ('подстрока', AhoCorasick),
+        ('опечатки d=1', functools.partial(FuzzyIndex, max_distance=1)),
+        ('опечатки d=2', functools.partial(FuzzyIndex, max_distance=2)),
+    ]
+    results = []
+    for name, build in matchers:
+        started = time.perf_counter()
+        matcher = build(words)
+        build_seconds = time.perf_counter() - started
+        started = time.perf_counter()
+        found = sum(1 for text in samples if matcher.find_indexes(text))
+        elapsed = time.perf_counter() - started
+        results.append((name, build_seconds, found / len(samples), len(samples) / elapsed))
+    return results
+
+
+def print_report(title: str, results: List[tuple]):
+    print(f'\n{title}')
+    for name, microseconds in results:
+        print(f'  {name:<32} {microseconds:10.1f} мкс/оп  {1e6 / microseconds:12.0f} оп/с')
+
+
+def print_comparison_report(title: str, results: List[tuple]):
+    print(f'\n{title}')
+    print(f'  {"":<20} {"query()":>12} {"выражения":>12}')
+    for name, legacy, current in results:
+        print(f'  {name:<20} {legacy:8.1f} мкс {current:8.1f} мкс  x{legacy / current:4.2f}')
+
+
+def print_stop_words_report(title: str, results: List[tuple]):
+    print(f'\n{title}')
+    for name, build_seconds, recall, throughput in results:
+        print(f'  {name:<16} построение {build_seconds:6.2f} с  полнота {recall:6.1%}  {throughput:10.0f} текстов/с')
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Бенчмарк горячих запросов на файловой SQLite')
+    parser.add_argument('--users', type=int, default=20_000, help='Пользователей в базе')
+    parser.add_argument('--operations', type=int, default=2_000, help='Операций в одном замере')
+    parser.add_argument('--rounds', type=int, default=5, help='Повторов каждого замера')
+    parser.add_argument('--stop-words', type=int, default=20_000, help='Синтетических стоп-слов')
+    parser.add_argument('--texts', type=int, default=2_000, help='Текстов для проверки стоп-слов')
+    parser.add_argument('--seed', type=int, default=42, help='Seed генератора данных')
+    args = parser.parse_args()
+
+    logging.disable(logging.INFO)
+    rng = random.Random(args.seed)
+    with tempfile.TemporaryDirectory() as directory:
+        db = DatabaseManager(f"sqlite:///{Path(directory) / 'benchmark.db'}")
+        try:
+            db.migrate()
+            user_ids = seed_database(db, args.users, rng)
+            sample = rng.sample(user_ids, min(args.operations, len(user_ids)))
+            print_report(
+                f'Горячие запросы: {args.users} пользователей, {len(sample)} операций, '
+                f'{args.rounds} повторов, seed={args.seed}',
+                run_lookups(db, sample, args.rounds, rng)
+            )
+            print_comparison_report(
+                'Прежний session.query(...) против заготовленных выражений (без кэша состояний)',
+                run_legacy_comparison(db, sample, args.rounds, rng)
+            )
+        finally:
+            db.engine.dispose()
+
+    # Свой генератор: данные стоп-слов не зависят от размеров первой части
+    print_stop_words_report(
+        f'Стоп-слова: {args.stop_words} слов, {args.texts} текстов с опечаткой, seed={args.seed}',
+        run_stop_words(args.stop_words, args.texts, random.Random(args.seed))
+    )
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,12 @@
+import pytest
+
+from database.db_manager import DatabaseManager
+
+
+@pytest.fixture
+def db(tmp_path):
+    """DatabaseManager на файле SQLite во временном каталоге, схема создана миграциями"""
+    manager = DatabaseManager(f"sqlite:///{tmp_path / 'bot.db'}")
+    manager.migrate()
+    yield manager
+    manager.engine.dispose()
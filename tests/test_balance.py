@@ -0,0 +1,120 @@
+import sqlite3
+import threading
+
+import pytest
+from sqlalchemy.exc import OperationalError
+
+from database.retry import LockRetryPolicy
+
+USER_ID = 1001
+
+
+def locked_error():
+    return OperationalError('INSERT', {}, sqlite3.OperationalError('database is locked'))
+
+
+@pytest.fixture
+def user_db(db):
+    db.get_or_create_user(USER_ID, 'user')
+    return db
+
+
+def test_update_balance_credits_and_debits(user_db):
+    assert user_db.update_balance(USER_ID, 100) is True
+    assert user_db.update_balance(USER_ID, -30) is True
+    assert user_db.get_user_balance(USER_ID) == 70
+
+
+def test_insufficient_debit_returns_false(user_db):
+    user_db.update_balance(USER_ID, 10)
+    assert user_db.update_balance(USER_ID, -30) is False
+    assert user_db.get_user_balance(USER_ID) == 10
+
+
+@pytest.mark.parametrize('amount', [50, -50])
+def test_database_error_returns_false(user_db, monkeypatch, amount):
+    """Ошибка БД на обоих путях (зачисление и списание) - False, а не исключение"""
+    user_db.retry_policy = LockRetryPolicy(attempts=2, base_delay=0)
+
+    def locked_session():
+        raise locked_error()
+
+    monkeypatch.setattr(user_db, 'get_session', locked_session)
+    assert user_db.update_balance(USER_ID, amount) is False
+
+
+def test_lock_error_is_retried():
+    policy = LockRetryPolicy(attempts=3, base_delay=0)
+    calls = []
+
+    def flaky():
+        calls.append(True)
+        if len(calls) < 3:
+            raise locked_error()
+        return 'ok'
+
+    assert policy.call(flaky) == 'ok'
+    assert (policy.retries, policy.recovered) == (2, 1)
+
+
+def test_other_errors_are_not_retried():
+    policy = LockRetryPolicy(attempts=3, base_delay=0)
+    calls = []
+
+    def broken():
+        calls.append(True)
+        raise OperationalError('SELECT', {}, sqlite3.OperationalError('no such table: users'))
+
+    with pytest.raises(OperationalError):
+        policy.call(broken)
+    assert len(calls) == 1
+
+
+def test_compaction_between_debits_keeps_balance(user_db):
+    user_db.update_balance(USER_ID, 100)
+    expected = 100
+    for step in range(10):
+        assert user_db.debit_if_sufficient(USER_ID, 7, reference=f'step:{step}') is not None
+        expected -= 7
+        user_db.update_balance(USER_ID, 2)
+        expected += 2
+        user_db.compact_balance_snapshots(min_age=0)
+        assert user_db.get_user_balance(USER_ID) == expected
+
+    # Повторное сжатие без новых записей ничего не меняет
+    assert user_db.compact_balance_snapshots(min_age=0)['users'] == 0
+    assert user_db.get_user_balance(USER_ID) == expected
+
+
+def test_concurrent_debits_and_compaction_keep_balance(user_db):
+    user_db.update_balance(USER_ID, 100)
+    debited = []
+    errors = []
+
+    def debit():
+        try:
+            for _ in range(10):
+                if user_db.debit_if_sufficient(USER_ID, 3) is not None:
+                    debited.append(3)
+        except Exception as e:
+            errors.append(e)
+
+    def compact():
+        try:
+            for _ in range(20):
+                user_db.compact_balance_snapshots(min_age=0)
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=debit) for _ in range(4)] + [threading.Thread(target=compact)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert errors == []
+    # 40 попыток по 3 при балансе 100: успешны ровно 33, в минус баланс не уходит
+    assert len(debited) == 33
+    assert user_db.get_user_balance(USER_ID) == 100 - sum(debited)
+    user_db.compact_balance_snapshots(min_age=0)
+    assert user_db.get_user_balance(USER_ID) == 1
@@ -0,0 +1,56 @@
+from dataclasses import FrozenInstanceError, fields
+from datetime import datetime, timedelta
+
+import pytest
+
+from database.dto import LedgerEntryDTO, PaymentDTO, PublicationDTO, ScheduledPostDTO, UserDTO
+
+USER_ID = 1001
+
+
+@pytest.fixture
+def filled_db(db):
+    db.get_or_create_user(USER_ID, 'user', 'Иван')
+    db.update_balance(USER_ID, 500)
+    publication_id = db.create_publication(USER_ID, 'job', 'Требуются грузчики', 100)
+    db.create_payment(USER_ID, 500, 'card')
+    db.create_scheduled_post(USER_ID, publication_id, datetime.now() + timedelta(hours=1))
+    return db
+
+
+def read_results(db):
+    return [
+        (UserDTO, db.get_or_create_user(USER_ID)),
+        (UserDTO, db.get_user_by_id(USER_ID)),
+        (PublicationDTO, db.get_user_publications(USER_ID)[0]),
+        (PaymentDTO, db.get_user_payments(USER_ID)[0]),
+        (LedgerEntryDTO, db.get_balance_history(USER_ID)[0]),
+        (ScheduledPostDTO, db.get_scheduled_posts(USER_ID)[0]),
+    ]
+
+
+def test_read_methods_return_dtos(filled_db):
+    for dto_class, result in read_results(filled_db):
+        assert type(result) is dto_class
+
+
+def test_dto_fields_match_slots():
+    for dto_class in (UserDTO, PublicationDTO, PaymentDTO, LedgerEntryDTO, ScheduledPostDTO):
+        assert tuple(field.name for field in fields(dto_class)) == dto_class.__slots__
+
+
+def test_dtos_are_frozen_and_have_no_dict(filled_db):
+    for _, result in read_results(filled_db):
+        assert not hasattr(result, '__dict__')
+        with pytest.raises(FrozenInstanceError):
+            result.id = 0
+
+
+def test_dto_values_come_from_columns(filled_db):
+    user = filled_db.get_user_by_id(USER_ID)
+    assert (user.user_id, user.username, user.first_name) == (USER_ID, 'user', 'Иван')
+
+    publication = filled_db.get_user_publications(USER_ID)[0]
+    assert (publication.text, publication.cost, publication.type) == ('Требуются грузчики', 100, 'job')
+
+    assert filled_db.get_user_by_id(USER_ID + 1) is None
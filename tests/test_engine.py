@@ -0,0 +1,64 @@
+import pytest
+from sqlalchemy import text
+from sqlalchemy.exc import OperationalError
+
+from database.db_manager import DatabaseManager
+from database.engine import engine_options, is_memory_sqlite, read_only_pragmas
+
+POOL_OPTIONS = {'pool_size': 5, 'max_overflow': 10, 'pool_timeout': 30,
+                'pool_recycle': None, 'pool_pre_ping': True}
+
+
+@pytest.mark.parametrize('url, expected', [
+    ('sqlite://', True),
+    ('sqlite:///:memory:', True),
+    ('sqlite:///file:bot?mode=memory&uri=true', True),
+    ('sqlite:///bot.db', False),
+    ('postgresql://user@localhost/bot', False),
+])
+def test_is_memory_sqlite(url, expected):
+    assert is_memory_sqlite(url) is expected
+
+
+def test_engine_options_sqlite_memory_drops_queue_pool_options():
+    assert engine_options('sqlite://', POOL_OPTIONS) == {}
+
+
+def test_engine_options_sqlite_file_keeps_pool_size_only():
+    assert engine_options('sqlite:///bot.db', POOL_OPTIONS) == {
+        'pool_size': 5, 'max_overflow': 10, 'pool_timeout': 30,
+    }
+
+
+def test_engine_options_postgres_profile_does_not_override_config():
+    options = engine_options('postgresql://user@localhost/bot', {'pool_size': 5, 'pool_recycle': 600})
+    assert options == {'pool_size': 5, 'pool_recycle': 600, 'pool_pre_ping': True}
+
+
+def test_sqlite_profile_applied_to_connections(db):
+    with db.engine.connect() as connection:
+        pragmas = {name: connection.execute(text(f"PRAGMA {name}")).scalar()
+                   for name in ('journal_mode', 'synchronous', 'busy_timeout', 'temp_store')}
+    # synchronous=1 - NORMAL, temp_store=2 - MEMORY
+    assert pragmas == {'journal_mode': 'wal', 'synchronous': 1, 'busy_timeout': 5000, 'temp_store': 2}
+
+
+def test_custom_busy_timeout(tmp_path):
+    manager = DatabaseManager(f"sqlite:///{tmp_path / 'bot.db'}", sqlite_pragmas={'busy_timeout': 1234})
+    with manager.engine.connect() as connection:
+        assert connection.execute(text("PRAGMA busy_timeout")).scalar() == 1234
+    manager.engine.dispose()
+
+
+def test_read_engine_is_read_only(tmp_path):
+    url = f"sqlite:///{tmp_path / 'bot.db'}"
+    manager = DatabaseManager(url, read_database_url=url)
+    manager.migrate()
+    assert read_only_pragmas()['query_only'] == 'ON'
+
+    with manager.read_engine.connect() as connection:
+        assert connection.execute(text("SELECT count(*) FROM users")).scalar() == 0
+        with pytest.raises(OperationalError):
+            connection.execute(text("INSERT INTO users (user_id) VALUES (1)"))
+    manager.engine.dispose()
+    manager.read_engine.dispose()
@@ -0,0 +1,84 @@
+import pytest
+import pytest_asyncio
+
+from database.async_db_manager import AsyncDatabaseManager
+from services.filter_service import MODE_FUZZY, StopWordsFilter
+from services.fuzzy_index import FuzzyIndex, allowed_distance, deletes, edit_distance
+
+
+@pytest.mark.parametrize('a, b, distance', [
+    ('казино', 'казино', 0),
+    ('казино', 'кaзино', 1),   # замена
+    ('казино', 'казинно', 1),  # вставка
+    ('казино', 'казно', 1),    # удаление
+    ('казино', 'казнио', 1),   # перестановка соседних символов
+    ('казино', 'кзаинo', 2),   # перестановка и латинская o
+])
+def test_edit_distance(a, b, distance):
+    assert edit_distance(a, b, 2) == distance
+
+
+def test_edit_distance_stops_above_limit():
+    assert edit_distance('казино', 'домино', 1) == 2
+    assert edit_distance('казино', 'каз', 1) == 2
+
+
+def test_deletes_include_word_itself():
+    assert deletes('кот', 1) == {'кот', 'от', 'кт', 'ко'}
+
+
+def test_allowed_distance_depends_on_length():
+    assert allowed_distance('кот', 2) == 0
+    assert allowed_distance('казино', 2) == 1
+    assert allowed_distance('букмекерская', 2) == 2
+    assert allowed_distance('букмекерская', 1) == 1
+
+
+def test_short_words_match_only_exactly():
+    index = FuzzyIndex(['кот'], max_distance=2)
+    assert index.find_indexes('кит и код') == []
+    assert index.find_indexes('кот') == [0]
+
+
+def test_typos_are_found():
+    index = FuzzyIndex(['казино', 'букмекерская'], max_distance=2)
+    assert index.find_indexes('лучшее казнио города') == [0]
+    assert index.find_indexes('букмекерскя кантора') == [1]
+    assert index.find_indexes('бкмекерскя кантора') == [1]
+    assert index.find_indexes('домино по вечерам') == []
+
+
+def test_phrases_match_only_exactly():
+    index = FuzzyIndex(['быстрые деньги'], max_distance=2)
+    assert index.find_indexes('быстрые деньги без вложений') == [0]
+    assert index.find_indexes('быстрые деньих без вложений') == []
+
+
+@pytest_asyncio.fixture
+async def fuzzy_filter(tmp_path):
+    db = AsyncDatabaseManager(f"sqlite:///{tmp_path / 'bot.db'}")
+    await db.migrate()
+    stop_words_filter = StopWordsFilter(db, mode=MODE_FUZZY, max_distance=1)
+    await stop_words_filter.add_stop_words(['Казино', 'кот', 'быстрые деньги'], 1)
+    yield stop_words_filter
+    await db.dispose()
+
+
+@pytest.mark.asyncio
+async def test_filter_finds_typos_after_normalization(fuzzy_filter):
+    assert await fuzzy_filter.check_text('Лучшее КАЗНИО города!') == (True, ['казино'])
+    assert await fuzzy_filter.check_text('кит и код') == (False, [])
+
+
+@pytest.mark.asyncio
+async def test_check_many_matches_check_text(fuzzy_filter):
+    texts = [
+        'Лучшее казнио города!',
+        'кот продается',
+        'Быстрые   деньги и казино',
+        'кит и код',
+        'Лучшее казнио города!',
+    ]
+    expected = [(await fuzzy_filter.check_text(text))[1] for text in texts]
+    assert await fuzzy_filter.check_many(texts) == expected
+    assert expected[2] == ['казино', 'быстрые деньги']
@@ -0,0 +1,79 @@
+from sqlalchemy import inspect, text
+
+from database.db_manager import DatabaseManager
+from database.migrations import LATEST_VERSION
+
+# Схема БД, созданной create_all до миграций (исходные модели)
+BASELINE_SCHEMA = """
+CREATE TABLE users (
+    id INTEGER NOT NULL, user_id INTEGER NOT NULL, username VARCHAR(255),
+    first_name VARCHAR(255), last_name VARCHAR(255), is_admin BOOLEAN,
+    current_state VARCHAR(50), registration_date DATETIME, PRIMARY KEY (id)
+);
+CREATE UNIQUE INDEX ix_users_user_id ON users (user_id);
+CREATE TABLE balance (
+    id INTEGER NOT NULL, user_id INTEGER, amount FLOAT, last_updated DATETIME,
+    PRIMARY KEY (id), UNIQUE (user_id), FOREIGN KEY(user_id) REFERENCES users (user_id)
+);
+CREATE TABLE publications (
+    id INTEGER NOT NULL, user_id INTEGER, type VARCHAR(50) NOT NULL, firm_type VARCHAR(50),
+    firm_name VARCHAR(255), job_title VARCHAR(255), worker_count VARCHAR(100),
+    work_period VARCHAR(255), work_conditions TEXT, requirements TEXT, salary VARCHAR(255),
+    contacts VARCHAR(500), text TEXT NOT NULL, status VARCHAR(50), created_at DATETIME,
+    published_at DATETIME, cost FLOAT NOT NULL, message_id INTEGER,
+    PRIMARY KEY (id), FOREIGN KEY(user_id) REFERENCES users (user_id)
+);
+CREATE TABLE payments (
+    id INTEGER NOT NULL, user_id INTEGER, amount FLOAT NOT NULL, status VARCHAR(50),
+    payment_method VARCHAR(50), transaction_id VARCHAR(255), created_at DATETIME,
+    completed_at DATETIME, PRIMARY KEY (id), FOREIGN KEY(user_id) REFERENCES users (user_id)
+);
+CREATE TABLE stop_words (
+    id INTEGER NOT NULL, word VARCHAR(255) NOT NULL, added_by INTEGER, created_at DATETIME,
+    PRIMARY KEY (id), UNIQUE (word), FOREIGN KEY(added_by) REFERENCES users (user_id)
+);
+CREATE TABLE user_sessions (
+    id INTEGER NOT NULL, user_id INTEGER, session_data TEXT, last_updated DATETIME,
+    PRIMARY KEY (id), UNIQUE (user_id), FOREIGN KEY(user_id) REFERENCES users (user_id)
+);
+CREATE TABLE scheduled_posts (
+    id INTEGER NOT NULL, user_id INTEGER, publication_id INTEGER, scheduled_time DATETIME NOT NULL,
+    frequency VARCHAR(50), day_of_week INTEGER, repetitions_left INTEGER, is_active BOOLEAN,
+    created_at DATETIME, PRIMARY KEY (id), FOREIGN KEY(user_id) REFERENCES users (user_id),
+    FOREIGN KEY(publication_id) REFERENCES publications (id)
+);
+INSERT INTO users (user_id, username, is_admin, current_state) VALUES (1, 'user', 0, 'creating_ad');
+INSERT INTO users (user_id, username, is_admin, current_state) VALUES (2, 'admin', 1, 'idle');
+INSERT INTO balance (user_id, amount) VALUES (1, 12.5);
+"""
+
+
+def test_baseline_database_is_migrated(tmp_path):
+    db = DatabaseManager(f"sqlite:///{tmp_path / 'bot.db'}")
+    try:
+        raw = db.engine.raw_connection()
+        raw.executescript(BASELINE_SCHEMA)
+        raw.close()
+
+        result = db.migrate()
+        assert result['applied'] == list(range(1, LATEST_VERSION + 1))
+
+        indexes = {index['name'] for index in inspect(db.engine).get_indexes('users')}
+        assert 'ix_users_state_updated_at' in indexes
+        assert db.get_user_balance(1) == 12.5
+        assert db.get_user_state(1) == 'creating_ad'
+        with db.engine.connect() as connection:
+            # Пользователь в мастере получает отметку времени состояния, idle - нет
+            assert connection.execute(text(
+                'SELECT user_id FROM users WHERE state_updated_at IS NOT NULL'
+            )).scalars().all() == [1]
+
+        assert db.migrate()['applied'] == []
+    finally:
+        db.engine.dispose()
+
+
+def test_new_database_is_migrated(db):
+    indexes = {index['name'] for index in inspect(db.engine).get_indexes('users')}
+    assert 'ix_users_state_updated_at' in indexes
+    assert db.migrate()['applied'] == []
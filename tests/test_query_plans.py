@@ -0,0 +1,54 @@
+import pytest
+from sqlalchemy import event, text
+
+
+@pytest.fixture
+def statements(db):
+    """SQL, выполненный через движок во время теста: (statement, parameters)"""
+    captured = []
+
+    def capture(connection, cursor, statement, parameters, context, executemany):
+        captured.append((statement, parameters))
+
+    event.listen(db.engine, 'before_cursor_execute', capture)
+    yield captured
+    event.remove(db.engine, 'before_cursor_execute', capture)
+
+
+def query_plan(db, statement, parameters) -> str:
+    """EXPLAIN QUERY PLAN для запроса с теми же параметрами"""
+    with db.engine.connect() as connection:
+        rows = connection.exec_driver_sql(f"EXPLAIN QUERY PLAN {statement}", parameters).all()
+    return '\n'.join(row[-1] for row in rows)
+
+
+def select_plans(db, statements):
+    return [query_plan(db, statement, parameters) for statement, parameters in statements
+            if statement.lstrip().upper().startswith('SELECT')]
+
+
+@pytest.mark.parametrize('method, args, expected', [
+    ('get_user_publications', (1,), 'USING INDEX ix_publications_user_id_created_at'),
+    ('get_user_payments', (1,), 'USING INDEX ix_payments_user_id_created_at'),
+    ('init_stats_counters', (True,), 'USING COVERING INDEX ix_payments_status_amount'),
+    ('get_scheduled_posts', (), 'USING INDEX ix_scheduled_posts_is_active_scheduled_time'),
+    ('get_scheduled_posts', (1,), 'USING INDEX ix_scheduled_posts_user_id_is_active'),
+])
+def test_hot_queries_use_indexes(db, statements, method, args, expected):
+    getattr(db, method)(*args)
+
+    plans = select_plans(db, statements)
+    assert any(expected in plan for plan in plans), plans
+
+
+def test_create_indexes_restores_missing_index(db):
+    with db.engine.begin() as connection:
+        connection.execute(text("DROP INDEX ix_publications_user_id_created_at"))
+
+    # Повторный вызов не падает на уже существующих индексах
+    db.create_indexes()
+    db.create_indexes()
+
+    with db.engine.connect() as connection:
+        names = set(connection.execute(text("SELECT name FROM sqlite_master WHERE type = 'index'")).scalars())
+    assert 'ix_publications_user_id_created_at' in names
@@ -0,0 +1,31 @@
+from datetime import datetime
+
+from database.query_stats import UNKNOWN_METHOD
+
+USER_ID = 1001
+
+
+def test_flushed_statements_are_charged_to_calling_method(db):
+    db.get_or_create_user(USER_ID, 'user')
+    publication_id = db.create_publication(USER_ID, 'job', 'Требуются грузчики', 100)
+    scheduled_post_id = db.create_scheduled_post(USER_ID, publication_id, datetime.now())
+    payment_id = db.create_payment(USER_ID, 500, 'card')
+
+    db.enable_query_stats()
+    try:
+        db.update_publication_status(publication_id, 'published', message_id=1)
+        db.deactivate_scheduled_post(scheduled_post_id)
+        db.complete_payment(payment_id)
+        db.get_user_state(USER_ID)
+    finally:
+        db.disable_query_stats()
+
+    methods = db.get_query_stats()['methods']
+    assert {'update_publication_status', 'deactivate_scheduled_post',
+            'complete_payment', 'get_user_state'} <= set(methods)
+    assert not {'get_session', 'get_read_session', UNKNOWN_METHOD} & set(methods)
+
+
+def test_disabled_stats_record_nothing(db):
+    db.get_or_create_user(USER_ID, 'user')
+    assert db.get_query_stats()['methods'] == {}
@@ -0,0 +1,120 @@
+import asyncio
+from datetime import datetime, timedelta
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+import pytest_asyncio
+import pytz
+from apscheduler.triggers.cron import CronTrigger
+from apscheduler.triggers.date import DateTrigger
+
+from database.async_db_manager import AsyncDatabaseManager
+from services.scheduler import PublicationScheduler
+
+USER_ID = 1001
+
+
+def fire_times_until_end(trigger: CronTrigger):
+    """Все срабатывания триггера с end_date"""
+    fire_times = []
+    fire_time = trigger.get_next_fire_time(None, datetime.now(trigger.timezone))
+    while fire_time is not None:
+        fire_times.append(fire_time)
+        fire_time = trigger.get_next_fire_time(fire_time, fire_time)
+    return fire_times
+
+
+def test_weekly_times_fall_on_the_scheduled_day():
+    trigger = CronTrigger(day_of_week=0, hour=10, minute=30, timezone=pytz.utc)
+    fire_times = PublicationScheduler._plan_fire_times(trigger, 4)
+
+    assert len(fire_times) == 4
+    assert fire_times[0] > datetime.now(pytz.utc)
+    assert all((time.weekday(), time.hour, time.minute) == (0, 10, 30) for time in fire_times)
+    assert all(later - earlier == timedelta(weeks=1) for earlier, later in zip(fire_times, fire_times[1:]))
+
+
+def test_daily_times_are_consecutive_days():
+    trigger = CronTrigger(hour=9, minute=0, timezone=pytz.utc)
+    fire_times = PublicationScheduler._plan_fire_times(trigger, 3)
+
+    assert all(later - earlier == timedelta(days=1) for earlier, later in zip(fire_times, fire_times[1:]))
+
+
+def test_at_least_one_time_is_planned():
+    trigger = CronTrigger(hour=9, minute=0, timezone=pytz.utc)
+    assert len(PublicationScheduler._plan_fire_times(trigger, 0)) == 1
+
+
+def test_job_fires_exactly_at_planned_times():
+    cron_fields = {'day_of_week': 2, 'hour': 18, 'minute': 0, 'timezone': pytz.utc}
+    fire_times = PublicationScheduler._plan_fire_times(CronTrigger(**cron_fields), 3)
+
+    assert fire_times_until_end(CronTrigger(**cron_fields, end_date=fire_times[-1])) == fire_times
+
+
+@pytest_asyncio.fixture
+async def scheduler(tmp_path):
+    db = AsyncDatabaseManager(f"sqlite:///{tmp_path / 'bot.db'}")
+    await db.migrate()
+    await db.get_or_create_user(USER_ID, 'user')
+    bot = MagicMock()
+    bot.send_photo = AsyncMock(return_value=MagicMock(message_id=1))
+    bot.send_message = AsyncMock(return_value=MagicMock(message_id=2))
+    publication_scheduler = PublicationScheduler(db, bot, group_id=-100)
+    yield publication_scheduler
+    publication_scheduler.shutdown()
+    await db.dispose()
+
+
+async def occurrence_states(scheduler):
+    """(статус публикации, запланированная публикация активна) по порядку повторов"""
+    publications = sorted(await scheduler.db.get_user_publications(USER_ID), key=lambda item: item.id)
+    active = {post.publication_id for post in await scheduler.db.get_scheduled_posts(USER_ID)}
+    return [(publication.status, publication.id in active) for publication in publications]
+
+
+async def wait_for_expiration(scheduler):
+    # Снятие остатка - задача event loop, созданная при удалении задачи планировщика
+    for _ in range(100):
+        await asyncio.sleep(0.01)
+        if not scheduler._expire_tasks and not scheduler._recurring_occurrences:
+            return
+
+
+@pytest.mark.asyncio
+async def test_cancelled_job_expires_leftover_occurrences(scheduler):
+    job_id = await scheduler.schedule_recurring_post(USER_ID, 'Текст', 'daily', '10:00', repetitions=3)
+    assert await occurrence_states(scheduler) == [('scheduled', True)] * 3
+
+    assert scheduler.cancel_job(job_id)
+    await wait_for_expiration(scheduler)
+
+    assert await occurrence_states(scheduler) == [('expired', False)] * 3
+    assert await scheduler.db.get_scheduled_publications_chunk() == []
+
+
+@pytest.mark.asyncio
+async def test_published_occurrence_is_not_expired(scheduler):
+    job_id = await scheduler.schedule_recurring_post(USER_ID, 'Текст', 'daily', '10:00', repetitions=3)
+    job = scheduler.scheduler.get_job(job_id)
+
+    await scheduler._publish_recurring_post(*job.args)
+    scheduler.cancel_job(job_id)
+    await wait_for_expiration(scheduler)
+
+    assert await occurrence_states(scheduler) == [('published', False)] + [('expired', False)] * 2
+
+
+@pytest.mark.asyncio
+async def test_missed_final_run_expires_leftover_occurrences(scheduler):
+    """Срабатывание пропущено (misfire), а триггер закончился - задача удаляется планировщиком"""
+    job_id = await scheduler.schedule_recurring_post(USER_ID, 'Текст', 'daily', '10:00', repetitions=2)
+    scheduler.scheduler.reschedule_job(
+        job_id, trigger=DateTrigger(run_date=datetime.now(pytz.utc) - timedelta(hours=1))
+    )
+    await wait_for_expiration(scheduler)
+
+    assert scheduler.scheduler.get_job(job_id) is None
+    assert scheduler.bot.send_photo.await_count == 0
+    assert await occurrence_states(scheduler) == [('expired', False)] * 2
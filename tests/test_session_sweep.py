@@ -0,0 +1,78 @@
+from datetime import datetime, timedelta
+
+from sqlalchemy import select, update
+
+from database.models import User, UserSession
+
+TTL = 3600
+
+
+def age(db, user_id, state=False, session=False):
+    """Сдвинуть отметки времени состояния и/или сессии пользователя за TTL"""
+    old = datetime.utcnow() - timedelta(seconds=TTL * 2)
+    with db.get_session() as db_session:
+        if state:
+            db_session.execute(update(User).where(User.user_id == user_id).values(state_updated_at=old))
+        if session:
+            db_session.execute(update(UserSession).where(UserSession.user_id == user_id).values(last_updated=old))
+
+
+def start_wizard(db, user_id, with_session=True):
+    db.get_or_create_user(user_id, f'user{user_id}')
+    db.update_user_state(user_id, 'creating_ad')
+    if with_session:
+        db.save_session_data(user_id, {'step': 1})
+        db.flush_sessions()
+
+
+def stored_state(db, user_id):
+    with db.get_session() as session:
+        return session.execute(
+            select(User.current_state, User.state_updated_at).where(User.user_id == user_id)
+        ).one()
+
+
+def session_exists(db, user_id):
+    with db.get_session() as session:
+        return session.execute(select(UserSession.id).where(UserSession.user_id == user_id)).first() is not None
+
+
+def test_stuck_user_without_session_is_reset(db):
+    start_wizard(db, 1, with_session=False)
+    age(db, 1, state=True)
+
+    assert db.sweep_stale_sessions(TTL)['states_reset'] == 1
+    assert tuple(stored_state(db, 1)) == ('idle', None)
+    assert db.get_user_state(1) == 'idle'
+
+
+def test_stuck_user_with_stale_session_is_reset(db):
+    start_wizard(db, 1)
+    age(db, 1, state=True, session=True)
+
+    result = db.sweep_stale_sessions(TTL)
+    assert (result['states_reset'], result['sessions_deleted']) == (1, 1)
+    assert not session_exists(db, 1)
+
+
+def test_active_wizards_are_kept(db):
+    start_wizard(db, 1)
+    age(db, 1, state=True)    # состояние старое, сессия обновлялась недавно
+    start_wizard(db, 2)
+    age(db, 2, session=True)  # сессия старая, состояние менялось недавно
+
+    result = db.sweep_stale_sessions(TTL)
+    assert (result['states_reset'], result['sessions_deleted']) == (0, 0)
+    assert stored_state(db, 1).current_state == 'creating_ad'
+    assert session_exists(db, 2)
+
+
+def test_idle_user_stale_session_is_deleted(db):
+    db.get_or_create_user(1, 'user1')
+    db.save_session_data(1, {'step': 1})
+    db.flush_sessions()
+    age(db, 1, session=True)
+
+    result = db.sweep_stale_sessions(TTL)
+    assert (result['states_reset'], result['sessions_deleted']) == (0, 1)
+    assert tuple(stored_state(db, 1)) == ('idle', None)
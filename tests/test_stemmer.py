@@ -0,0 +1,26 @@
+from services.stemmer import StemIndex, word_key
+
+
+def test_short_stems_require_exact_match():
+    assert word_key('кот') == '=кот'
+    assert word_key('коты') != word_key('котлеты')
+
+
+def test_inflected_forms_match():
+    index = StemIndex(['кредит', 'ставка', 'государство'])
+    assert index.find_indexes('выдаем кредиты') == [0]
+    assert index.find_indexes('кредитов нет') == [0]
+    assert index.find_indexes('высокими ставками') == [1]
+    assert index.find_indexes('для государства') == [2]
+
+
+def test_short_words_do_not_match_longer_words():
+    index = StemIndex(['кот'])
+    assert index.find_indexes('котлеты и компот') == []
+    assert index.find_indexes('продам кот') == [0]
+
+
+def test_phrases_match_in_order():
+    index = StemIndex(['быстрые деньги'])
+    assert index.find_indexes('быстрых деньгах') == [0]
+    assert index.find_indexes('деньги быстрые') == []
@@ -0,0 +1,42 @@
+from sqlalchemy import event
+
+
+def test_add_stop_words_counts_added_and_skipped(db):
+    assert db.add_stop_words(['Казино', 'кредит', ' казино ', 'кредит'], 1) == {'added': 2, 'skipped': 2}
+    assert db.add_stop_words(['казино', 'ставки'], 1) == {'added': 1, 'skipped': 1}
+    assert db.get_all_stop_words() == ['казино', 'кредит', 'ставки']
+
+
+def test_add_stop_words_bumps_version_only_when_added(db):
+    version = db.get_stop_words_version()
+    db.add_stop_words(['казино'], 1)
+    assert db.get_stop_words_version() == version + 1
+
+    db.add_stop_words(['казино'], 1)
+    assert db.get_stop_words_version() == version + 1
+
+
+def test_add_stop_words_large_batch_is_chunked(db):
+    words = [f'слово{index}' for index in range(1234)]
+    assert db.add_stop_words(words, 1) == {'added': 1234, 'skipped': 0}
+    assert len(db.get_all_stop_words()) == 1234
+
+
+def test_concurrently_inserted_word_counts_as_skipped(db):
+    """Слово, вставленное другим процессом между проверкой и INSERT, не считается добавленным"""
+    injected = []
+
+    def insert_concurrently(connection, cursor, statement, parameters, context, executemany):
+        if statement.startswith('INSERT INTO stop_words') and not injected:
+            injected.append(True)
+            cursor.execute("INSERT INTO stop_words (word, added_by) VALUES ('ставки', 2)")
+
+    event.listen(db.engine, 'before_cursor_execute', insert_concurrently)
+    try:
+        result = db.add_stop_words(['ставки', 'казино'], 1)
+    finally:
+        event.remove(db.engine, 'before_cursor_execute', insert_concurrently)
+
+    assert injected
+    assert result == {'added': 1, 'skipped': 1}
+    assert db.get_all_stop_words() == ['ставки', 'казино']
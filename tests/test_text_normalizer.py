@@ -0,0 +1,72 @@
+import pytest
+import pytest_asyncio
+
+from database.async_db_manager import AsyncDatabaseManager
+from services.filter_service import MATCHERS, StopWordsFilter
+from services.text_normalizer import normalize_text
+
+
+@pytest.mark.parametrize('text, expected', [
+    ('КАЗИНО', 'казино'),
+    ('кaзинo', 'казино'),           # латинские a и o
+    ('k@зино', 'казино'),
+    ('cтaвкa vip', 'ставка vip'),   # чисто латинское слово не заменяется
+    ('к.а.з.и.н.о', 'казино'),
+    ('к-а-з-и-н-о', 'казино'),
+    ('ка\u200bзи\u00adно', 'казино'),  # нулевой ширины и мягкий перенос
+    ('кааазино', 'казино'),
+    ('к  а\tз', 'к а з'),
+])
+def test_obfuscation_is_removed(text, expected):
+    assert normalize_text(text) == expected
+
+
+@pytest.mark.parametrize('text', [
+    'государственной',  # двойные буквы не схлопываются
+    'ссуда',
+    '18+',               # разделители вне слов и цифры не трогаются
+    '100%',
+    '2018',
+    'привет, мир!',
+    'bet',               # латиница без кириллицы не заменяется
+    'top casino',
+    'user@mail',
+])
+def test_clean_text_is_kept(text):
+    assert normalize_text(text) == text
+
+
+@pytest.mark.parametrize('text', ['К.а.з.и.н.о 18+', 'кааазино  и  ссуда', 'Привет, мир!'])
+def test_normalization_is_idempotent(text):
+    assert normalize_text(normalize_text(text)) == normalize_text(text)
+
+
+@pytest_asyncio.fixture(params=sorted(MATCHERS))
+async def latin_filter(request, tmp_path):
+    db = AsyncDatabaseManager(f"sqlite:///{tmp_path / 'bot.db'}")
+    await db.migrate()
+    # "xxx" в обход clean_words - как слово, добавленное до проверки длины
+    await db.add_stop_words(['bet', 'top', 'xxx', 'казино'], 1)
+    yield StopWordsFilter(db, mode=request.param)
+    await db.dispose()
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize('text', [
+    'Привет! Дам совет и ответ.',
+    'Требуется сторож',
+    'Лучший автор',
+    'Хорошая работа',
+])
+async def test_latin_stop_words_do_not_match_clean_russian_text(latin_filter, text):
+    assert await latin_filter.check_text(text) == (False, [])
+
+
+@pytest.mark.asyncio
+async def test_latin_stop_words_match_latin_text(latin_filter):
+    assert await latin_filter.check_text('top bet') == (True, ['bet', 'top'])
+    assert await latin_filter.check_text('Лучшее кaзинo') == (True, ['казино'])
+
+
+def test_single_letter_stop_words_are_rejected():
+    assert StopWordsFilter.clean_words(['xxx', 'ххх', ' bet ']) == ['bet']
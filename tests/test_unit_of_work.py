@@ -0,0 +1,140 @@
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+import pytest_asyncio
+from sqlalchemy import event
+from telegram import Update
+
+from database.async_db_manager import AsyncDatabaseManager
+from database.unit_of_work import UserUnitOfWork
+from handlers.user_handlers import UserHandlers
+
+USER_ID = 1001
+
+
+class TransactionCounter:
+    """Завершенные транзакции движка: все и только те, в которых была запись"""
+
+    def __init__(self, engine):
+        self.engine = engine
+        self.commits = 0
+        self.write_commits = 0
+        self.statements = []
+        self._writing = False
+
+    def __enter__(self):
+        event.listen(self.engine, 'before_cursor_execute', self._before_cursor_execute)
+        event.listen(self.engine, 'commit', self._commit)
+        return self
+
+    def __exit__(self, *exc_info):
+        event.remove(self.engine, 'before_cursor_execute', self._before_cursor_execute)
+        event.remove(self.engine, 'commit', self._commit)
+
+    def _before_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        self.statements.append(statement)
+        if not statement.lstrip().upper().startswith('SELECT'):
+            self._writing = True
+
+    def _commit(self, conn):
+        self.commits += 1
+        if self._writing:
+            self.write_commits += 1
+        self._writing = False
+
+
+def test_state_change_is_tracked_only_for_new_value():
+    work = UserUnitOfWork(USER_ID, state='idle')
+    work.state = 'idle'
+    assert not work.state_changed and not work.has_changes
+    work.state = 'entering_text'
+    assert work.state_changed and work.has_changes
+
+
+def test_session_changes_are_tracked():
+    work = UserUnitOfWork(USER_ID, session_json='{"step": 1}', session_exists=True)
+    assert not work.session_changed
+    work.session_data['step'] = 2
+    assert work.session_changed
+
+    work.clear_session()
+    assert work.session_cleared and work.session_changed
+
+    empty = UserUnitOfWork(USER_ID)
+    empty.clear_session()
+    assert not empty.has_changes
+
+
+def test_broken_session_json_starts_empty():
+    assert UserUnitOfWork(USER_ID, session_json='{broken').session_data == {}
+
+
+def test_step_is_one_read_and_one_write_transaction(db):
+    db.get_or_create_user(USER_ID, 'user')
+
+    with TransactionCounter(db.engine) as counter:
+        with db.user_work(USER_ID) as work:
+            work.session_data['firm_type'] = 'ИП'
+            work.state = 'entering_firm_name'
+
+    assert (counter.commits, counter.write_commits) == (2, 1)
+    # Чтение всех данных пользователя, смена состояния и запись сессии в той же транзакции
+    assert [statement.split()[0] for statement in counter.statements] == ['SELECT', 'UPDATE', 'INSERT']
+    assert db.get_user_state(USER_ID) == 'entering_firm_name'
+    assert db.get_session_data(USER_ID) == {'firm_type': 'ИП'}
+
+
+def test_step_without_changes_does_not_write(db):
+    db.get_or_create_user(USER_ID, 'user')
+
+    with TransactionCounter(db.engine) as counter:
+        with db.user_work(USER_ID):
+            pass
+
+    assert (counter.commits, counter.write_commits) == (1, 0)
+
+
+def test_failed_step_discards_changes(db):
+    db.get_or_create_user(USER_ID, 'user')
+    db.state_cache.clear()
+
+    with TransactionCounter(db.engine) as counter:
+        with pytest.raises(RuntimeError):
+            with db.user_work(USER_ID) as work:
+                work.session_data['firm_type'] = 'ИП'
+                work.state = 'entering_firm_name'
+                raise RuntimeError('ошибка обработчика')
+
+    assert counter.write_commits == 0
+    assert db.get_user_state(USER_ID) == 'idle'
+    assert db.get_session_data(USER_ID) == {}
+
+
+@pytest_asyncio.fixture
+async def async_db(tmp_path):
+    db = AsyncDatabaseManager(f"sqlite:///{tmp_path / 'bot.db'}")
+    await db.migrate()
+    await db.get_or_create_user(USER_ID, 'user')
+    yield db
+    await db.dispose()
+
+
+def callback_update(data: str) -> Update:
+    update = MagicMock(spec=Update)
+    update.effective_user.id = USER_ID
+    update.callback_query = AsyncMock()
+    update.callback_query.data = data
+    return update
+
+
+@pytest.mark.asyncio
+async def test_wizard_step_with_nested_handler_commits_once(async_db):
+    """Выбор дня недели передает unit of work в ask_for_time: один коммит на весь шаг"""
+    handlers = UserHandlers(async_db)
+
+    with TransactionCounter(async_db.sync_db.engine) as counter:
+        await handlers.process_weekday_choice(callback_update('weekday_2'), MagicMock())
+
+    assert (counter.commits, counter.write_commits) == (2, 1)
+    assert await async_db.get_user_state(USER_ID) == 'entering_time'
+    assert (await async_db.get_session_data(USER_ID))['autopost_weekday'] == 2
@@ -0,0 +1,42 @@
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+import pytest_asyncio
+from telegram import Update
+
+from database.async_db_manager import AsyncDatabaseManager
+from handlers.admin_handlers import AdminHandlers
+from handlers.user_handlers import UserHandlers
+from services.filter_service import StopWordsFilter
+
+ADMIN_ID = 1001
+
+
+@pytest_asyncio.fixture
+async def async_db(tmp_path):
+    db = AsyncDatabaseManager(f"sqlite:///{tmp_path / 'bot.db'}")
+    await db.migrate()
+    await db.get_or_create_user(ADMIN_ID, 'admin')
+    await db.set_user_admin(ADMIN_ID, True)
+    yield db
+    await db.dispose()
+
+
+@pytest.mark.asyncio
+async def test_admin_start_reuses_shared_filter(async_db, monkeypatch):
+    """/start админа не создает второй фильтр (и второй автомат стоп-слов)"""
+    filter_service = StopWordsFilter(async_db)
+    handlers = UserHandlers(async_db, filter_service)
+    used_filters = []
+
+    async def admin_start(self, update, context):
+        used_filters.append(self.filter_service)
+
+    monkeypatch.setattr(AdminHandlers, 'admin_start', admin_start)
+    update = MagicMock(spec=Update)
+    update.effective_user.id = ADMIN_ID
+    update.message = AsyncMock()
+
+    await handlers.start_command(update, MagicMock())
+
+    assert used_filters == [filter_service]